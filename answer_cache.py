@@ -0,0 +1,254 @@
+"""Local semantic answer cache for repeated curriculum questions.
+
+Answers are stored in SQLite next to a hashed n-gram vector of the
+normalized prompt, scoped by class and medium. Lookups try an exact key
+first and fall back to cosine similarity over the scope's vectors, so
+near-duplicate questions ("what is photosynthesis?" / "What is
+photosynthesis") are served without a model call. Everything runs on
+CPU with the standard library.
+
+Each medium's answers are evicted against their own byte budget
+(ANSWER_CACHE_MAX_BYTES, or ANSWER_CACHE_MEDIUM_MAX_BYTES such as
+"Telugu=33554432,Urdu=33554432"), so a busy English medium cannot push
+out the Telugu and Urdu translations (translation.py).
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+VECTOR_DIM = 4096
+MIN_PROMPT_WORDS = 3  # "yes", "explain more" etc. depend on the conversation
+# Follow-ups that point back at the previous answer are not standalone questions
+CONTEXT_WORDS = {"it", "this", "that", "these", "those", "above", "again", "more", "same", "previous"}
+
+
+# ═══════════════════════════════════════════════════════════════
+# NORMALIZATION & VECTORS
+# ═══════════════════════════════════════════════════════════════
+def normalize_prompt(text):
+    """Lowercase, strip punctuation and collapse whitespace (keeps Telugu/Urdu letters)"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    # Only punctuation/symbols go: Telugu vowel signs are combining marks, not \w
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return " ".join(text.split())
+
+
+def _bucket(feature):
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little") % VECTOR_DIM
+
+
+def embed(normalized):
+    """Sparse L2-normalized vector of hashed word unigrams and char trigrams"""
+    vec = {}
+    for word in normalized.split():
+        idx = _bucket("w:" + word)
+        vec[idx] = vec.get(idx, 0.0) + 2.0
+    padded = f" {normalized} "
+    for i in range(len(padded) - 2):
+        idx = _bucket("c:" + padded[i:i + 3])
+        vec[idx] = vec.get(idx, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+    return {k: v / norm for k, v in vec.items()}
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+def _numbers(normalized):
+    # "chapter 1" and "chapter 2" are near-identical strings but different questions
+    return sorted(re.findall(r"\d+", normalized))
+
+
+def is_cacheable(prompt):
+    """Only standalone questions are shared between students"""
+    words = normalize_prompt(prompt).split()
+    return len(words) >= MIN_PROMPT_WORDS and not CONTEXT_WORDS.intersection(words)
+
+
+def _medium_budgets(spec):
+    """{medium: bytes} from a "Telugu=33554432,Urdu=33554432" setting"""
+    budgets = {}
+    for item in spec.split(","):
+        medium, _, size = item.partition("=")
+        if medium.strip() and size.strip().isdigit():
+            budgets[medium.strip()] = int(size)
+    return budgets
+
+
+# ═══════════════════════════════════════════════════════════════
+# ANSWER CACHE
+# ═══════════════════════════════════════════════════════════════
+class AnswerCache:
+    """Process-wide answer cache with TTL, LRU eviction and a byte-size cap per medium"""
+
+    def __init__(self, path=None, max_bytes=None, ttl_seconds=None, threshold=None, medium_max_bytes=None):
+        self.path = path or os.getenv("ANSWER_CACHE_PATH", ".cache/answer_cache.sqlite3")
+        self.max_bytes = max_bytes or int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.medium_max_bytes = medium_max_bytes or _medium_budgets(os.getenv("ANSWER_CACHE_MEDIUM_MAX_BYTES", ""))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        self.threshold = threshold or float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL UNIQUE,
+                normalized TEXT NOT NULL,
+                vector TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS answers_scope ON answers(scope)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS answers_lru ON answers(last_access)")
+        self._db.commit()
+        self._vectors = {}  # scope -> {id: (vector, numbers)}, loaded lazily
+        self._loaded_upto = {}  # scope -> highest row id already in _vectors
+
+    @staticmethod
+    def scope_for(student_class, medium):
+        return f"{student_class}|{medium}"
+
+    def _scope_vectors(self, scope):
+        # Other app workers append to the same file, so pick up rows added since the last look
+        rows = self._db.execute(
+            "SELECT id, normalized, vector FROM answers WHERE scope = ? AND id > ?",
+            (scope, self._loaded_upto.get(scope, 0)),
+        ).fetchall()
+        vectors = self._vectors.setdefault(scope, {})
+        for row_id, normalized, vector in rows:
+            vectors[row_id] = ({int(k): v for k, v in json.loads(vector).items()}, _numbers(normalized))
+        if rows:
+            self._loaded_upto[scope] = max(row[0] for row in rows)
+        return vectors
+
+    def _delete(self, row_ids):
+        self._db.executemany("DELETE FROM answers WHERE id = ?", [(i,) for i in row_ids])
+        for vectors in self._vectors.values():
+            for i in row_ids:
+                vectors.pop(i, None)
+
+    def lookup(self, prompt, student_class, medium, count=True):
+        """Return a cached answer for this prompt and scope, or None (`count=False` leaves the stats alone)"""
+        normalized = normalize_prompt(prompt)
+        scope = self.scope_for(student_class, medium)
+        key = hashlib.sha256(f"{scope}\n{normalized}".encode("utf-8")).hexdigest()
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, answer, created FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            near = False
+            if row is None:
+                query, numbers = embed(normalized), _numbers(normalized)
+                best_id, best_score = None, self.threshold
+                for row_id, (vector, row_numbers) in self._scope_vectors(scope).items():
+                    if row_numbers != numbers:
+                        continue
+                    score = cosine(query, vector)
+                    if score >= best_score:
+                        best_id, best_score = row_id, score
+                if best_id is not None:
+                    row = self._db.execute(
+                        "SELECT id, answer, created FROM answers WHERE id = ?", (best_id,)
+                    ).fetchone()
+                    if row is None:  # evicted by another worker
+                        self._vectors[scope].pop(best_id, None)
+                    near = True
+
+            if row is None:
+                self.stats["misses"] += count
+                return None
+
+            row_id, answer, created = row
+            if now - created > self.ttl_seconds:
+                self._delete([row_id])
+                self._db.commit()
+                self.stats["misses"] += count
+                return None
+
+            self._db.execute("UPDATE answers SET last_access = ? WHERE id = ?", (now, row_id))
+            self._db.commit()
+            self.stats["near_hits" if near else "hits"] += count
+            return answer
+
+    def store(self, prompt, student_class, medium, answer):
+        """Cache an answer, evicting least-recently-used entries past the byte cap"""
+        normalized = normalize_prompt(prompt)
+        scope = self.scope_for(student_class, medium)
+        key = hashlib.sha256(f"{scope}\n{normalized}".encode("utf-8")).hexdigest()
+        vector = embed(normalized)
+        vector_json = json.dumps(vector, separators=(",", ":"))
+        size = len(answer.encode("utf-8")) + len(normalized.encode("utf-8")) + len(vector_json)
+        now = time.time()
+
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO answers (scope, key, normalized, vector, answer, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET answer = excluded.answer, size = excluded.size, "
+                "created = excluded.created, last_access = excluded.last_access",
+                (scope, key, normalized, vector_json, answer, size, now, now),
+            )
+            row_id = self._db.execute(
+                "SELECT id FROM answers WHERE key = ?", (key,)
+            ).fetchone()[0]
+            self._vectors.setdefault(scope, {})[row_id] = (vector, _numbers(normalized))
+            self._evict(now, medium)
+            self._db.commit()
+
+    def _evict(self, now, medium):
+        expired = [r[0] for r in self._db.execute(
+            "SELECT id FROM answers WHERE created < ?", (now - self.ttl_seconds,)
+        )]
+        # Only the medium that just grew can be over its budget
+        budget = self.medium_max_bytes.get(medium, self.max_bytes)
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM answers WHERE substr(scope, instr(scope, '|') + 1) = ?", (medium,)
+        ).fetchone()[0]
+        victims = list(expired)
+        if total > budget:
+            for row_id, size in self._db.execute(
+                "SELECT id, size FROM answers WHERE substr(scope, instr(scope, '|') + 1) = ? ORDER BY last_access",
+                (medium,),
+            ):
+                if total <= budget:
+                    break
+                if row_id not in expired:
+                    victims.append(row_id)
+                total -= size
+        if victims:
+            self._delete(victims)
+            self.stats["evictions"] += len(victims)
+
+    def hit_rate(self):
+        hits = self.stats["hits"] + self.stats["near_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+
+def replay_answer(answer, chunk_words=8):
+    """Yield a cached answer in small pieces so it renders like a live stream"""
+    words = re.split(r"(\s+)", answer)
+    step = chunk_words * 2
+    for i in range(0, len(words), step):
+        yield "".join(words[i:i + step])
@@ -0,0 +1,359 @@
+"""Precomputed answer packs for standard chapter questions.
+
+Chapter summaries, the 1/2/4/8-mark question patterns and key
+definitions are the same for every student of a chapter, so an off-peak
+batch job generates them once per class, subject, medium and chapter:
+
+    python answer_packs.py build --class 10 --subject "Social Studies" --workers 4
+    python answer_packs.py status
+    python answer_packs.py check    # which prompts are served from a pack
+
+Packs are stored in SQLite under a version derived from the chapter's
+curriculum record (and PACK_VERSION), so editing curriculum.json makes
+the affected packs invisible until the next build regenerates them;
+`prune` then drops the stale versions. At request time `AnswerPacks`
+recognises these questions for a known chapter and serves the pack
+instantly, ahead of the answer cache and the model.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from answer_cache import normalize_prompt
+from intent import (
+    CHAPTER_WORDS, CLASS_WORDS, EXPLAIN_CUES, MEDIUM_ALIASES, NUMBER_WORDS, ORDINAL_RE, SUBJECT_ALIASES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump to regenerate every pack (e.g. after changing the requests below)
+PACK_VERSION = "1"
+
+PACK_KINDS = {
+    "summary": (
+        "Explain Chapter {chapter}: \"{title}\" of the Class {class} {subject} SCERT textbook as a "
+        "complete chapter summary: the main topics in textbook order, the key concepts in simple "
+        "words, one Telangana example, and what to focus on for the exam."
+    ),
+    "questions": (
+        "List the important exam questions for Chapter {chapter}: \"{title}\" of the Class {class} "
+        "{subject} SCERT textbook, grouped as 1-mark, 2-mark, 4-mark and 8-mark questions, each "
+        "with a short model answer outline."
+    ),
+    "definitions": (
+        "Give the key terms and definitions from Chapter {chapter}: \"{title}\" of the Class {class} "
+        "{subject} SCERT textbook as a glossary in textbook wording, each with a one-line example."
+    ),
+}
+
+# Requests for the question list itself; "8 marks answer on monsoon" is a question for the model
+QUESTION_CUES = {"important questions", "question bank", "expected questions", "exam questions",
+                 "practice questions", "previous questions", "what questions", "which questions",
+                 "list of questions", "marks questions", "mark questions", "ముఖ్యమైన ప్రశ్నలు",
+                 "ఏ ప్రశ్నలు", "اہم سوالات", "کون سے سوالات"}
+MARKS_RE = re.compile(r"(?<!\w)(?:[1248]|one|two|four|eight) ?marks? (?:important |exam )?questions(?!\w)")
+DEFINITION_CUES = {"definitions", "definition", "key terms", "keywords", "key words", "important terms",
+                   "glossary", "నిర్వచనాలు", "ముఖ్య పదాలు", "تعریفیں", "اہم اصطلاحات"}
+SUMMARY_CUES = EXPLAIN_CUES | {"overview", "notes", "ముఖ్యాంశాలు", "చెప్పండి", "بتائیں"}
+# Words that can surround "explain chapter N" without making it a specific question
+FILLER_WORDS = {"the", "of", "a", "an", "in", "me", "please", "pls", "can", "you", "could", "for", "my",
+                "to", "whole", "full", "complete", "entire", "textbook", "book", "this", "that",
+                "medium", "lo", "cheyandi", "cheppandi", "మొత్తం", "పాఠ్యపుస్తకం", "కి", "ను",
+                "کا", "کی", "کو", "پورا", "مکمل", "کریں"}
+# ... and around "give the important questions / all definitions of chapter N"
+LIST_WORDS = FILLER_WORDS | {"give", "list", "show", "tell", "write", "send", "what", "which", "are", "is",
+                             "all", "most", "some", "important", "from", "with", "and", "answers", "come",
+                             "asked", "expected", "exam", "exams", "there", "ఇవ్వండి", "ఏమిటి", "అన్ని",
+                             "دیں", "کیا", "ہیں", "تمام", "سے", "کے"}
+
+
+def _contains(text, phrase):
+    return re.search(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)", text) is not None
+
+
+def _whole_chapter(text, cues, filler=FILLER_WORDS):
+    """True if nothing but the cues, the book and filler is left: a request about the whole chapter"""
+    for aliases in list(SUBJECT_ALIASES.values()) + list(MEDIUM_ALIASES.values()):
+        for alias in aliases:
+            text = text.replace(alias, " ") if _contains(text, alias) else text
+    text = MARKS_RE.sub(" ", text)
+    for cue in sorted(cues, key=len, reverse=True):
+        text = re.sub(r"(?<!\w)" + re.escape(cue) + r"(?!\w)", " ", text)
+    return not [
+        t for t in text.split()
+        if t not in filler and t not in CHAPTER_WORDS and t not in CLASS_WORDS
+        and t not in NUMBER_WORDS and not ORDINAL_RE.match(t)
+    ]
+
+
+def pack_kind(prompt):
+    """Which pack answers this prompt ("summary", "questions", "definitions"), or None"""
+    text = normalize_prompt(prompt)
+    # "Important questions of chapter 4" is the pack; "important questions on democracy
+    # from chapter 3" and "explain photosynthesis in chapter 3" are specific questions for the model
+    if MARKS_RE.search(text) or any(_contains(text, cue) for cue in QUESTION_CUES):
+        return "questions" if _whole_chapter(text, QUESTION_CUES, LIST_WORDS) else None
+    if any(_contains(text, cue) for cue in DEFINITION_CUES):
+        return "definitions" if _whole_chapter(text, DEFINITION_CUES, LIST_WORDS) else None
+    if any(_contains(text, cue) for cue in SUMMARY_CUES):
+        return "summary" if _whole_chapter(text, SUMMARY_CUES) else None
+    return None
+
+
+def canonical_prompt(prompt, intent):
+    """The same chapter question in any medium or script ("summary class 10 social studies chapter 4"), or None"""
+    # Only whole-chapter requests: "definitions of monsoon in chapter 4" must not be
+    # stored as (or served for) all of chapter 4's definitions. pack_kind checks that.
+    kind = pack_kind(prompt)
+    if kind is None or not (intent["class"] and intent["subject"] and intent["chapter"] is not None):
+        return None
+    return normalize_prompt(f"{kind} class {intent['class']} {intent['subject']} chapter {intent['chapter']}")
+
+
+# (prompt, expected pack kind)
+CASES = [
+    ("explain chapter 1 of 10th social", "summary"),
+    ("explain photosynthesis in chapter 3", None),
+    ("important questions of 10th social chapter 4", "questions"),
+    ("8 marks questions chapter 2", "questions"),
+    ("what questions come from chapter 3", "questions"),
+    ("4 mark important questions for chapter 5", "questions"),
+    ("give all definitions of class 9 biology chapter 2", "definitions"),
+    ("10వ తరగతి సాంఘిక శాస్త్రం 4వ అధ్యాయం ముఖ్యమైన ప్రశ్నలు", "questions"),
+    ("give 8 marks answer for chapter 4 question on monsoon", None),
+    ("explain the definition of monsoon in chapter 4", None),
+    ("4 marks questions on monsoon from chapter 4", None),
+    ("important questions on democracy from chapter 3", None),
+    ("what is the definition of monsoon in class 9 social studies chapter 4", None),
+    ("4 marks questions on monsoon from class 9 social chapter 4", None),
+]
+
+
+def check(cases=CASES):
+    """[(prompt, expected, got)] for every case pack_kind (and so canonical_prompt) gets wrong"""
+    return [(prompt, kind, pack_kind(prompt)) for prompt, kind in cases if pack_kind(prompt) != kind]
+
+
+def pack_version(chapter):
+    """Version of the packs for a chapter record; changes whenever the record does"""
+    record = json.dumps(
+        [PACK_VERSION, chapter["class"], chapter["subject"], chapter["medium"], chapter["chapter"],
+         chapter["title"], chapter["pages"], chapter["month"]],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(record.encode("utf-8")).hexdigest()[:16]
+
+
+class AnswerPacks:
+    """Versioned on-disk packs plus the request-time lookup"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("ANSWER_PACKS_PATH", ".cache/answer_packs.sqlite3")
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS packs (
+                class INTEGER NOT NULL,
+                subject TEXT NOT NULL,
+                medium TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                version TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                model TEXT,
+                created REAL NOT NULL,
+                PRIMARY KEY (class, subject, medium, chapter, kind, version)
+            )
+        """)
+        self._db.commit()
+        self.requests = 0
+        self.hits = 0
+
+    def get(self, chapter, kind):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT answer FROM packs WHERE class = ? AND subject = ? AND medium = ? "
+                "AND chapter = ? AND kind = ? AND version = ?",
+                (chapter["class"], chapter["subject"], chapter["medium"], chapter["chapter"],
+                 kind, pack_version(chapter)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, chapter, kind, answer, model=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO packs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (chapter["class"], chapter["subject"], chapter["medium"], chapter["chapter"],
+                 kind, pack_version(chapter), answer, model, time.time()),
+            )
+            self._db.commit()
+
+    def answer(self, prompt, chapter):
+        """The pack answering `prompt` about `chapter`, or None to go on to the cache/model"""
+        if chapter is None:
+            return None
+        kind = pack_kind(prompt)
+        if kind is None:
+            return None
+        answer = self.get(chapter, kind)
+        with self._lock:
+            self.requests += 1
+            self.hits += answer is not None
+        return answer
+
+    def hit_rate(self):
+        return self.hits / self.requests if self.requests else 0.0
+
+    def prune(self, store):
+        """Delete packs whose chapter record changed or disappeared"""
+        current = set()
+        for class_num, subject, medium in store.textbooks():
+            for chapter in store.chapters(class_num, subject, medium):
+                current.add((class_num, subject, medium, chapter["chapter"], pack_version(chapter)))
+        with self._lock:
+            rows = self._db.execute("SELECT DISTINCT class, subject, medium, chapter, version FROM packs").fetchall()
+            stale = [row for row in rows if tuple(row) not in current]
+            self._db.executemany(
+                "DELETE FROM packs WHERE class = ? AND subject = ? AND medium = ? AND chapter = ? AND version = ?",
+                stale,
+            )
+            self._db.commit()
+        return len(stale)
+
+    def status(self, store):
+        """(fresh, missing) pack counts over the whole curriculum"""
+        fresh = missing = 0
+        for class_num, subject, medium in store.textbooks():
+            for chapter in store.chapters(class_num, subject, medium):
+                for kind in PACK_KINDS:
+                    if self.get(chapter, kind) is None:
+                        missing += 1
+                    else:
+                        fresh += 1
+        return fresh, missing
+
+
+# ═══════════════════════════════════════════════════════════════
+# BATCH GENERATION
+# ═══════════════════════════════════════════════════════════════
+def generate(chapter, kind, completer, textbook_index=None):
+    """Ask the model for one pack, grounded like a live request"""
+    from prompt_prefix import assemble
+    from prompts import SYSTEM_MESSAGE
+    from textbook_index import reference_message
+
+    request = PACK_KINDS[kind].format(**chapter)
+    references = None
+    if textbook_index is not None:
+        references = reference_message(
+            textbook_index.search(f"{chapter['title']} {request}", chapter["class"], chapter["medium"])
+        )
+    chapter_context = f"{chapter['subject']} Chapter {chapter['chapter']}: {chapter['title']}"
+    messages = assemble([SYSTEM_MESSAGE, {"role": "user", "content": request}],
+                        chapter["class"], chapter["medium"], chapter_context, references)
+    report = {}
+    answer = "".join(completer.stream(messages, report=report, max_completion_tokens=4096,
+                                      temperature=0.6, top_p=0.9))
+    return answer, report.get("model")
+
+
+def build(store, packs, completer, textbook_index=None, classes=None, subjects=None,
+          mediums=None, kinds=None, workers=4, force=False):
+    """Generate every missing (or, with force, every) pack; at most `workers` requests at once"""
+    jobs = []
+    for class_num, subject, medium in store.textbooks():
+        if ((classes and class_num not in classes) or (subjects and subject not in subjects)
+                or (mediums and medium not in mediums)):
+            continue
+        for chapter in store.chapters(class_num, subject, medium):
+            for kind in kinds or PACK_KINDS:
+                if force or packs.get(chapter, kind) is None:
+                    jobs.append((chapter, kind))
+
+    result = {"generated": 0, "failed": 0}
+    logger.info("generating %d answer packs with %d workers", len(jobs), workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(generate, chapter, kind, completer, textbook_index): (chapter, kind)
+                   for chapter, kind in jobs}
+        for future in as_completed(futures):
+            chapter, kind = futures[future]
+            label = f"class {chapter['class']} {chapter['subject']} ({chapter['medium']}) ch {chapter['chapter']} {kind}"
+            try:
+                answer, model = future.result()
+            except Exception:
+                logger.exception("answer pack failed: %s", label)
+                result["failed"] += 1
+                continue
+            if answer:
+                packs.put(chapter, kind, answer, model)
+                result["generated"] += 1
+                logger.info("answer pack ready: %s", label)
+            else:
+                result["failed"] += 1
+    result["pruned"] = packs.prune(store)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate precomputed answer packs")
+    parser.add_argument("command", choices=["build", "status", "prune", "check"])
+    parser.add_argument("--class", dest="classes", type=int, action="append", help="repeatable")
+    parser.add_argument("--subject", dest="subjects", action="append", help="repeatable")
+    parser.add_argument("--medium", dest="mediums", action="append", help="repeatable")
+    parser.add_argument("--kind", dest="kinds", action="append", choices=list(PACK_KINDS), help="repeatable")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("ANSWER_PACK_WORKERS", "4")))
+    parser.add_argument("--force", action="store_true", help="regenerate packs that are already fresh")
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        failures = check()
+        for prompt, expected, got in failures:
+            print(f"{prompt!r}: {got!r}, expected {expected!r}")
+        print(f"{len(CASES) - len(failures)}/{len(CASES)} cases pass")
+        if failures:
+            raise SystemExit(1)
+        return
+
+    from curriculum_store import CurriculumStore
+
+    store = CurriculumStore()
+    packs = AnswerPacks()
+    if args.command == "status":
+        fresh, missing = packs.status(store)
+        print(f"{fresh} fresh packs, {missing} missing")
+        return
+    if args.command == "prune":
+        print(f"{packs.prune(store)} stale pack versions removed")
+        return
+
+    from dotenv import load_dotenv
+
+    from completion import ResilientCompleter
+    from groq_client import create_client
+    from textbook_index import TextbookIndex
+
+    load_dotenv()
+    api_key = os.getenv("GROK-API-KEY")
+    if not api_key:
+        sys.exit("GROK-API-KEY is not set (see .env)")
+    client, _ = create_client(api_key, pool_size=args.workers)
+    index = TextbookIndex()
+    index.build()
+    print(build(store, packs, ResilientCompleter(client), index, args.classes, args.subjects,
+                args.mediums, args.kinds, args.workers, args.force))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,179 @@
+"""Fit token_estimator's rates against a model's real tokenizer.
+
+Counts the tokens of a multilingual sample set (the textbook files, the
+system prompt's paragraphs, tutor-style answers and parallel
+English/Telugu/Urdu sentences) with the real tokenizer, fits the
+per-feature rates by least squares, derives the Telugu/Urdu answer-length
+factors from the parallel sentences, and merges the result into
+token_rates.json (the first model calibrated also becomes "default").
+
+Real token counts come either from a local Hugging Face tokenizer or from
+the API's reported prompt_tokens (one tiny request per sample). Rates are
+stored under the Groq model name that `load_rates` looks up, so a
+tokenizer run names the model it stands for with --model:
+
+    python benchmarks/calibrate_tokens.py --hf moonshotai/Kimi-K2-Instruct --model moonshotai/kimi-k2-instruct-0905
+    python benchmarks/calibrate_tokens.py --api moonshotai/kimi-k2-instruct-0905 llama-3.1-8b-instant
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from token_estimator import FEATURES, features  # noqa: E402
+
+# The same sentence in each medium, for the answer-length factors
+PARALLEL = [
+    ("Photosynthesis is the process by which green plants make their food using sunlight.",
+     "కిరణజన్య సంయోగక్రియ అనేది ఆకుపచ్చ మొక్కలు సూర్యరశ్మిని ఉపయోగించి ఆహారం తయారు చేసుకునే ప్రక్రియ.",
+     "ضیائی تالیف وہ عمل ہے جس میں سبز پودے سورج کی روشنی سے اپنی غذا تیار کرتے ہیں۔"),
+    ("Democracy is a form of government in which the people elect their representatives.",
+     "ప్రజాస్వామ్యం అనేది ప్రజలు తమ ప్రతినిధులను ఎన్నుకునే ప్రభుత్వ విధానం.",
+     "جمہوریت حکومت کی وہ شکل ہے جس میں عوام اپنے نمائندے منتخب کرتے ہیں۔"),
+    ("The water cycle is the continuous movement of water between the earth and the atmosphere.",
+     "జల చక్రం అనేది భూమి మరియు వాతావరణం మధ్య నీటి నిరంతర ప్రసరణ.",
+     "آبی چکر زمین اور فضا کے درمیان پانی کی مسلسل گردش ہے۔"),
+    ("Always write the formula first, show all the steps and do not forget the unit.",
+     "ఎల్లప్పుడూ మొదట సూత్రం రాయండి, అన్ని దశలు చూపించండి మరియు యూనిట్ మర్చిపోవద్దు.",
+     "ہمیشہ پہلے فارمولا لکھیں، تمام مراحل دکھائیں اور اکائی لکھنا نہ بھولیں۔"),
+    ("Telangana was formed as a separate state on the second of June, 2014.",
+     "తెలంగాణ 2014 జూన్ 2న ప్రత్యేక రాష్ట్రంగా ఏర్పడింది.",
+     "تلنگانہ 2 جون 2014 کو ایک علیحدہ ریاست کے طور پر قائم ہوا۔"),
+]
+
+MIXED = [
+    "Bhaiya, maths lo geometry easy ga explain cheyandi",
+    "Sir, chapter 3 lo important questions enti? 4 marks ki answer ela rayali?",
+    "Photosynthesis (తెలుగు: కిరణజన్య సంయోగక్రియ) is the process plants use to make food.",
+    "فوٹو سنتھیسس (Photosynthesis) وہ عمل ہے جس میں پودے غذا بناتے ہیں۔",
+    "Solve: x² + 5x + 6 = 0 → (x + 2)(x + 3) = 0, so x = -2 or x = -3 ✅",
+]
+
+
+def samples():
+    from prompts import SYSTEM_PROMPT
+
+    texts = [p.strip() for p in SYSTEM_PROMPT.split("\n\n") if len(p.strip()) > 40]
+    for path in glob.glob(os.path.join(ROOT, "textbooks", "**", "*.txt"), recursive=True):
+        with open(path, encoding="utf-8") as f:
+            texts += [p.strip() for p in f.read().split("\n\n") if len(p.strip()) > 20]
+    texts += MIXED
+    for triple in PARALLEL:
+        texts += list(triple)
+    return list(dict.fromkeys(texts))
+
+
+def hf_counter(name):
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(name, trust_remote_code=True)
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def api_counter(model):
+    from dotenv import load_dotenv
+    from groq import Groq
+
+    load_dotenv()
+    client = Groq(api_key=os.getenv("GROK-API-KEY"))
+
+    def prompt_tokens(text):
+        for attempt in range(5):
+            try:
+                response = client.chat.completions.create(
+                    model=model, messages=[{"role": "user", "content": text}], max_completion_tokens=1
+                )
+                return response.usage.prompt_tokens
+            except Exception:
+                time.sleep(2 ** attempt)
+        raise RuntimeError(f"could not count tokens with {model}")
+
+    overhead = prompt_tokens(".") - 1  # chat template around a one-token message
+    return lambda text: prompt_tokens(text) - overhead
+
+
+def solve(rows, targets):
+    """Least squares via the normal equations; negative rates are dropped and refitted"""
+    names = ["intercept"] + list(FEATURES)
+    active = list(range(len(names)))
+    while True:
+        n = len(active)
+        a = [[sum(r[i] * r[j] for r in rows) for j in active] for i in active]
+        b = [sum(r[i] * t for r, t in zip(rows, targets)) for i in active]
+        for i in range(n):
+            a[i][i] += 1e-6  # features absent from the samples
+        for col in range(n):  # Gaussian elimination with partial pivoting
+            pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+            a[col], a[pivot], b[col], b[pivot] = a[pivot], a[col], b[pivot], b[col]
+            for r in range(col + 1, n):
+                factor = a[r][col] / a[col][col]
+                for c in range(col, n):
+                    a[r][c] -= factor * a[col][c]
+                b[r] -= factor * b[col]
+        x = [0.0] * n
+        for i in reversed(range(n)):
+            x[i] = (b[i] - sum(a[i][j] * x[j] for j in range(i + 1, n))) / a[i][i]
+        negative = [active[i] for i in range(n) if x[i] < 0]
+        if not negative:
+            rates = dict.fromkeys(names, 0.0)
+            rates.update({names[idx]: round(value, 4) for idx, value in zip(active, x)})
+            return rates
+        active = [i for i in active if i not in negative]
+
+
+def calibrate(count):
+    texts = samples()
+    targets = [count(t) for t in texts]
+    rows = [[1.0] + [features(t)[name] for name in FEATURES] for t in texts]
+    rates = solve(rows, targets)
+
+    def estimate(text):
+        counts = features(text)
+        return rates["intercept"] + sum(rates[name] * counts[name] for name in FEATURES)
+
+    error = sum(abs(estimate(t) - n) / max(n, 1) for t, n in zip(texts, targets)) / len(texts)
+    english = sum(count(en) for en, _, _ in PARALLEL)
+    factors = {
+        "English": 1.0,
+        "Telugu": round(sum(count(te) for _, te, _ in PARALLEL) / english, 2),
+        "Urdu": round(sum(count(ur) for _, _, ur in PARALLEL) / english, 2),
+    }
+    return {"rates": rates, "medium_factors": factors, "samples": len(texts),
+            "mean_abs_error_pct": round(error * 100, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate token_estimator against a real tokenizer")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--hf", nargs="+", metavar="TOKENIZER", help="Hugging Face tokenizer names")
+    source.add_argument("--api", nargs="+", metavar="MODEL", help="Groq model names (uses GROK-API-KEY)")
+    parser.add_argument("--model", nargs="+", metavar="MODEL",
+                        help="Groq model name to store each --hf tokenizer's rates under")
+    parser.add_argument("--output", default=os.path.join(ROOT, "token_rates.json"))
+    args = parser.parse_args()
+    if args.hf and len(args.model or []) != len(args.hf):
+        parser.error("--hf needs one --model name per tokenizer")
+    keys = args.model if args.hf else args.api
+
+    try:
+        with open(args.output, encoding="utf-8") as f:
+            table = json.load(f)
+    except (OSError, ValueError):
+        table = {}
+    for name, key in zip(args.hf or args.api, keys):
+        result = calibrate(hf_counter(name) if args.hf else api_counter(name))
+        print(f"{key} ({name}): {json.dumps(result, ensure_ascii=False)}")
+        table[key] = result
+        table.setdefault("default", result)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(table, f, indent=2, ensure_ascii=False)
+    print(f"written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Microbenchmark for CurriculumStore at full-syllabus scale.
+
+Generates a synthetic syllabus (10 classes x 9 subjects x 3 mediums x 20
+chapters), compiles it, and reports lookup latency and resident memory.
+The nested dict that used to live in kimiapp.py is measured alongside
+for comparison.
+
+    python benchmarks/curriculum_bench.py
+"""
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curriculum_store import CurriculumStore  # noqa: E402
+
+SUBJECTS = ["Telugu", "Hindi", "English", "Mathematics", "Physical Science",
+            "Biological Science", "Social Studies", "Environmental Science", "Urdu"]
+MEDIUMS = ["English", "Telugu", "Urdu"]
+CHAPTERS = 20
+WORDS = ["India", "Relief", "Features", "Development", "Climate", "Rivers", "Water", "Population",
+         "Globalisation", "Food", "Security", "Numbers", "Fractions", "Light", "Plants", "Motion"]
+
+
+def synthetic_syllabus():
+    rng = random.Random(42)
+    data = {}
+    for class_num in range(1, 11):
+        data[str(class_num)] = {}
+        for subject in SUBJECTS:
+            data[str(class_num)][subject] = {}
+            for medium in MEDIUMS:
+                page, chapters = 1, {}
+                for chapter in range(1, CHAPTERS + 1):
+                    length = rng.randint(8, 24)
+                    title = " ".join(rng.sample(WORDS, 3)) + f" {chapter}"
+                    chapters[str(chapter)] = {"title": title, "pages": [page, page + length - 1]}
+                    page += length
+                data[str(class_num)][subject][medium] = chapters
+    return data
+
+
+def timed(fn, queries):
+    samples = []
+    for args in queries:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    data = synthetic_syllabus()
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "curriculum.json")
+        with open(source, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        started = time.perf_counter()
+        tracemalloc.start()
+        store = CurriculumStore(source=source, path=os.path.join(tmp, "curriculum.sqlite3"))
+        compile_ms = (time.perf_counter() - started) * 1000
+        store_kb = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+
+        reopen_started = time.perf_counter()
+        CurriculumStore(source=source, path=os.path.join(tmp, "curriculum.sqlite3"))
+        reopen_ms = (time.perf_counter() - reopen_started) * 1000
+
+        exact = [(rng.randint(1, 10), rng.choice(SUBJECTS), rng.choice(MEDIUMS), rng.randint(1, CHAPTERS))
+                 for _ in range(5000)]
+        pages = [(c, s, m, rng.randint(1, 300)) for c, s, m, _ in exact]
+        fuzzy = [(" ".join(rng.sample(WORDS, 2)).lower(),) for _ in range(500)]
+
+        tracemalloc.start()
+        nested = {int(c): {s: {m: {int(ch): info["title"] for ch, info in chs.items()}
+                               for m, chs in ms.items()} for s, ms in ss.items()}
+                  for c, ss in data.items()}
+        dict_kb = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+
+        rows = sum(len(chs) for ss in data.values() for ms in ss.values() for chs in ms.values())
+        print(f"chapters: {rows:,}")
+        print(f"compile: {compile_ms:.1f} ms   reopen (unchanged JSON): {reopen_ms:.1f} ms")
+        print(f"python heap: store {store_kb:,.0f} KB   nested dict {dict_kb:,.0f} KB   max RSS {rss_mb():.1f} MB")
+        for name, fn, queries in [
+            ("exact (class, subject, medium, chapter)", store.chapter, exact),
+            ("page range", store.chapter_for_page, pages),
+            ("fuzzy title across mediums", store.find_title, fuzzy),
+            ("nested dict .get chain", lambda c, s, m, ch: nested.get(c, {}).get(s, {}).get(m, {}).get(ch), exact),
+        ]:
+            p50, p99 = timed(fn, queries)
+            print(f"{name:<42} p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
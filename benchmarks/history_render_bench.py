@@ -0,0 +1,86 @@
+"""Rerun latency vs. history length: old render loop vs. HistoryRenderer.
+
+Runs two tiny Streamlit scripts headlessly with AppTest. Each one renders
+a stored conversation of N turns (realistic ~1.5 KB tutor answers): the
+old section-11 loop that emits every message, and the paginated
+HistoryRenderer. Reports the median rerun time and the number of
+elements produced.
+
+    python benchmarks/history_render_bench.py [turns ...]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from conversation_store import ConversationStore  # noqa: E402
+
+ANSWER = (
+    "📖 **Definition:** Photosynthesis is the process by which green plants make food using "
+    "sunlight, water and carbon dioxide.\n\n🔍 **Explanation:**\n"
+    + "\n".join(f"- Point {i}: chlorophyll in the leaves traps sunlight to make glucose." for i in range(20))
+    + "\n\n📝 **Exam Tip:** This is an important 4-mark question."
+)
+
+LEGACY_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+import streamlit as st
+from conversation_store import ConversationStore
+store = ConversationStore({db!r})
+conversation = store.open_conversation({cid!r})
+for msg in conversation.messages(store):
+    with st.chat_message(msg["role"]):
+        st.markdown(msg["content"])
+"""
+
+RENDERER_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+import streamlit as st
+from conversation_store import ConversationStore
+from history_view import HistoryRenderer
+store = ConversationStore({db!r})
+if "conversation" not in st.session_state:
+    st.session_state.conversation = store.open_conversation({cid!r})
+    st.session_state.renderer = HistoryRenderer()
+st.session_state.renderer.render(st.session_state.conversation, store)
+"""
+
+
+def measure(script, reruns=10):
+    app = AppTest.from_string(script, default_timeout=60)
+    app.run()  # first run: imports and cold caches
+    samples = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(app.markdown)
+
+
+def main():
+    turns_list = [int(t) for t in sys.argv[1:]] or [5, 20, 40, 100, 200]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "conversations.sqlite3")
+        store = ConversationStore(db)
+        print(f"{'turns':>6} {'legacy ms':>10} {'elements':>9} {'renderer ms':>12} {'elements':>9}")
+        for turns in turns_list:
+            conversation = store.new_conversation()
+            for i in range(turns):
+                conversation.append(store, "user", f"Question {i}: what is photosynthesis?")
+                conversation.append(store, "assistant", ANSWER)
+            params = {"root": ROOT, "db": db, "cid": conversation.id}
+            legacy_ms, legacy_elements = measure(LEGACY_SCRIPT.format(**params))
+            renderer_ms, renderer_elements = measure(RENDERER_SCRIPT.format(**params))
+            print(f"{turns:>6} {legacy_ms:>10.1f} {legacy_elements:>9} {renderer_ms:>12.1f} {renderer_elements:>9}")
+
+
+if __name__ == "__main__":
+    main()
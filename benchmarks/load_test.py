@@ -0,0 +1,244 @@
+"""Offline load test: N concurrent students against one app instance.
+
+Starts `mock_groq.py` in a subprocess (so its CPU is not charged to the
+app), points the app at it with GROQ_BASE_URL, and drives kimiapp.py
+headlessly with Streamlit's AppTest: every simulated student is its own
+AppTest session running in a thread, picks a class and medium in the
+sidebar, and asks a few questions from a multilingual prompt mix. All
+sessions share this process's st.cache_resource objects, exactly like
+the sessions of one `streamlit run` server.
+
+Reports throughput, per-turn latency p50/p95/p99, failed turns, CPU use
+and RSS of this (app) process. Save a run with --save and check a later
+change against it with --compare:
+
+    python benchmarks/load_test.py --sessions 20 --turns 3 --save .cache/baseline.json
+    python benchmarks/load_test.py --sessions 20 --turns 3 --compare .cache/baseline.json
+
+Mock server options (--ttft, --tps, --tokens, --error-rate, --break-rate,
+--max-streams) are passed through; see mock_groq.py. With --mock-url and
+--workdir the run uses an already running mock and a shared cache
+directory instead, so several load-test processes act as the workers of
+one cluster (see scaling_bench.py).
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROMPTS = [
+    ("10", "English", "Explain 10th class Social Studies chapter 1"),
+    ("10", "English", "What is globalisation and how does it affect farmers in India?"),
+    ("9", "English", "What is democracy? Give two examples from India"),
+    ("6", "English", "Explain the water cycle with a diagram description"),
+    ("10", "English", "Solve x² + 5x + 6 = 0 step by step"),
+    ("8", "English", "What are the differences between plant cells and animal cells?"),
+    ("10", "Telugu", "కిరణజన్య సంయోగక్రియ అంటే ఏమిటి? వివరించండి"),
+    ("7", "Telugu", "రుతువులు ఎలా వస్తాయి?"),
+    ("10", "Telugu", "సాంఘిక శాస్త్రం 3వ అధ్యాయం ఏమిటి"),
+    ("9", "Urdu", "جمہوریت کیا ہے؟ مثالوں کے ساتھ سمجھائیں"),
+    ("8", "Urdu", "ضیائی تالیف کا عمل بیان کریں"),
+    ("10", "Telugu", "Bhaiya, maths lo quadratic equations easy ga explain cheyandi"),
+    ("6", "English", "Ncert vs scert which book for science class 6?"),
+]
+
+MOCK_OPTIONS = ("ttft", "tps", "tokens", "error_rate", "break_rate", "max_streams")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock(args):
+    port = free_port()
+    command = [sys.executable, os.path.join(ROOT, "benchmarks", "mock_groq.py"), "--port", str(port)]
+    for name in MOCK_OPTIONS:
+        command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return process, port
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("mock Groq server did not start")
+
+
+def configure_app(port, workdir):
+    """Environment for the app under test: mock API, throwaway caches"""
+    os.environ.update({
+        "GROK-API-KEY": "mock-key",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{port}",
+        "METRICS_PORT": "0",
+        "METRICS_LOG_PATH": os.path.join(workdir, "turns.jsonl"),
+        "ANSWER_CACHE_PATH": os.path.join(workdir, "answer_cache.sqlite3"),
+        "ANSWER_PACKS_PATH": os.path.join(workdir, "answer_packs.sqlite3"),
+        "CONVERSATION_DB_PATH": os.path.join(workdir, "conversations.sqlite3"),
+        "CURRICULUM_DB_PATH": os.path.join(workdir, "curriculum.sqlite3"),
+        "TEXTBOOK_INDEX_PATH": os.path.join(workdir, "textbook_index.sqlite3"),
+        "QUOTA_DB_PATH": os.path.join(workdir, "quotas.sqlite3"),
+        "CURRICULUM_PATH": os.path.join(ROOT, "curriculum.json"),
+        "TEXTBOOK_DIR": os.path.join(ROOT, "textbooks"),
+    })
+
+
+def student(index, args, results, errors, turns=None):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(index)
+    app = AppTest.from_file(os.path.join(ROOT, "kimiapp.py"), default_timeout=args.timeout)
+    app.run()
+    student_class, medium, _ = rng.choice(PROMPTS)
+    app.sidebar.selectbox[0].set_value(student_class)
+    app.sidebar.selectbox[1].set_value(medium)
+    app.run()
+    for turn in range(turns or args.turns):
+        if turn:
+            time.sleep(rng.uniform(0, args.think))
+        _, _, prompt = rng.choice(PROMPTS)
+        if not args.cached:
+            prompt = f"{prompt} (student {index}, question {turn})"  # defeat the answer cache
+        started = time.perf_counter()
+        try:
+            app.chat_input[0].set_value(prompt).run()
+        except Exception as exc:  # AppTest timeout
+            errors.append(type(exc).__name__)
+            continue
+        elapsed = time.perf_counter() - started
+        if app.exception or app.error:
+            errors.append("app error")
+        else:
+            results.append(elapsed)
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def run(args):
+    if args.mock_url:
+        mock, port = None, int(args.mock_url.rsplit(":", 1)[1].strip("/"))
+    else:
+        mock, port = start_mock(args)
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            workdir = args.workdir or scratch
+            configure_app(port, workdir)
+            results, errors = [], []
+
+            # Warm-up session: imports, cache_resource factories, index build
+            student(-1, args, [], [], turns=1)
+
+            cpu_started = os.times()
+            started = time.perf_counter()
+            threads = [
+                threading.Thread(target=student, args=(i, args, results, errors), daemon=True)
+                for i in range(args.sessions)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall = time.perf_counter() - started
+            cpu = os.times()
+            cpu_seconds = (cpu.user - cpu_started.user) + (cpu.system - cpu_started.system)
+            mock_stats = json.load(urllib.request.urlopen(f"http://127.0.0.1:{port}/stats"))
+    finally:
+        if mock is not None:
+            mock.terminate()
+
+    return {
+        "sessions": args.sessions,
+        "turns": len(results) + len(errors),
+        "failed": len(errors),
+        "wall_s": round(wall, 2),
+        "throughput_turns_per_s": round(len(results) / wall, 2),
+        "latency_p50_s": percentile(results, 0.50),
+        "latency_p95_s": percentile(results, 0.95),
+        "latency_p99_s": percentile(results, 0.99),
+        "latency_mean_s": statistics.mean(results) if results else None,
+        "cpu_percent": round(cpu_seconds / wall * 100, 1),
+        "rss_mb": rss_mb(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "mock": mock_stats,
+    }
+
+
+def print_report(report, baseline=None):
+    print(f"{report['sessions']} sessions, {report['turns']} turns ({report['failed']} failed) "
+          f"in {report['wall_s']} s")
+    for key in ("throughput_turns_per_s", "latency_p50_s", "latency_p95_s", "latency_p99_s",
+                "cpu_percent", "rss_mb", "peak_rss_mb"):
+        value = report[key]
+        line = f"  {key:<24} {value:>10.2f}" if value is not None else f"  {key:<24} {'-':>10}"
+        if baseline and baseline.get(key) and value is not None:
+            line += f"   baseline {baseline[key]:>10.2f} ({(value - baseline[key]) / baseline[key]:+.1%})"
+        print(line)
+    print(f"  mock server: {report['mock']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for kimiapp.py")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent students")
+    parser.add_argument("--turns", type=int, default=3, help="questions per student")
+    parser.add_argument("--think", type=float, default=1.0, help="max pause between questions (s)")
+    parser.add_argument("--timeout", type=float, default=180, help="AppTest timeout per rerun (s)")
+    parser.add_argument("--cached", action="store_true", help="repeat prompts verbatim (answer cache hits)")
+    parser.add_argument("--save", help="write the report to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--mock-url", help="use this running mock server (http://127.0.0.1:PORT)")
+    parser.add_argument("--workdir", help="cache directory to use (shared between workers)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--ttft", type=float, default=0.4)
+    parser.add_argument("--tps", type=float, default=150.0)
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--break-rate", type=float, default=0.0)
+    parser.add_argument("--max-streams", type=int, default=0)
+    args = parser.parse_args()
+
+    report = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print_report(report, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Local mock of the Groq chat-completions streaming API.
+
+Speaks just enough of `POST /openai/v1/chat/completions` (stream=True,
+server-sent events over chunked HTTP/1.1 with keep-alive) for the app's
+Groq client. Point the app at it with GROQ_BASE_URL=http://127.0.0.1:PORT.
+The latency and failure behaviour is configurable:
+
+    --ttft          seconds before the first token (+/- 25% jitter)
+    --tps           tokens per second after the first one
+    --tokens        answer length in tokens
+    --error-rate    share of requests answered with a 500
+    --break-rate    share of streams cut off half-way (no terminating chunk)
+    --max-streams   concurrent streams beyond which requests get a 429
+    --retry-after   seconds sent in the 429's retry-after header
+
+The answer is canned text in the script of the last user message (Telugu,
+Urdu or English), and the final chunk carries `x_groq.usage` like the real
+API.
+
+    python benchmarks/mock_groq.py --port 8765 --ttft 0.4 --tps 150
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWERS = {
+    "english": (
+        "📖 **Definition:** Photosynthesis is the process by which green plants prepare their food "
+        "using sunlight, water and carbon dioxide. 🔍 **Explanation:** Chlorophyll in the leaves traps "
+        "sunlight. Water reaches the leaves from the roots and carbon dioxide enters through the "
+        "stomata. Glucose is made and oxygen is released. 📝 **Exam Tip:** Draw the labelled diagram "
+        "for full marks. "
+    ),
+    "telugu": (
+        "📖 **నిర్వచనం:** కిరణజన్య సంయోగక్రియ అనేది ఆకుపచ్చ మొక్కలు సూర్యరశ్మి, నీరు మరియు "
+        "కార్బన్ డయాక్సైడ్ ఉపయోగించి ఆహారం తయారు చేసుకునే ప్రక్రియ. 🔍 **వివరణ:** ఆకులలోని "
+        "పత్రహరితం సూర్యరశ్మిని గ్రహిస్తుంది. 📝 **పరీక్ష చిట్కా:** చిత్రం గీసి భాగాలు గుర్తించండి. "
+    ),
+    "urdu": (
+        "📖 **تعریف:** ضیائی تالیف وہ عمل ہے جس میں سبز پودے سورج کی روشنی، پانی اور کاربن "
+        "ڈائی آکسائیڈ سے اپنی غذا تیار کرتے ہیں۔ 🔍 **وضاحت:** پتوں میں موجود کلوروفل روشنی "
+        "جذب کرتا ہے۔ 📝 **امتحانی مشورہ:** نامزد خاکہ ضرور بنائیں۔ "
+    ),
+}
+
+
+def _script(text):
+    if any("ఀ" <= ch <= "౿" for ch in text):
+        return "telugu"
+    if any("؀" <= ch <= "ۿ" for ch in text):
+        return "urdu"
+    return "english"
+
+
+def _tokens(text, count):
+    """`count` word-ish tokens, repeating the canned answer as needed"""
+    words = text.split(" ")
+    return [words[i % len(words)] + " " for i in range(count)]
+
+
+class MockGroq:
+    """Configuration and counters shared by all request handlers"""
+
+    def __init__(self, ttft=0.4, tps=150.0, tokens=400, error_rate=0.0, break_rate=0.0,
+                 max_streams=0, retry_after=1.0, seed=None):
+        self.ttft = ttft
+        self.tps = tps
+        self.tokens = tokens
+        self.error_rate = error_rate
+        self.break_rate = break_rate
+        self.max_streams = max_streams
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "broken": 0}
+
+    def count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def admit(self):
+        with self._lock:
+            self.counts["requests"] += 1
+            if self.max_streams and self.active >= self.max_streams:
+                self.counts["rate_limited"] += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+def make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status, payload, headers=()):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _chunk(self, payload):
+            data = f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._json(200, dict(mock.counts, active=mock.active))
+            else:
+                self._json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                self._json(404, {"error": {"message": "not found"}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not mock.admit():
+                self._json(429, {"error": {"message": "Rate limit reached", "code": "rate_limit_exceeded"}},
+                           headers=[("retry-after", str(mock.retry_after))])
+                return
+            try:
+                self._stream(request)
+            finally:
+                mock.release()
+
+        def _stream(self, request):
+            rng = mock.random
+            if rng.random() < mock.error_rate:
+                mock.count("errors")
+                self._json(500, {"error": {"message": "Internal server error", "type": "internal_server_error"}})
+                return
+
+            messages = request.get("messages", [])
+            last_user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+            tokens = _tokens(ANSWERS[_script(last_user)], mock.tokens)
+            cut_at = rng.randrange(1, len(tokens)) if rng.random() < mock.break_rate else None
+            base = {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+            }
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(max(mock.ttft * rng.uniform(0.75, 1.25), 0))
+            interval = 1 / mock.tps if mock.tps else 0
+            for i, token in enumerate(tokens):
+                if i == cut_at:
+                    mock.count("broken")
+                    self.close_connection = True
+                    return  # no terminating chunk: the client sees a broken stream
+                delta = {"content": token} if i else {"role": "assistant", "content": token}
+                self._chunk(dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}]))
+                if interval:
+                    time.sleep(interval)
+
+            prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+            self._chunk(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}], x_groq={
+                "id": base["id"],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens),
+                    "prompt_tokens_details": {"cached_tokens": 0},
+                },
+            }))
+            data = b"data: [DONE]\n\n"
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n0\r\n\r\n")
+            self.wfile.flush()
+            mock.count("ok")
+
+    return Handler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.4)
+    parser.add_argument("--tps", type=float, default=150.0)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--break-rate", type=float, default=0.0)
+    parser.add_argument("--max-streams", type=int, default=0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    mock = MockGroq(args.ttft, args.tps, args.tokens, args.error_rate, args.break_rate,
+                    args.max_streams, args.retry_after, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(mock))
+    server.daemon_threads = True
+    print(f"mock Groq API on http://{args.host}:{server.server_port} (GET /stats for counters)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
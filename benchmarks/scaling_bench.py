@@ -0,0 +1,112 @@
+"""Horizontal scaling benchmark: the same load on 1, 2, 4 and 8 app workers.
+
+Each worker is a separate `load_test.py` process (one Python interpreter,
+like one `streamlit run` worker behind cluster.py) driving its share of
+the simulated students. All workers talk to one shared mock Groq server
+and share one cache directory, so the SQLite answer cache, answer packs,
+conversation store, curriculum and textbook index are contended exactly
+as in a cluster. SCHEDULER_MAX_CONCURRENT is split across workers as
+cluster.py does, so the upstream concurrency stays the same at every size.
+
+    python benchmarks/scaling_bench.py --sessions 32 --turns 3 --workers 1 2 4 8
+    python benchmarks/scaling_bench.py --sessions 32 --cached --save .cache/scaling.json
+
+Reported per worker count: throughput (turns/s, summed over workers),
+speedup and parallel efficiency against the smallest count, worst p95
+latency, failed turns and total RSS. With a fixed mock TTFT/tokens rate
+the ceiling is the upstream concurrency, not the app: raise --max-concurrent
+(or the mock's --tps) to see CPU scaling. Numbers depend on the machine;
+run this on the target host rather than quoting results from elsewhere.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cluster import worker_env  # noqa: E402
+from load_test import MOCK_OPTIONS, start_mock  # noqa: E402
+
+
+def run_workers(count, args, port, workdir):
+    """Run `count` load-test workers at once; their JSON reports"""
+    sessions = [args.sessions // count + (i < args.sessions % count) for i in range(count)]
+    processes = []
+    for index, share in enumerate(sessions):
+        command = [
+            sys.executable, os.path.join(ROOT, "benchmarks", "load_test.py"),
+            "--sessions", str(share), "--turns", str(args.turns), "--think", str(args.think),
+            "--mock-url", f"http://127.0.0.1:{port}", "--workdir", workdir, "--json",
+        ]
+        if args.cached:
+            command.append("--cached")
+        env = worker_env(index, count, metrics_port=0, max_concurrent=args.max_concurrent)
+        processes.append(subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True))
+    reports = []
+    for process in processes:
+        output, _ = process.communicate()
+        lines = [line for line in output.splitlines() if line.startswith("{")]
+        if process.returncode or not lines:
+            raise RuntimeError(f"load-test worker failed with exit code {process.returncode}")
+        reports.append(json.loads(lines[-1]))
+    return reports
+
+
+def summarize(count, reports):
+    p95 = [r["latency_p95_s"] for r in reports if r["latency_p95_s"] is not None]
+    return {
+        "workers": count,
+        "turns": sum(r["turns"] for r in reports),
+        "failed": sum(r["failed"] for r in reports),
+        "throughput_turns_per_s": round(sum(r["throughput_turns_per_s"] for r in reports), 2),
+        "latency_p95_s": max(p95) if p95 else None,
+        "rss_mb": round(sum(r["rss_mb"] or 0 for r in reports), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of 1..N app workers on a shared cache")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--sessions", type=int, default=32, help="students in total, split across workers")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--think", type=float, default=1.0)
+    parser.add_argument("--cached", action="store_true", help="repeat prompts verbatim (shared cache hits)")
+    parser.add_argument("--max-concurrent", type=int, default=32, help="cluster-wide API concurrency")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--ttft", type=float, default=0.4)
+    parser.add_argument("--tps", type=float, default=150.0)
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--break-rate", type=float, default=0.0)
+    parser.add_argument("--max-streams", type=int, default=0)
+    args = parser.parse_args()
+
+    mock, port = start_mock(args)
+    rows = []
+    try:
+        for count in args.workers:
+            with tempfile.TemporaryDirectory() as workdir:  # a cold shared cache per size
+                rows.append(summarize(count, run_workers(count, args, port, workdir)))
+    finally:
+        mock.terminate()
+
+    base = rows[0]
+    print(f"{'workers':>7} {'turns/s':>9} {'speedup':>8} {'efficiency':>10} {'p95 s':>7} {'failed':>6} {'rss MB':>8}")
+    for row in rows:
+        speedup = row["throughput_turns_per_s"] / base["throughput_turns_per_s"] if base["throughput_turns_per_s"] else 0
+        row["speedup"] = round(speedup, 2)
+        row["efficiency"] = round(speedup * base["workers"] / row["workers"], 2)
+        p95 = f"{row['latency_p95_s']:.2f}" if row["latency_p95_s"] is not None else "-"
+        print(f"{row['workers']:>7} {row['throughput_turns_per_s']:>9.2f} {row['speedup']:>8.2f} "
+              f"{row['efficiency']:>10.0%} {p95:>7} {row['failed']:>6} {row['rss_mb']:>8.1f}")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"options": {k: getattr(args, k) for k in MOCK_OPTIONS}, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Run several app workers behind a local sticky reverse proxy.
+
+One `streamlit run` process serves every session from a single Python
+interpreter, so CPU-heavy work (history rendering, embeddings, JSON
+compile) is limited by one GIL. `python cluster.py --workers 4` starts
+four workers on 127.0.0.1 (ports --port+1 ... --port+N) and a proxy on
+--port that pins each browser to one worker with an `ai9_worker` cookie:
+a Streamlit session lives in its worker's memory (websocket plus
+st.session_state), so every request of a browser must reach the same
+worker. New browsers are spread round-robin; if a worker is down, the
+proxy sends the browser to the next one (it starts a fresh session).
+
+The workers share state through the SQLite files under .cache/ (WAL mode
+and busy timeouts; see file_lock.py for the one-at-a-time jobs):
+answer cache, answer packs, conversation store, curriculum and textbook
+index. A cached answer written by one worker is a hit on every other.
+Token quotas are merged through their SQLite file every few seconds
+(quotas.py); a school's concurrent-stream cap applies per worker.
+Per-process state stays per worker: the API scheduler's concurrency
+budget (SCHEDULER_MAX_CONCURRENT is split across workers), the prefix
+registry and the metrics endpoint (METRICS_PORT + worker index).
+
+    python cluster.py --workers 4 --port 8501
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import math
+import os
+import subprocess
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+COOKIE = "ai9_worker"
+HEAD_LIMIT = 64 * 1024
+
+
+def worker_env(index, workers, metrics_port=None, max_concurrent=None):
+    """Environment of worker `index`: its metrics port and share of the API concurrency"""
+    env = dict(os.environ)
+    metrics_port = metrics_port if metrics_port is not None else int(os.getenv("METRICS_PORT", "9108"))
+    env["METRICS_PORT"] = str(metrics_port + index if metrics_port else 0)
+    max_concurrent = max_concurrent or int(os.getenv("SCHEDULER_MAX_CONCURRENT", "8"))
+    env["SCHEDULER_MAX_CONCURRENT"] = str(max(1, math.ceil(max_concurrent / workers)))
+    return env
+
+
+class Workers:
+    """The streamlit worker processes; dead ones are restarted"""
+
+    def __init__(self, count, base_port, script="kimiapp.py", extra_args=()):
+        self.count = count
+        self.ports = [base_port + 1 + i for i in range(count)]
+        self.script = os.path.join(ROOT, script)
+        self.extra_args = list(extra_args)
+        self.processes = [None] * count
+        self.restarts = 0
+
+    def _start(self, index):
+        command = [
+            sys.executable, "-m", "streamlit", "run", self.script,
+            "--server.port", str(self.ports[index]),
+            "--server.address", "127.0.0.1",
+            "--server.headless", "true",
+        ] + self.extra_args
+        self.processes[index] = subprocess.Popen(command, cwd=ROOT, env=worker_env(index, self.count))
+        logger.info("worker %d started on port %d (pid %d)", index, self.ports[index],
+                    self.processes[index].pid)
+
+    def start(self):
+        for index in range(self.count):
+            self._start(index)
+
+    def check(self):
+        """Restart workers that exited"""
+        for index, process in enumerate(self.processes):
+            if process is not None and process.poll() is not None:
+                logger.warning("worker %d exited with %s; restarting", index, process.returncode)
+                self.restarts += 1
+                self._start(index)
+
+    def stop(self):
+        for process in self.processes:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def _cookie_worker(head, count):
+    """Worker index from the request's ai9_worker cookie, or None"""
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() != b"cookie":
+            continue
+        for pair in value.split(b";"):
+            key, _, worker = pair.strip().partition(b"=")
+            if key == COOKIE.encode() and worker.isdigit() and int(worker) < count:
+                return int(worker)
+    return None
+
+
+def _set_cookie(head, index):
+    """Response head with the affinity cookie added"""
+    cookie = f"Set-Cookie: {COOKIE}={index}; Path=/; HttpOnly; SameSite=Lax\r\n".encode()
+    end = head.index(b"\r\n") + 2
+    return head[:end] + cookie + head[end:]
+
+
+async def _read_head(reader):
+    try:
+        return await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        return None
+    except asyncio.IncompleteReadError as exc:
+        return exc.partial or None
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+class StickyProxy:
+    """HTTP/websocket proxy that keeps each browser on one worker"""
+
+    def __init__(self, ports):
+        self.ports = ports
+        self._next = itertools.cycle(range(len(ports)))
+        self.connections = [0] * len(ports)
+
+    async def _connect(self, preferred):
+        """(index, reader, writer) of the preferred worker, else the next one that answers"""
+        order = [preferred] + [i for i in range(len(self.ports)) if i != preferred]
+        for index in order:
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", self.ports[index])
+                return index, reader, writer
+            except OSError:
+                continue
+        return None, None, None
+
+    async def handle(self, client_reader, client_writer):
+        head = await _read_head(client_reader)
+        if head is None:
+            client_writer.close()
+            return
+        pinned = _cookie_worker(head, len(self.ports))
+        index, upstream_reader, upstream_writer = await self._connect(
+            pinned if pinned is not None else next(self._next)
+        )
+        if index is None:
+            client_writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+            client_writer.close()
+            return
+        self.connections[index] += 1
+        upstream_writer.write(head)
+        if index != pinned:
+            response = await _read_head(upstream_reader)
+            if response is None:
+                upstream_writer.close()
+                client_writer.close()
+                return
+            client_writer.write(_set_cookie(response, index))
+        await asyncio.gather(_pipe(client_reader, upstream_writer), _pipe(upstream_reader, client_writer))
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=HEAD_LIMIT)
+        logger.info("proxy on http://%s:%d -> workers %s", host, port, self.ports)
+        async with server:
+            await server.serve_forever()
+
+
+async def _supervise(workers, interval=2.0):
+    while True:
+        await asyncio.sleep(interval)
+        workers.check()
+
+
+async def _main(args):
+    workers = Workers(args.workers, args.port, extra_args=args.streamlit_args)
+    workers.start()
+    try:
+        proxy = StickyProxy(workers.ports)
+        await asyncio.gather(proxy.serve(args.host, args.port), _supervise(workers))
+    finally:
+        workers.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run N app workers behind a sticky proxy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--port", type=int, default=8501, help="proxy port; workers use the next N")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("streamlit_args", nargs="*", help="extra `streamlit run` options (after --)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    started = time.time()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        logger.info("stopped after %.0f s", time.time() - started)
+
+
+if __name__ == "__main__":
+    main()
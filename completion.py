@@ -0,0 +1,327 @@
+"""Resilient streaming completions on top of the Groq client.
+
+`ResilientCompleter.stream` yields answer tokens like the raw Groq stream,
+but:
+
+- retries connection errors, 429s and 5xx with exponential backoff,
+  honouring the server's `retry-after` header;
+- resumes a stream that breaks half-way: the retry asks the model to
+  continue from the tokens already shown, so the student never sees the
+  answer restart;
+- optionally hedges: if no token has arrived after `hedge_after` seconds,
+  a second request is raced against the first (on the next model in the
+  chain) and the first one to produce a token wins;
+- falls back along `models` when a model keeps failing or is rate limited
+  for longer than `max_backoff`;
+- with a `fallback` backend (local_model.py), streams from it when the
+  last model in the chain fails with a connection error, and goes
+  straight to it for LOCAL_FALLBACK_COOLDOWN seconds after that. Rate
+  limits, server errors and read timeouts mean the API is up but busy;
+  they still raise.
+
+A backend is anything with the Groq client's
+`chat.completions.create(model=..., messages=..., stream=True, **params)`
+returning an iterable (and closable) stream of chunks.
+
+Time to first token and total latency are recorded per model so the
+thresholds can be tuned. Pass a `report` dict to `stream` to get the model
+that answered and the token usage the API reported for that call. Point
+GROQ_BASE_URL at a local mock server to exercise all of this offline.
+"""
+import logging
+import os
+import queue
+import random
+import statistics
+import threading
+import time
+from collections import deque
+
+import groq
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RESUME_INSTRUCTION = (
+    "Your previous reply was cut off. Continue exactly where it stopped, "
+    "without repeating anything already written."
+)
+
+
+def _retryable(exc):
+    if isinstance(exc, (groq.APIConnectionError, groq.RateLimitError,
+                        groq.InternalServerError, httpx.TransportError)):
+        return True
+    return isinstance(exc, groq.APIStatusError) and exc.status_code in (408, 409, 429, 498, 503)
+
+
+def _unreachable(exc):
+    """True if the API could not be reached at all (not a 429/5xx answer or a slow response)"""
+    # groq.APITimeoutError subclasses APIConnectionError; only a connect timeout means offline
+    if isinstance(exc, groq.APITimeoutError):
+        return isinstance(exc.__cause__, httpx.ConnectTimeout)
+    if isinstance(exc, httpx.TimeoutException):
+        return isinstance(exc, httpx.ConnectTimeout)
+    return isinstance(exc, (groq.APIConnectionError, httpx.TransportError))
+
+
+def _retry_after(exc):
+    """Seconds the server asked us to wait, if it said so"""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def _usage(chunk):
+    """Token usage carried by a stream chunk (Groq sends it on the last one)"""
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+    }
+
+
+class LatencyStats:
+    """Rolling TTFT / total-latency samples per model"""
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self._samples = {}  # model -> {"ttft": deque, "total": deque, "errors": int}
+        self.window = window
+
+    def _entry(self, model):
+        return self._samples.setdefault(
+            model, {"ttft": deque(maxlen=self.window), "total": deque(maxlen=self.window), "errors": 0}
+        )
+
+    def record(self, model, ttft, total):
+        with self._lock:
+            entry = self._entry(model)
+            entry["ttft"].append(ttft)
+            entry["total"].append(total)
+
+    def record_error(self, model):
+        with self._lock:
+            self._entry(model)["errors"] += 1
+
+    @staticmethod
+    def _percentiles(samples):
+        if not samples:
+            return None, None
+        if len(samples) == 1:
+            return samples[0], samples[0]
+        cuts = statistics.quantiles(samples, n=20, method="inclusive")
+        return cuts[9], cuts[18]  # p50, p95
+
+    def snapshot(self):
+        with self._lock:
+            report = {}
+            for model, entry in self._samples.items():
+                ttft50, ttft95 = self._percentiles(list(entry["ttft"]))
+                total50, total95 = self._percentiles(list(entry["total"]))
+                report[model] = {
+                    "requests": len(entry["total"]), "errors": entry["errors"],
+                    "ttft_p50": ttft50, "ttft_p95": ttft95,
+                    "total_p50": total50, "total_p95": total95,
+                }
+            return report
+
+
+class _Attempt:
+    """One streaming request running in a background thread"""
+
+    def __init__(self, client, model, messages, params, events):
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.usage = None
+        self._cancelled = threading.Event()
+        self._stream = None
+        self._thread = threading.Thread(
+            target=self._run, args=(client, messages, params, events), daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, client, messages, params, events):
+        try:
+            self._stream = client.chat.completions.create(
+                model=self.model, messages=messages, stream=True, **params
+            )
+            try:
+                for chunk in self._stream:
+                    if self._cancelled.is_set():
+                        break
+                    self.usage = _usage(chunk) or self.usage
+                    if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                        events.put((self, "token", chunk.choices[0].delta.content))
+            finally:
+                if self._cancelled.is_set():
+                    self._stream.close()  # frees the connection (or the local model) from this thread
+            events.put((self, "done", None))
+        except Exception as exc:  # surfaced to the consumer through the queue
+            events.put((self, "error", exc))
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+
+
+class ResilientCompleter:
+    """Retries, resumes, hedges and falls back across a chain of models"""
+
+    def __init__(self, client, models=None, max_retries=None, base_backoff=None,
+                 max_backoff=None, hedge_after=None, stats=None, fallback=None, fallback_cooldown=None):
+        self.client = client
+        self.models = models or [
+            m.strip() for m in os.getenv(
+                "COMPLETION_MODELS", "moonshotai/kimi-k2-instruct-0905,llama-3.1-8b-instant"
+            ).split(",") if m.strip()
+        ]
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("COMPLETION_MAX_RETRIES", "3"))
+        self.base_backoff = base_backoff or float(os.getenv("COMPLETION_BASE_BACKOFF", "0.5"))
+        self.max_backoff = max_backoff or float(os.getenv("COMPLETION_MAX_BACKOFF", "8"))
+        # 0 disables hedging
+        self.hedge_after = hedge_after if hedge_after is not None else float(os.getenv("COMPLETION_HEDGE_AFTER", "0"))
+        self.stats = stats or LatencyStats()
+        # Local backend for when the API is unreachable (see local_model.py)
+        self.fallback = fallback
+        self.fallback_cooldown = fallback_cooldown or float(os.getenv("LOCAL_FALLBACK_COOLDOWN", "60"))
+        self._remote_down_until = 0.0
+
+    def _backoff(self, attempt, exc):
+        """Delay before the next try, or None to move on to the next model"""
+        server_wait = _retry_after(exc)
+        if server_wait is not None:
+            return server_wait if server_wait <= self.max_backoff else None
+        delay = min(self.base_backoff * (2 ** (attempt - 1)), self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)  # jitter keeps a classroom from retrying in lockstep
+
+    @staticmethod
+    def _account(report, attempt):
+        if report is None:
+            return
+        for key, value in (attempt.usage or {}).items():
+            report[key] = report.get(key, 0) + value
+
+    def _race(self, models, model_index, messages, params, report=None, client=None):
+        """Yield tokens from the first attempt to produce one (hedging if enabled)"""
+        events = queue.Queue()
+        attempts = [_Attempt(client or self.client, models[model_index], messages, params, events)]
+        if report is not None:
+            report["requests"] = report.get("requests", 0) + 1
+        winner, errors = None, []
+        try:
+            while winner is None:
+                can_hedge = self.hedge_after > 0 and len(attempts) == 1 and client is None
+                timeout = max(self.hedge_after - (time.perf_counter() - attempts[0].started), 0) if can_hedge else None
+                try:
+                    attempt, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_model = models[min(model_index + 1, len(models) - 1)]
+                    attempts.append(_Attempt(self.client, hedge_model, messages, params, events))
+                    if report is not None:
+                        report["requests"] += 1
+                    continue
+                if kind == "error":
+                    errors.append((attempt, payload))
+                    self.stats.record_error(attempt.model)
+                    if len(errors) == len(attempts):
+                        raise errors[0][1]  # nothing left in the race (a pending hedge keeps it alive)
+                    continue
+                # First token (or an empty answer) decides the race
+                winner = attempt
+                for other in attempts:
+                    if other is not winner:
+                        other.cancel()
+                winner.first_token_at = time.perf_counter()
+                if report is not None:
+                    report["model"] = winner.model
+                if kind == "done":
+                    self.stats.record(winner.model, winner.first_token_at - winner.started,
+                                      winner.first_token_at - winner.started)
+                    self._account(report, winner)
+                    return
+                yield payload
+
+            while True:
+                attempt, kind, payload = events.get()
+                if attempt is not winner:
+                    continue
+                if kind == "token":
+                    yield payload
+                elif kind == "done":
+                    finished = time.perf_counter()
+                    self.stats.record(winner.model, winner.first_token_at - winner.started,
+                                      finished - winner.started)
+                    self._account(report, winner)
+                    return
+                else:
+                    self.stats.record_error(winner.model)
+                    raise payload
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    def remote_down(self):
+        """True while requests go straight to the local fallback"""
+        return self.fallback is not None and time.monotonic() < self._remote_down_until
+
+    def stream(self, messages, report=None, models=None, **params):
+        """Yield answer tokens, recovering from transient failures (`models` overrides the chain)"""
+        models = models or self.models
+        if self.remote_down():
+            yield from self._race([self.fallback.name], 0, messages, params, report, client=self.fallback)
+            return
+        received = []
+        model_index, attempt = 0, 0
+        while True:
+            request = list(messages)
+            if received:
+                request += [
+                    {"role": "assistant", "content": "".join(received)},
+                    {"role": "user", "content": RESUME_INSTRUCTION},
+                ]
+            try:
+                for token in self._race(models, model_index, request, params, report):
+                    received.append(token)
+                    yield token
+                return
+            except Exception as exc:
+                if not _retryable(exc):
+                    raise
+                attempt += 1
+                delay = self._backoff(attempt, exc) if attempt <= self.max_retries else None
+                if delay is None:
+                    # This model is overloaded or keeps failing: move down the chain
+                    if model_index + 1 >= len(models):
+                        if self.fallback is None or not _unreachable(exc):
+                            raise
+                        # The API is unreachable: answer (or finish the answer) on this server
+                        logger.warning("remote models unavailable (%s: %s); using %s for %.0f s",
+                                       type(exc).__name__, exc, self.fallback.name, self.fallback_cooldown)
+                        self._remote_down_until = time.monotonic() + self.fallback_cooldown
+                        yield from self._race([self.fallback.name], 0, request, params, report,
+                                              client=self.fallback)
+                        return
+                    model_index, attempt = model_index + 1, 0
+                    continue
+                time.sleep(delay)
@@ -0,0 +1,126 @@
+"""Completion parameters chosen per class level, question type and medium.
+
+Instead of one fixed `max_completion_tokens=4096, temperature=0.6` for
+every question, `CompletionPolicy.choose` maps the request to a named
+policy that sets:
+
+- the output cap (`token_estimator.completion_budget`),
+- the model chain: short and primary-school questions in English medium
+  go to the small, fast model first (COMPLETION_FAST_MODEL), falling back
+  to the normal chain; Telugu/Urdu stay on the main model, which handles
+  those scripts much better,
+- temperature / top_p,
+- a stop criterion: short answers stop before the optional practice and
+  exam-tip sections of the tutor's response template,
+- an answer-style line for the trailing student-context message, so the
+  model aims for the right length instead of being cut off.
+
+Per-policy latency and token statistics are kept so the table below can
+be tuned from real traffic.
+"""
+import os
+import threading
+
+from completion import LatencyStats
+from token_estimator import completion_budget, question_type
+
+# Section headers from the response templates in prompts.SYSTEM_PROMPT
+PRACTICE_SECTION = "\n\n🎯 **Practice"
+EXAM_TIP_SECTION = "\n\n📝 **Exam Tip"
+
+POLICIES = {
+    "primary": {
+        "fast_model": True, "temperature": 0.5, "top_p": 0.9,
+        "stop": [PRACTICE_SECTION, EXAM_TIP_SECTION],
+        "style": "Primary-school student: answer in 3-6 short, simple sentences with one everyday example.",
+    },
+    "short": {
+        "fast_model": True, "temperature": 0.4, "top_p": 0.9,
+        "stop": [PRACTICE_SECTION],
+        "style": "Short-answer question: answer in 2-4 exam-style sentences.",
+    },
+    "exam": {
+        "fast_model": False, "temperature": 0.5, "top_p": 0.9,
+        "stop": None,
+        "style": "{kind} exam question: write the answer at that length, in the SSC answer pattern.",
+    },
+    "explain": {
+        "fast_model": False, "temperature": 0.6, "top_p": 0.9,
+        "stop": None,
+        "style": None,
+    },
+    "default": {
+        "fast_model": False, "temperature": 0.6, "top_p": 0.9,
+        "stop": None,
+        "style": None,
+    },
+}
+
+
+class CompletionPolicy:
+    """Picks completion parameters per request and keeps per-policy stats"""
+
+    def __init__(self, models, fast_model=None):
+        self.models = list(models)
+        self.fast_model = fast_model or os.getenv("COMPLETION_FAST_MODEL", "llama-3.1-8b-instant")
+        self.latency = LatencyStats()
+        self._lock = threading.Lock()
+        self._tokens = {}  # policy -> {"answers", "completion_tokens", "capped"}
+
+    def _name(self, kind, student_class):
+        class_num = int(student_class) if str(student_class).isdigit() else None
+        if class_num and class_num <= 5 and kind not in ("4-mark", "8-mark"):
+            return "primary"
+        if kind in ("short", "1-mark", "2-mark"):
+            return "short"
+        if kind in ("4-mark", "8-mark"):
+            return "exam"
+        if kind == "long":
+            return "explain"
+        return "default"
+
+    def choose(self, prompt, student_class, medium):
+        """{"name", "models", "params", "style"} for this request"""
+        kind = question_type(prompt)
+        name = self._name(kind, student_class)
+        policy = POLICIES[name]
+        models = self.models
+        if policy["fast_model"] and medium == "English" and self.fast_model:
+            models = [self.fast_model] + [m for m in self.models if m != self.fast_model]
+        params = {
+            "max_completion_tokens": completion_budget(prompt, student_class, medium, models[0]),
+            "temperature": policy["temperature"],
+            "top_p": policy["top_p"],
+        }
+        if policy["stop"]:
+            params["stop"] = policy["stop"]
+        style = policy["style"].format(kind=kind) if policy["style"] else None
+        return {"name": name, "models": models, "params": params, "style": style}
+
+    def record(self, choice, turn):
+        """Feed a finished turn (a metrics.TurnMetrics record) back into the policy stats"""
+        name = choice["name"]
+        if turn["error"]:
+            self.latency.record_error(name)
+            return
+        if turn["ttft_ms"] is None:
+            return
+        self.latency.record(name, turn["ttft_ms"] / 1000, turn["stream_ms"] / 1000)
+        with self._lock:
+            entry = self._tokens.setdefault(name, {"answers": 0, "completion_tokens": 0, "capped": 0})
+            entry["answers"] += 1
+            entry["completion_tokens"] += turn["completion_tokens"]
+            # Hitting the cap means the answer was probably cut off: the budget is too tight
+            entry["capped"] += turn["completion_tokens"] >= choice["params"]["max_completion_tokens"]
+
+    def snapshot(self):
+        """Per policy: latency percentiles, average answer tokens and share of capped answers"""
+        report = self.latency.snapshot()
+        with self._lock:
+            for name, entry in self._tokens.items():
+                answers = entry["answers"]
+                report.setdefault(name, {}).update({
+                    "avg_completion_tokens": entry["completion_tokens"] / answers if answers else 0,
+                    "capped_share": entry["capped"] / answers if answers else 0.0,
+                })
+        return report
@@ -0,0 +1,221 @@
+"""Persistent, compressed chat history outside `st.session_state`.
+
+Messages are stored in SQLite (WAL mode) with zstd-compressed bodies, or
+zlib when the `zstandard` package is not installed. A session only keeps a
+`ConversationRef`: the conversation ID and the IDs of its messages.
+Bodies are decompressed on demand when the history is rendered or sent
+to the model, and the most recent ones are kept in a small process-wide
+LRU. A background job deletes conversations past the retention period
+and returns the space to the file system.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+from file_lock import exclusive
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+
+def _compress(text):
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=6).compress(data)
+    return CODEC_ZLIB, zlib.compress(data, 6)
+
+
+def _decompress(codec, blob):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class ConversationRef:
+    """What a Streamlit session keeps: IDs only, no message bodies"""
+
+    def __init__(self, conversation_id, message_ids=None):
+        self.id = conversation_id
+        self.message_ids = list(message_ids or [])
+
+    def append(self, store, role, content):
+        self.message_ids.append(store.append(self.id, role, content))
+
+    def pop(self, store):
+        if self.message_ids:
+            store.delete_message(self.message_ids.pop())
+
+    def messages(self, store):
+        return store.load(self.message_ids)
+
+
+class ConversationStore:
+    """SQLite-backed message store shared by all sessions of a process"""
+
+    def __init__(self, path=None, retention_days=None, cache_size=512):
+        self.path = path or os.getenv("CONVERSATION_DB_PATH", ".cache/conversations.sqlite3")
+        self.retention_days = retention_days or float(os.getenv("CONVERSATION_RETENTION_DAYS", "30"))
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")  # only applies to a new file
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                id TEXT PRIMARY KEY,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                conversation_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                codec INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_conversation ON messages(conversation_id, id);
+            CREATE INDEX IF NOT EXISTS conversations_updated ON conversations(updated);
+        """)
+        self._db.commit()
+        self._cache = OrderedDict()  # message id -> {"role", "content"}
+        self._cache_size = cache_size
+        self._compactor = None
+
+    # ───────────────────────────────────────────────────────────
+    # Conversations
+    # ───────────────────────────────────────────────────────────
+    def new_conversation(self):
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO conversations VALUES (?, ?, ?)", (conversation_id, now, now))
+            self._db.commit()
+        return ConversationRef(conversation_id)
+
+    def open_conversation(self, conversation_id):
+        """Reattach to a stored conversation (e.g. after a server restart), or None"""
+        with self._lock:
+            if not self._db.execute(
+                "SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone():
+                return None
+            ids = [row[0] for row in self._db.execute(
+                "SELECT id FROM messages WHERE conversation_id = ? ORDER BY id", (conversation_id,)
+            )]
+        return ConversationRef(conversation_id, ids)
+
+    # ───────────────────────────────────────────────────────────
+    # Messages
+    # ───────────────────────────────────────────────────────────
+    def append(self, conversation_id, role, content):
+        codec, body = _compress(content)
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO messages (conversation_id, role, codec, body, created) VALUES (?, ?, ?, ?, ?)",
+                (conversation_id, role, codec, body, now),
+            )
+            self._db.execute("UPDATE conversations SET updated = ? WHERE id = ?", (now, conversation_id))
+            self._db.commit()
+            self._remember(cur.lastrowid, {"role": role, "content": content})
+            return cur.lastrowid
+
+    def delete_message(self, message_id):
+        with self._lock:
+            self._db.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+            self._db.commit()
+            self._cache.pop(message_id, None)
+
+    def _remember(self, message_id, message):
+        self._cache[message_id] = message
+        self._cache.move_to_end(message_id)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def load_map(self, message_ids):
+        """{message id: {"role", "content"}} for the IDs that still exist"""
+        with self._lock:
+            missing = [i for i in message_ids if i not in self._cache]
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT id, role, codec, body FROM messages WHERE id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for message_id, role, codec, body in rows:
+                    self._remember(message_id, {"role": role, "content": _decompress(codec, body)})
+            found = {}
+            for message_id in message_ids:
+                message = self._cache.get(message_id)
+                if message is not None:
+                    self._cache.move_to_end(message_id)
+                    found[message_id] = dict(message)
+            return found
+
+    def load(self, message_ids):
+        """Messages for these IDs, in order, as {"role", "content"} dicts"""
+        found = self.load_map(message_ids)
+        return [found[i] for i in message_ids if i in found]
+
+    # ───────────────────────────────────────────────────────────
+    # Retention & compaction
+    # ───────────────────────────────────────────────────────────
+    def compact(self):
+        """Delete conversations idle past the retention period and reclaim space"""
+        cutoff = time.time() - self.retention_days * 86400
+        with exclusive(self.path, blocking=False) as acquired:
+            if not acquired:
+                return None  # another worker is compacting the shared file
+            return self._compact(cutoff)
+
+    def _compact(self, cutoff):
+        with self._lock:
+            expired = [row[0] for row in self._db.execute(
+                "SELECT id FROM conversations WHERE updated < ?", (cutoff,)
+            )]
+            deleted = 0
+            for conversation_id in expired:
+                deleted += self._db.execute(
+                    "DELETE FROM messages WHERE conversation_id = ?", (conversation_id,)
+                ).rowcount
+                self._db.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+            self._db.commit()
+            self._db.execute("PRAGMA incremental_vacuum")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            if expired:
+                self._cache.clear()
+        result = {"conversations": len(expired), "messages": deleted}
+        logger.info("conversation store compaction: %s", result)
+        return result
+
+    def start_compaction(self, interval_seconds=None):
+        """Run `compact` periodically on a daemon thread (once per store)"""
+        if self._compactor is not None:
+            return
+        interval = interval_seconds or float(os.getenv("CONVERSATION_COMPACT_INTERVAL", "3600"))
+
+        def loop():
+            while True:
+                try:
+                    self.compact()
+                except sqlite3.Error:
+                    logger.exception("conversation store compaction failed")
+                time.sleep(interval)
+
+        self._compactor = threading.Thread(target=loop, name="conversation-compactor", daemon=True)
+        self._compactor.start()
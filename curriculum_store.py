@@ -0,0 +1,185 @@
+"""Indexed curriculum store built from curriculum.json.
+
+curriculum.json is the editable source (class → subject → medium →
+chapter → title/pages/month). It is compiled once into a SQLite file
+with indexes for exact, fuzzy-title and page-range lookups, and only
+recompiled when the JSON changes. The app opens it once per process
+(see `get_curriculum_store` in resources.py) and reads it through mmap.
+"""
+import difflib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import unicodedata
+
+from file_lock import exclusive
+
+SCHEMA_VERSION = "1"
+
+
+def _fold(text):
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class CurriculumStore:
+    """Read-only lookups over the SCERT chapter list"""
+
+    def __init__(self, source=None, path=None):
+        self.source = source or os.getenv("CURRICULUM_PATH", "curriculum.json")
+        self.path = path or os.getenv("CURRICULUM_DB_PATH", ".cache/curriculum.sqlite3")
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(f"PRAGMA mmap_size={64 * 1024 * 1024}")
+        self._compile_if_changed()
+
+    # ───────────────────────────────────────────────────────────
+    # Compilation
+    # ───────────────────────────────────────────────────────────
+    def _source_digest(self):
+        with open(self.source, "rb") as f:
+            return SCHEMA_VERSION + ":" + hashlib.sha256(f.read()).hexdigest()
+
+    def _compile_if_changed(self):
+        # Several app workers may open the store at once; one compiles, the rest wait
+        with exclusive(self.path):
+            self._compile_locked()
+
+    def _compile_locked(self):
+        digest = self._source_digest()
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'digest'").fetchone()
+        if row and row[0] == digest:
+            return
+        with open(self.source, encoding="utf-8") as f:
+            data = json.load(f)
+        rows = []
+        for class_num, subjects in data.items():
+            for subject, mediums in subjects.items():
+                for medium, chapters in mediums.items():
+                    for chapter, info in chapters.items():
+                        pages = info.get("pages") or [None, None]
+                        rows.append((
+                            int(class_num), subject, medium, int(chapter), info["title"],
+                            _fold(info["title"]), pages[0], pages[1], info.get("month"),
+                        ))
+        with self._lock:
+            self._db.executescript("""
+                DROP TABLE IF EXISTS chapters;
+                DROP TABLE IF EXISTS chapters_fts;
+                CREATE TABLE chapters (
+                    id INTEGER PRIMARY KEY,
+                    class INTEGER NOT NULL,
+                    subject TEXT NOT NULL,
+                    medium TEXT NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    folded_title TEXT NOT NULL,
+                    page_start INTEGER,
+                    page_end INTEGER,
+                    month TEXT,
+                    UNIQUE (class, subject, medium, chapter)
+                );
+                CREATE INDEX chapters_pages ON chapters(class, subject, medium, page_start, page_end);
+                CREATE VIRTUAL TABLE chapters_fts USING fts5(
+                    folded_title, content='chapters', content_rowid='id', tokenize='trigram'
+                );
+            """)
+            self._db.executemany(
+                "INSERT INTO chapters (class, subject, medium, chapter, title, folded_title, "
+                "page_start, page_end, month) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.execute("INSERT INTO chapters_fts(chapters_fts) VALUES ('rebuild')")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('digest', ?)", (digest,))
+            self._db.commit()
+
+    # ───────────────────────────────────────────────────────────
+    # Lookups
+    # ───────────────────────────────────────────────────────────
+    _COLUMNS = "class, subject, medium, chapter, title, page_start, page_end, month"
+
+    @staticmethod
+    def _as_dict(row):
+        if row is None:
+            return None
+        class_num, subject, medium, chapter, title, page_start, page_end, month = row
+        return {
+            "class": class_num, "subject": subject, "medium": medium, "chapter": chapter,
+            "title": title, "pages": (page_start, page_end) if page_start else None, "month": month,
+        }
+
+    def chapter(self, class_num, subject, medium, chapter_num):
+        """Chapter record for an exact (class, subject, medium, chapter), or None"""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {self._COLUMNS} FROM chapters "
+                "WHERE class = ? AND subject = ? AND medium = ? AND chapter = ?",
+                (int(class_num), subject, medium, int(chapter_num)),
+            ).fetchone()
+        return self._as_dict(row)
+
+    def chapters(self, class_num, subject, medium):
+        """All chapters of one textbook in order"""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {self._COLUMNS} FROM chapters "
+                "WHERE class = ? AND subject = ? AND medium = ? ORDER BY chapter",
+                (int(class_num), subject, medium),
+            ).fetchall()
+        return [self._as_dict(r) for r in rows]
+
+    def subjects(self, class_num):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT subject FROM chapters WHERE class = ? ORDER BY subject",
+                (int(class_num),),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def textbooks(self):
+        """Every (class, subject, medium) that has chapters"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT DISTINCT class, subject, medium FROM chapters ORDER BY class, subject, medium"
+            ).fetchall()
+
+    def chapter_for_page(self, class_num, subject, medium, page):
+        """Chapter whose page range contains `page`"""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {self._COLUMNS} FROM chapters "
+                "WHERE class = ? AND subject = ? AND medium = ? AND page_start <= ? AND page_end >= ? "
+                "ORDER BY page_start DESC LIMIT 1",
+                (int(class_num), subject, medium, int(page), int(page)),
+            ).fetchone()
+        return self._as_dict(row)
+
+    def find_title(self, text, class_num=None, limit=5, cutoff=0.5):
+        """Chapters whose title fuzzily matches `text`, across all mediums"""
+        folded = _fold(text)
+        if len(folded) < 3:
+            return []
+        # Trigram FTS narrows the candidates; difflib ranks them
+        trigrams = {folded[i:i + 3] for i in range(len(folded) - 2)}
+        match = " OR ".join('"' + t.replace('"', '""') + '"' for t in trigrams)
+        # The class filter goes inside the LIMIT, or other classes' titles could crowd it out
+        candidates = "SELECT rowid FROM chapters_fts WHERE chapters_fts MATCH ?"
+        params = [match]
+        if class_num is not None:
+            candidates += " AND rowid IN (SELECT id FROM chapters WHERE class = ?)"
+            params.append(int(class_num))
+        sql = (f"SELECT {self._COLUMNS}, folded_title FROM chapters "
+               f"WHERE id IN ({candidates} ORDER BY rank LIMIT 50)")
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        scored = []
+        for row in rows:
+            ratio = difflib.SequenceMatcher(None, folded, row[-1]).ratio()
+            if ratio >= cutoff:
+                scored.append((ratio, self._as_dict(row[:-1])))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [chapter for _, chapter in scored[:limit]]
@@ -0,0 +1,48 @@
+"""Cross-process file locks for state shared by several app workers.
+
+The SQLite files under .cache/ are shared by every worker started by
+cluster.py. SQLite serialises ordinary reads and writes itself (WAL mode
+plus a busy timeout); this lock covers the multi-statement jobs that
+must run in one process at a time: compiling curriculum.json, syncing
+the textbook index and compacting the conversation store.
+"""
+import contextlib
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextlib.contextmanager
+def exclusive(path, blocking=True, poll_seconds=0.1):
+    """Hold an exclusive lock on `path + ".lock"`; yields False if non-blocking and busy"""
+    lock_path = path + ".lock"
+    if os.path.dirname(lock_path):
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a+b") as handle:
+        acquired = False
+        while not acquired:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                acquired = True
+            except OSError:
+                if not blocking:
+                    break
+                time.sleep(poll_seconds)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,91 @@
+"""Process-wide Groq client with a pooled, keep-alive HTTP transport.
+
+The client is built once per server process (see `get_groq_client` in
+resources.py) so Streamlit reruns reuse warm TLS connections instead of
+opening a new pool every interaction. Connection reuse and handshake
+time are counted through httpcore's trace hook.
+"""
+import os
+import threading
+import time
+
+import httpx
+from groq import Groq
+
+
+class PoolStats:
+    """Counters for connection reuse and time spent in TCP/TLS handshakes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.handshake_seconds = 0.0
+
+    def record(self, connected, handshake_seconds):
+        with self._lock:
+            self.requests += 1
+            if connected:
+                self.new_connections += 1
+                self.handshake_seconds += handshake_seconds
+            else:
+                self.reused_connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": self.reused_connections,
+                "handshake_ms": round(self.handshake_seconds * 1000, 1),
+            }
+
+
+def _tracer(stats):
+    """Build a request hook that attaches an httpcore trace callback"""
+
+    def on_request(request):
+        started = {}
+        state = {"connected": False, "handshake": 0.0}
+
+        def trace(event_name, info):
+            # e.g. "connection.connect_tcp.started" / "connection.start_tls.complete"
+            if event_name.startswith(("connection.connect_tcp", "connection.start_tls")):
+                step, _, phase = event_name.rpartition(".")
+                if phase == "started":
+                    started[step] = time.perf_counter()
+                    state["connected"] = True
+                elif phase in ("complete", "failed") and step in started:
+                    state["handshake"] += time.perf_counter() - started.pop(step)
+            elif event_name.endswith("send_request_headers.started"):
+                stats.record(state["connected"], state["handshake"])
+
+        request.extensions["trace"] = trace
+
+    return on_request
+
+
+def create_client(api_key, pool_size=None, keepalive_seconds=None,
+                  connect_timeout=None, read_timeout=None):
+    """Groq client over a shared httpx connection pool; returns (client, stats)"""
+    pool_size = pool_size or int(os.getenv("GROQ_POOL_SIZE", "20"))
+    keepalive_seconds = keepalive_seconds or float(os.getenv("GROQ_KEEPALIVE_SECONDS", "60"))
+    connect_timeout = connect_timeout or float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+    read_timeout = read_timeout or float(os.getenv("GROQ_READ_TIMEOUT", "60"))
+
+    stats = PoolStats()
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=keepalive_seconds,
+        ),
+        timeout=timeout,
+        event_hooks={"request": [_tracer(stats)]},
+    )
+    # Retries are handled by completion.ResilientCompleter; GROQ_BASE_URL (read by
+    # the SDK) can point the client at a local mock server
+    client = Groq(api_key=api_key, http_client=http_client, timeout=timeout, max_retries=0)
+    return client, stats
@@ -0,0 +1,109 @@
+"""Token-budgeted conversation window for the tutor chat.
+
+Keeps the system prompt and the last few turns verbatim, and folds older
+turns into a rolling summary so each request stays under a token budget.
+"""
+import os
+from functools import lru_cache
+
+from token_estimator import estimate_tokens
+
+# ═══════════════════════════════════════════════════════════════
+# TOKEN COUNTING
+# ═══════════════════════════════════════════════════════════════
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separators added by the chat template
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text):
+    """Estimated token count for a message body (counted once, then cached)"""
+    return estimate_tokens(text)
+
+
+def message_tokens(msg):
+    return count_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _shorten(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONVERSATION WINDOW
+# ═══════════════════════════════════════════════════════════════
+class ConversationWindow:
+    """Builds the message list sent to the model for one session"""
+
+    def __init__(self, budget_tokens=None, keep_last_turns=None, summary_max_tokens=600):
+        self.budget_tokens = budget_tokens or int(os.getenv("HISTORY_TOKEN_BUDGET", "8000"))
+        self.keep_last_turns = keep_last_turns or int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+        self.summary_max_tokens = summary_max_tokens
+        self.summary_lines = []
+        self.folded = 0  # number of conversation messages already in the summary
+
+    def _fold(self, messages):
+        """Append new summary lines for messages that just left the window"""
+        for msg in messages:
+            if msg["role"] == "user":
+                self.summary_lines.append("Student asked: " + _shorten(msg["content"], 160))
+            elif msg["role"] == "assistant":
+                self.summary_lines.append("Tutor explained: " + _shorten(msg["content"], 240))
+        # Keep the summary itself bounded by dropping the oldest lines
+        while len(self.summary_lines) > 1 and self._summary_tokens() > self.summary_max_tokens:
+            self.summary_lines.pop(0)
+
+    def _summary_tokens(self):
+        return sum(count_tokens(line) for line in self.summary_lines) + MESSAGE_OVERHEAD_TOKENS
+
+    def _summary_message(self):
+        return {
+            "role": "system",
+            "content": "Summary of the earlier conversation with this student:\n- "
+                       + "\n- ".join(self.summary_lines),
+        }
+
+    def build(self, messages):
+        """Return (messages_to_send, stats) for the full session history"""
+        system = [m for m in messages[:1] if m["role"] == "system"]
+        convo = messages[len(system):]
+
+        full_tokens = sum(message_tokens(m) for m in messages)
+
+        # Index where the last `keep_last_turns` user turns begin
+        user_positions = [i for i, m in enumerate(convo) if m["role"] == "user"]
+        if len(user_positions) > self.keep_last_turns:
+            tail_start = user_positions[-self.keep_last_turns]
+        else:
+            tail_start = 0
+
+        fixed_tokens = sum(message_tokens(m) for m in system + convo[tail_start:])
+
+        # Walk back from the tail, keeping older turns verbatim while they fit
+        boundary = tail_start
+        used = fixed_tokens + (self._summary_tokens() if self.summary_lines else 0)
+        while boundary > self.folded:
+            cost = message_tokens(convo[boundary - 1])
+            if used + cost > self.budget_tokens:
+                break
+            used += cost
+            boundary -= 1
+
+        # Folding only ever moves forward so the summary is built incrementally
+        if boundary > self.folded:
+            self._fold(convo[self.folded:boundary])
+            self.folded = boundary
+
+        window = list(system)
+        if self.summary_lines:
+            window.append(self._summary_message())
+        window.extend(convo[self.folded:])
+
+        sent_tokens = sum(message_tokens(m) for m in window)
+        stats = {
+            "full_tokens": full_tokens,
+            "sent_tokens": sent_tokens,
+            "saved_tokens": max(full_tokens - sent_tokens, 0),
+            "folded_messages": self.folded,
+        }
+        return window, stats
@@ -0,0 +1,54 @@
+"""Paginated, cached rendering of the chat history (section 11).
+
+Only the most recent page of messages is rendered on each rerun; older
+turns sit behind a "Load earlier messages" button. Message bodies for the
+visible page are kept in a small per-session cache keyed by message ID,
+so unchanged turns are re-emitted without touching the conversation
+store. Streamlit already de-duplicates large identical elements between
+reruns, so an unchanged turn costs the browser almost nothing.
+"""
+import os
+
+import streamlit as st
+
+
+class HistoryRenderer:
+    """Renders the tail of a conversation with "load earlier" pagination"""
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size or int(os.getenv("HISTORY_PAGE_SIZE", "10"))
+        self.pages = 1
+        self._rendered = {}  # message id -> message dict for the visible page
+
+    def _load_earlier(self):
+        self.pages += 1
+
+    def visible(self, message_ids):
+        """(number of hidden messages, IDs to render)"""
+        count = self.page_size * self.pages
+        if len(message_ids) <= count:
+            return 0, list(message_ids)
+        return len(message_ids) - count, list(message_ids[-count:])
+
+    def render(self, conversation, store):
+        hidden, ids = self.visible(conversation.message_ids)
+        if hidden:
+            st.button(
+                f"⬆️ Load earlier messages ({hidden} hidden)",
+                on_click=self._load_earlier,
+                use_container_width=True,
+            )
+
+        missing = [i for i in ids if i not in self._rendered]
+        if missing:
+            self._rendered.update(store.load_map(missing))
+        # Drop cache entries that scrolled out of (or were removed from) the page
+        for message_id in set(self._rendered) - set(ids):
+            del self._rendered[message_id]
+
+        for message_id in ids:
+            message = self._rendered.get(message_id)
+            if message is None:
+                continue
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
@@ -0,0 +1,320 @@
+"""Pre-LLM intent parsing and the local chapter-lookup fast path.
+
+`parse_intent` pulls class, subject, chapter/page number and medium out
+of a prompt (English, Telugu or Urdu words and numerals) and falls back
+to the sidebar selections. `FastPath` answers pure lookup questions
+("what is chapter 4 of 10th social?") straight from the curriculum store
+and produces deterministic mismatch warnings, so neither costs model
+tokens.
+"""
+import re
+import threading
+
+from answer_cache import normalize_prompt
+
+# ═══════════════════════════════════════════════════════════════
+# VOCABULARY
+# ═══════════════════════════════════════════════════════════════
+NUMBER_WORDS = {
+    # English
+    "one": 1, "first": 1, "two": 2, "second": 2, "three": 3, "third": 3, "four": 4, "fourth": 4,
+    "five": 5, "fifth": 5, "six": 6, "sixth": 6, "seven": 7, "seventh": 7, "eight": 8,
+    "eighth": 8, "nine": 9, "ninth": 9, "ten": 10, "tenth": 10,
+    # Telugu
+    "ఒకటి": 1, "మొదటి": 1, "రెండు": 2, "రెండవ": 2, "మూడు": 3, "మూడవ": 3, "నాలుగు": 4,
+    "నాలుగవ": 4, "ఐదు": 5, "ఐదవ": 5, "ఆరు": 6, "ఆరవ": 6, "ఏడు": 7, "ఏడవ": 7,
+    "ఎనిమిది": 8, "ఎనిమిదవ": 8, "తొమ్మిది": 9, "తొమ్మిదవ": 9, "పది": 10, "పదవ": 10,
+    # Urdu
+    "ایک": 1, "پہلا": 1, "پہلی": 1, "پہلے": 1, "دو": 2, "دوسرا": 2, "دوسری": 2, "تین": 3,
+    "تیسرا": 3, "تیسری": 3, "چار": 4, "چوتھا": 4, "چوتھی": 4, "پانچ": 5, "پانچویں": 5,
+    "چھ": 6, "چھٹا": 6, "چھٹی": 6, "سات": 7, "ساتویں": 7, "آٹھ": 8, "آٹھویں": 8,
+    "نو": 9, "نویں": 9, "دس": 10, "دسویں": 10,
+}
+# "10th", "4వ", "10ویں" (Python's \d also matches Telugu and Urdu digits)
+ORDINAL_RE = re.compile(r"^(\d+)(?:st|nd|rd|th|వ|వది|ویں|واں|وی)?$")
+# "10th social": an ordinal with no keyword next to it is the class; "one" is not
+ORDINAL_WORDS = {"first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth", "ninth", "tenth",
+                 "మొదటి", "రెండవ", "మూడవ", "నాలుగవ", "ఐదవ", "ఆరవ", "ఏడవ", "ఎనిమిదవ", "తొమ్మిదవ", "పదవ",
+                 "پہلا", "پہلی", "پہلے", "دوسرا", "دوسری", "تیسرا", "تیسری", "چوتھا", "چوتھی", "پانچویں",
+                 "چھٹا", "چھٹی", "ساتویں", "آٹھویں", "نویں", "دسویں"}
+# "chapter no 4", "class number 10"
+NUMBER_FILLERS = {"no", "number", "num", "నంబర్", "نمبر"}
+
+CHAPTER_WORDS = {"chapter", "chapters", "ch", "chap", "lesson", "lessons", "unit", "units",
+                 "చాప్టర్", "ఛాప్టర్", "అధ్యాయం", "అధ్యాయాలు", "పాఠం", "పాఠాలు", "باب", "ابواب", "سبق", "اسباق"}
+CLASS_WORDS = {"class", "std", "standard", "grade", "తరగతి", "క్లాస్", "క్లాసు", "جماعت", "کلاس"}
+PAGE_WORDS = {"page", "pg", "పేజీ", "صفحہ"}
+
+SUBJECT_ALIASES = {
+    "Social Studies": ["social studies", "social", "sst", "soc", "సాంఘిక శాస్త్రం", "సాంఘిక",
+                       "సోషల్", "سماجی علوم", "سماجی", "سوشل"],
+    "Mathematics": ["mathematics", "maths", "math", "గణితం", "గణిత", "లెక్కలు", "ریاضی"],
+    "Physical Science": ["physical science", "physics", "chemistry", "ps", "భౌతిక శాస్త్రం",
+                         "భౌతిక", "طبعی علوم", "طبیعیات"],
+    "Biological Science": ["biological science", "biology", "bio", "జీవ శాస్త్రం", "జీవశాస్త్రం",
+                           "حیاتیات"],
+    "Environmental Science": ["environmental science", "evs", "పరిసరాల విజ్ఞానం", "ماحولیات"],
+    "English": ["english"],
+    "Telugu": ["telugu", "తెలుగు"],
+    "Hindi": ["hindi", "హిందీ", "ہندی"],
+    "Urdu": ["urdu", "ఉర్దూ", "اردو"],
+}
+MEDIUM_ALIASES = {
+    "English": ["english medium", "ఇంగ్లీష్ మీడియం", "انگریزی میڈیم"],
+    "Telugu": ["telugu medium", "తెలుగు మాధ్యమం", "తెలుగు మీడియం", "تلگو میڈیم"],
+    "Urdu": ["urdu medium", "ఉర్దూ మీడియం", "اردو میڈیم"],
+}
+
+# Cues that the student wants the chapter name/list, not an explanation
+LOOKUP_CUES = {"what is", "which", "name", "title", "list", "contents", "index", "all chapters",
+               "పేరు", "ఏమిటి", "ఏది", "نام", "کیا ہے", "کون سا", "فہرست"}
+EXPLAIN_CUES = {"explain", "summary", "summarize", "summarise", "describe", "teach", "notes",
+                "questions", "answer", "meaning", "about", "detail", "వివరించు", "వివరించండి",
+                "సారాంశం", "ప్రశ్నలు", "سمجھائیں", "سمجھاؤ", "وضاحت", "خلاصہ", "سوالات"}
+
+
+def _to_number(token):
+    if token in NUMBER_WORDS:
+        return NUMBER_WORDS[token]
+    match = ORDINAL_RE.match(token)
+    return int(match.group(1)) if match else None
+
+
+SLOT_WORDS = (("chapter", CHAPTER_WORDS), ("class_from_prompt", CLASS_WORDS), ("page", PAGE_WORDS))
+
+
+def _slot_of(token):
+    for slot, words in SLOT_WORDS:
+        if token in words:
+            return slot
+    return None
+
+
+def _keyword_slots(tokens, i):
+    """Slots whose keyword is bound to the number at tokens[i], strongest first"""
+    slots = []
+    # "chapter 4" / "chapter no 4", then "4th chapter" / "10th class" / "4వ అధ్యాయం"
+    before = _slot_of(tokens[i - 1]) if i >= 1 else None
+    if before is None and i >= 2 and tokens[i - 1] in NUMBER_FILLERS:
+        before = _slot_of(tokens[i - 2])
+    after = _slot_of(tokens[i + 1]) if i + 1 < len(tokens) else None
+    for slot in (before, after):
+        if slot and slot not in slots:
+            slots.append(slot)
+    return slots
+
+
+def _is_ordinal(token):
+    return token in ORDINAL_WORDS or (ORDINAL_RE.match(token) is not None and not token.isdigit())
+
+
+def _contains(text, phrase):
+    return re.search(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)", text) is not None
+
+
+def _script_medium(text):
+    if re.search(r"[ఀ-౿]", text):
+        return "Telugu"
+    if re.search(r"[؀-ۿ]", text):
+        return "Urdu"
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════
+# PARSING
+# ═══════════════════════════════════════════════════════════════
+def parse_intent(prompt, student_class="Select", medium="Select"):
+    """Extract class/subject/chapter/page/medium and the kind of request"""
+    text = normalize_prompt(prompt)
+    tokens = text.split()
+    intent = {"class": None, "subject": None, "chapter": None, "page": None, "medium": None,
+              "class_from_prompt": None, "lookup": False, "list_chapters": False}
+
+    # Each number belongs to the keyword right next to it: "chapter 4", "10th class"
+    loose = []
+    for i, token in enumerate(tokens):
+        number = _to_number(token)
+        if number is None:
+            continue
+        slots = [slot for slot in _keyword_slots(tokens, i) if intent[slot] is None]
+        if slots:
+            intent[slots[0]] = number
+        elif _is_ordinal(token) or token.isdigit():
+            loose.append((not _is_ordinal(token), number))
+    # "10th social chapter 4": a leftover 1-10 ordinal (else bare numeral) is the class
+    if intent["class_from_prompt"] is None:
+        for _, number in sorted(loose, key=lambda item: item[0]):
+            if 1 <= number <= 10:
+                intent["class_from_prompt"] = number
+                break
+
+    # Medium first, so "telugu medium" is not also read as the Telugu subject
+    subject_text = text
+    for name, aliases in MEDIUM_ALIASES.items():
+        for alias in aliases:
+            if _contains(subject_text, alias):
+                intent["medium"] = intent["medium"] or name
+                subject_text = subject_text.replace(alias, " ")
+    for subject, aliases in SUBJECT_ALIASES.items():
+        if any(_contains(subject_text, alias) for alias in aliases):
+            intent["subject"] = subject
+            break
+
+    sidebar_class = int(student_class) if str(student_class).isdigit() else None
+    intent["class"] = intent["class_from_prompt"] or sidebar_class
+    if intent["medium"] is None:
+        intent["medium"] = medium if medium != "Select" else (_script_medium(prompt) or "English")
+
+    asks_lookup = any(_contains(text, cue) for cue in LOOKUP_CUES)
+    asks_explain = any(_contains(text, cue) for cue in EXPLAIN_CUES)
+    mentions_chapters = any(t in CHAPTER_WORDS for t in tokens)
+    intent["list_chapters"] = (asks_lookup and not asks_explain and mentions_chapters
+                               and intent["chapter"] is None and intent["page"] is None)
+    intent["lookup"] = asks_lookup and not asks_explain and (
+        intent["chapter"] is not None or intent["page"] is not None or intent["list_chapters"])
+    return intent
+
+
+# ═══════════════════════════════════════════════════════════════
+# FAST PATH
+# ═══════════════════════════════════════════════════════════════
+def _describe(chapter):
+    line = f"**Chapter {chapter['chapter']}: {chapter['title']}**"
+    details = []
+    if chapter["pages"]:
+        details.append(f"Pages {chapter['pages'][0]}-{chapter['pages'][1]}")
+    if chapter["month"]:
+        details.append(f"taught in {chapter['month']}")
+    return line + (f" ({', '.join(details)})" if details else "")
+
+
+class FastPath:
+    """Answers chapter lookups from the curriculum store and tracks the hit rate"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+
+    def _book(self, intent):
+        return f"Class {intent['class']} {intent['subject']} ({intent['medium']} medium)"
+
+    def chapter_for(self, intent):
+        """Curriculum record for the chapter the prompt refers to, if known"""
+        if not (intent["class"] and intent["subject"]):
+            return None
+        if intent["chapter"] is not None:
+            return self.store.chapter(intent["class"], intent["subject"], intent["medium"], intent["chapter"])
+        if intent["page"] is not None:
+            return self.store.chapter_for_page(intent["class"], intent["subject"], intent["medium"], intent["page"])
+        return None
+
+    def warnings(self, prompt, intent, student_class):
+        """Deterministic curriculum mismatch warnings for this prompt"""
+        warnings = []
+        if (intent["class_from_prompt"] and str(student_class).isdigit()
+                and intent["class_from_prompt"] != int(student_class)):
+            warnings.append(
+                f"⚠️ You asked about Class {intent['class_from_prompt']}, but your sidebar is set to "
+                f"Class {student_class}. I'll answer for Class {intent['class_from_prompt']}."
+            )
+        if intent["chapter"] is not None and intent["class"] and intent["subject"]:
+            # A title in the prompt that belongs to a different chapter number
+            prompt_words = set(normalize_prompt(prompt).split())
+            for chapter in self.store.chapters(intent["class"], intent["subject"], intent["medium"]):
+                title_words = [w for w in normalize_prompt(chapter["title"]).split() if len(w) > 2]
+                if not title_words or chapter["chapter"] == intent["chapter"]:
+                    continue
+                overlap = sum(w in prompt_words for w in title_words) / len(title_words)
+                if overlap >= 0.75:
+                    warnings.append(
+                        f"⚠️ In the {self._book(intent)} textbook, \"{chapter['title']}\" is "
+                        f"Chapter {chapter['chapter']}, not Chapter {intent['chapter']}. "
+                        "Please check your textbook index."
+                    )
+                    break
+            if self.chapter_for(intent) is None and self.store.chapters(
+                    intent["class"], intent["subject"], intent["medium"]):
+                warnings.append(
+                    f"⚠️ I couldn't find Chapter {intent['chapter']} in the {self._book(intent)} "
+                    "textbook. The chapter structure may have been updated - please check your textbook index."
+                )
+        return warnings
+
+    def answer(self, prompt, intent):
+        """Markdown answer for a pure lookup question, or None to go to the model"""
+        with self._lock:
+            self.requests += 1
+        if not (intent["lookup"] and intent["class"] and intent["subject"]):
+            return None
+
+        if intent["list_chapters"]:
+            chapters = self.store.chapters(intent["class"], intent["subject"], intent["medium"])
+            if not chapters:
+                return None
+            body = "\n".join(f"- {_describe(c)}" for c in chapters)
+            text = f"📚 **Chapters in {self._book(intent)}:**\n\n{body}"
+        else:
+            chapter = self.chapter_for(intent)
+            if chapter is None:
+                return None
+            text = f"📖 In the **{self._book(intent)}** SCERT textbook:\n\n{_describe(chapter)}"
+        text += "\n\nWould you like me to explain this chapter or give you practice questions? 😊"
+
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def hit_rate(self):
+        return self.hits / self.requests if self.requests else 0.0
+
+
+# ═══════════════════════════════════════════════════════════════
+# REGRESSION CASES
+# ═══════════════════════════════════════════════════════════════
+# (prompt, expected fields) with the sidebar class left at "Select"
+CASES = [
+    ("10th social chapter 4", {"class": 10, "chapter": 4, "subject": "Social Studies"}),
+    ("10th social chapter 4 name", {"class": 10, "chapter": 4, "lookup": True}),
+    ("which one is chapter 4 in 10th social", {"class": 10, "chapter": 4, "lookup": True}),
+    ("what is chapter 4 of 10th social?", {"class": 10, "chapter": 4, "lookup": True}),
+    ("class 9 maths chapter 3", {"class": 9, "chapter": 3, "subject": "Mathematics"}),
+    ("chapter 3 class 9 maths", {"class": 9, "chapter": 3}),
+    ("4th chapter of 10th class biology", {"class": 10, "chapter": 4, "subject": "Biological Science"}),
+    ("chapter no 4 of class 8 physics", {"class": 8, "chapter": 4}),
+    ("which chapter is on page 45 in 7th maths", {"class": 7, "page": 45, "chapter": None}),
+    ("explain one example of chapter 2", {"class": None, "chapter": 2, "lookup": False}),
+    ("10వ తరగతి సాంఘిక శాస్త్రం 4వ అధ్యాయం పేరు ఏమిటి", {"class": 10, "chapter": 4, "lookup": True}),
+    ("دسویں جماعت سماجی علوم باب 4 کا نام", {"class": 10, "chapter": 4, "lookup": True}),
+]
+
+
+def check(cases=CASES):
+    """[(prompt, field, expected, got)] for every case field parse_intent gets wrong"""
+    failures = []
+    for prompt, expected in cases:
+        intent = parse_intent(prompt)
+        for field, value in expected.items():
+            if intent[field] != value:
+                failures.append((prompt, field, value, intent[field]))
+    return failures
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check parse_intent against the regression cases")
+    parser.add_argument("command", choices=("check",))
+    parser.parse_args(argv)
+
+    failures = check()
+    for prompt, field, expected, got in failures:
+        print(f"{prompt!r}: {field} = {got!r}, expected {expected!r}")
+    print(f"{len(CASES) - len({f[0] for f in failures})}/{len(CASES)} cases pass")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""CPU-only local model for offline or degraded operation.
+
+Rural school deployments often lose their internet connection. With
+LOCAL_MODEL_PATH pointing at a quantized GGUF model (e.g. a 1.5B-3B
+instruct model in Q4_K_M), `LocalBackend` serves completions on the
+school server through llama.cpp (the optional `llama-cpp-python`
+package). It exposes the same `chat.completions.create(..., stream=True)`
+interface as the Groq client, so `ResilientCompleter` treats it as one
+more backend: when every remote model is unreachable it streams the
+answer from here, through the same placeholder, and keeps using it for
+LOCAL_FALLBACK_COOLDOWN seconds before trying the API again. Only
+connection failures count as unreachable: rate limits, 5xx answers and
+read timeouts mean the API is up but slow or busy, and are retried,
+queued or raised as before.
+
+The model is loaded once per process on first use and memory-mapped,
+so several app workers on one server share its pages. llama.cpp runs one
+generation at a time on LOCAL_MODEL_THREADS cores; requests take turns.
+To stay fast on a 4-core server every request is trimmed before it
+reaches the model: the long tutor system prompt is replaced by
+prompts.LOCAL_SYSTEM_PROMPT, only the last few conversation messages
+are kept and textbook passages are shortened. Fast-path answers, answer
+packs and the answer cache are served before any model is asked, so they
+keep working offline at full speed.
+
+Throughput is tracked per generation (prompt time and tokens/sec);
+
+    python local_model.py bench
+
+prints it for the configured model on this machine.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from history import message_tokens
+from prompts import LOCAL_SYSTEM_PROMPT, SYSTEM_PROMPT
+
+logger = logging.getLogger(__name__)
+
+HISTORY_MESSAGES = 4  # conversation messages kept after the system prompt
+REFERENCE_CHARS = 1200  # per trailing system message (textbook passages, context)
+
+
+def _chunk(content=None, usage=None):
+    """A stream chunk shaped like the Groq client's"""
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def trim_messages(messages, history=HISTORY_MESSAGES, reference_chars=REFERENCE_CHARS):
+    """The request cut down for a small local model"""
+    leading = []
+    rest = list(messages)
+    while rest and rest[0]["role"] == "system":
+        message = rest.pop(0)
+        if message["content"] == SYSTEM_PROMPT:
+            message = {"role": "system", "content": LOCAL_SYSTEM_PROMPT}
+        leading.append(message)
+    trailing = []
+    while rest and rest[-1]["role"] == "system":
+        message = rest.pop()
+        content = message["content"]
+        if len(content) > reference_chars:
+            content = content[:reference_chars].rstrip() + "…"
+        trailing.insert(0, {"role": "system", "content": content})
+    return leading + rest[-history:] + trailing
+
+
+class _LocalStream:
+    """One generation; holds the model until it ends or is closed"""
+
+    def __init__(self, backend, messages, params):
+        self.backend = backend
+        self.messages = messages
+        self.params = params
+        self._closed = threading.Event()
+        self._chunks = self._generate()
+
+    def __iter__(self):
+        return self._chunks
+
+    def _generate(self):
+        backend = self.backend
+        model = backend.load()
+        with backend.generation_lock:
+            started = time.perf_counter()
+            first = None
+            tokens = 0
+            try:
+                for chunk in model.create_chat_completion(messages=self.messages, stream=True, **self.params):
+                    if self._closed.is_set():
+                        break
+                    content = chunk["choices"][0]["delta"].get("content") if chunk["choices"] else None
+                    if content:
+                        first = first or time.perf_counter()
+                        tokens += 1  # llama.cpp streams one token per chunk
+                        yield _chunk(content)
+                usage = SimpleNamespace(
+                    prompt_tokens=sum(message_tokens(m) for m in self.messages),
+                    completion_tokens=tokens,
+                    prompt_tokens_details=None,
+                )
+                yield _chunk(usage=usage)
+            finally:
+                if first is not None:
+                    backend.record(first - started, tokens, time.perf_counter() - first)
+
+    def close(self):
+        """Stop generating; releases the model at the next token if another thread is iterating"""
+        self._closed.set()
+        try:
+            self._chunks.close()
+        except ValueError:  # generator already executing in the attempt's thread
+            pass
+
+
+class LocalBackend:
+    """llama.cpp model behind the Groq client's chat-completions interface"""
+
+    def __init__(self, path=None, threads=None, context=None, max_tokens=None):
+        self.path = path or os.getenv("LOCAL_MODEL_PATH", "")
+        self.threads = threads or int(os.getenv("LOCAL_MODEL_THREADS", str(os.cpu_count() or 4)))
+        self.context = context or int(os.getenv("LOCAL_MODEL_CONTEXT", "4096"))
+        # Small CPU models are slow; cap the answer length whatever the policy asked for
+        self.max_tokens = max_tokens or int(os.getenv("LOCAL_MODEL_MAX_TOKENS", "600"))
+        self.name = "local/" + os.path.splitext(os.path.basename(self.path))[0]
+        self.chat = SimpleNamespace(completions=self)
+        self.generation_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._model = None
+        self._stats_lock = threading.Lock()
+        self._runs = deque(maxlen=50)  # (prompt seconds, completion tokens, decode seconds)
+        self.stats = {"requests": 0, "completion_tokens": 0, "load_ms": None}
+
+    @classmethod
+    def from_env(cls):
+        """The configured backend, or None when LOCAL_MODEL_PATH is unset or unusable"""
+        path = os.getenv("LOCAL_MODEL_PATH")
+        if not path:
+            return None
+        if not os.path.exists(path):
+            logger.warning("LOCAL_MODEL_PATH %s does not exist; no offline fallback", path)
+            return None
+        try:
+            import llama_cpp  # noqa: F401
+        except ImportError:
+            logger.warning("Install llama-cpp-python to use the local model at %s", path)
+            return None
+        return cls(path)
+
+    def load(self):
+        """The llama.cpp model, loaded (memory-mapped) on first use"""
+        with self._load_lock:
+            if self._model is None:
+                from llama_cpp import Llama
+
+                started = time.perf_counter()
+                self._model = Llama(model_path=self.path, n_ctx=self.context, n_threads=self.threads,
+                                    use_mmap=True, verbose=False)
+                self.stats["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                logger.info("local model %s loaded in %.1f s", self.path, self.stats["load_ms"] / 1000)
+            return self._model
+
+    def create(self, model, messages, stream=True, **params):
+        """Same call as `client.chat.completions.create`; `model` is ignored"""
+        options = {
+            "max_tokens": min(params.get("max_completion_tokens") or self.max_tokens, self.max_tokens),
+            "temperature": params.get("temperature", 0.6),
+            "top_p": params.get("top_p", 0.9),
+        }
+        if params.get("stop"):
+            options["stop"] = params["stop"]
+        return _LocalStream(self, trim_messages(messages), options)
+
+    def record(self, prompt_seconds, tokens, decode_seconds):
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["completion_tokens"] += tokens
+            self._runs.append((prompt_seconds, tokens, decode_seconds))
+
+    def snapshot(self):
+        """Requests, tokens, prompt time and decode tokens/sec over the recent generations"""
+        with self._stats_lock:
+            runs = list(self._runs)
+            report = dict(self.stats, model=self.name, loaded=self._model is not None)
+        decode = sum(r[2] for r in runs)
+        report["tokens_per_s"] = round(sum(r[1] for r in runs) / decode, 1) if decode else None
+        report["prompt_ms_avg"] = round(sum(r[0] for r in runs) / len(runs) * 1000, 1) if runs else None
+        return report
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    from prompts import SYSTEM_MESSAGE
+
+    parser = argparse.ArgumentParser(description="Measure the local model's speed on this machine")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--prompt", default="Explain photosynthesis for a Class 7 student.")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    backend = LocalBackend.from_env()
+    if backend is None:
+        raise SystemExit("Set LOCAL_MODEL_PATH to a GGUF model and install llama-cpp-python")
+    backend.load()
+    messages = [SYSTEM_MESSAGE, {"role": "user", "content": args.prompt}]
+    for _ in range(args.runs):
+        for _ in backend.create(backend.name, messages, max_completion_tokens=backend.max_tokens):
+            pass
+    print(json.dumps(backend.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,274 @@
+"""Per-turn latency and token metrics.
+
+tutor.py wraps every answer in a `TurnMetrics`: it times
+the first token, the gaps between tokens and the whole stream, and picks
+up the token usage reported by the API, the render-flush time and the
+error class, if any. Finished turns go to a `MetricsRecorder`, which
+
+- keeps the most recent turns in an in-process ring buffer,
+- aggregates them into Prometheus counters and histograms, labelled by
+  class, medium and model, served as text on a local `/metrics` endpoint,
+- appends every turn as one JSON line to a size-rotated log for offline
+  capacity and cost analysis.
+
+Answers served without the model are labelled with model "fast_path",
+"answer_pack", "answer_cache", "topic_classifier" (off-syllabus and
+small-talk templates), "prefetch" (a "yes" generated ahead of time) or
+"coalesced" (replayed from an identical request in flight), so their
+share of the traffic is visible too. Answers translated from the cached
+English answer (translation.py) keep the translating model's name and
+carry policy "translation"; `medium_summary` compares generation,
+translation and reuse cost and latency per medium over the recent turns.
+"""
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+GAP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+FLUSH_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+LABELS = ("class", "medium", "model")
+# Model labels of answers served without a model call of their own
+LOCAL_MODELS = {"fast_path", "answer_pack", "answer_cache", "topic_classifier", "prefetch", "coalesced", "none"}
+
+
+def answer_source(turn):
+    """"generated", "translated" or "reused" for a finished turn record"""
+    if turn["model"] in LOCAL_MODELS:
+        return "reused"
+    return "translated" if turn["policy"] == "translation" else "generated"
+
+
+class TurnMetrics:
+    """Measurements for one question/answer turn"""
+
+    def __init__(self, session_id, student_class, medium):
+        self.started = time.perf_counter()
+        self.record = {
+            "ts": time.time(),
+            "session": session_id,
+            "class": student_class,
+            "medium": medium,
+            "model": None,
+            "policy": None,
+            "queue_ms": None,
+            "ttft_ms": None,
+            "stream_ms": None,
+            "gap_p50_ms": None,
+            "gap_max_ms": None,
+            "tokens_streamed": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+            "requests": 0,
+            "flush_ms": None,
+            "error": None,
+        }
+        self.gaps = []
+
+    def admitted(self):
+        """The scheduler gave this turn a slot"""
+        self.record["queue_ms"] = round((time.perf_counter() - self.started) * 1000, 1)
+
+    def observe(self, tokens):
+        """Pass `tokens` through, timing the first token and every gap"""
+        started = last = time.perf_counter()
+        gaps = self.gaps
+        try:
+            for token in tokens:
+                now = time.perf_counter()
+                if self.record["ttft_ms"] is None:
+                    self.record["ttft_ms"] = round((now - started) * 1000, 1)
+                else:
+                    gaps.append(now - last)
+                last = now
+                yield token
+        finally:
+            self.record["stream_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.record["tokens_streamed"] = len(gaps) + (self.record["ttft_ms"] is not None)
+
+    def fail(self, exc):
+        self.record["error"] = exc if isinstance(exc, str) else type(exc).__name__
+
+    def finish(self, completion_report=None, render_stats=None):
+        """Fill in the usage and render figures; `self.record` is then final"""
+        record = self.record
+        for key, value in (completion_report or {}).items():
+            if key in record:
+                record[key] = value
+        if render_stats:
+            record["flush_ms"] = render_stats["flush_ms"]
+        if self.gaps:
+            record["gap_p50_ms"] = round(statistics.median(self.gaps) * 1000, 1)
+            record["gap_max_ms"] = round(max(self.gaps) * 1000, 1)
+        record["model"] = record["model"] or "none"
+        return self
+
+
+class _Histogram:
+    """Cumulative-bucket histogram per label set, in Prometheus layout"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels, value):
+        series = self.series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def lines(self, name, label_names):
+        for labels, series in self.series.items():
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                yield f'{name}_bucket{{{base},le="{bound}"}} {cumulative}'
+            yield f"{name}_sum{{{base}}} {series[-1]:.6f}"
+            yield f"{name}_count{{{base}}} {cumulative}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class MetricsRecorder:
+    """Ring buffer + Prometheus aggregates + rolling JSONL log, shared per process"""
+
+    def __init__(self, capacity=None, log_path=None, log_max_bytes=None, log_backups=None):
+        self.recent = deque(maxlen=capacity or int(os.getenv("METRICS_RING_SIZE", "1000")))
+        self._lock = threading.Lock()
+        self._turns = {}  # (class, medium, model, error) -> count
+        self._tokens = {}  # (class, medium, model, kind) -> count
+        self._ttft = _Histogram(LATENCY_BUCKETS)
+        self._stream = _Histogram(LATENCY_BUCKETS)
+        self._gaps = _Histogram(GAP_BUCKETS)
+        self._flush = _Histogram(FLUSH_BUCKETS)
+        self._server = None
+
+        log_path = log_path or os.getenv("METRICS_LOG_PATH", ".cache/metrics/turns.jsonl")
+        self._log = None
+        if log_path:
+            if os.path.dirname(log_path):
+                os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            self._log = logging.handlers.RotatingFileHandler(
+                log_path,
+                maxBytes=log_max_bytes or int(os.getenv("METRICS_LOG_MAX_BYTES", str(20 * 1024 * 1024))),
+                backupCount=log_backups or int(os.getenv("METRICS_LOG_BACKUPS", "5")),
+                encoding="utf-8",
+            )
+            self._log.setFormatter(logging.Formatter("%(message)s"))
+
+    def record(self, metrics):
+        """Add one finished `TurnMetrics`"""
+        turn = metrics.record
+        labels = tuple(str(turn[name]) for name in LABELS)
+        with self._lock:
+            self.recent.append(turn)
+            key = labels + (turn["error"] or "",)
+            self._turns[key] = self._turns.get(key, 0) + 1
+            for kind in ("prompt", "completion", "cached"):
+                if turn[f"{kind}_tokens"]:
+                    key = labels + (kind,)
+                    self._tokens[key] = self._tokens.get(key, 0) + turn[f"{kind}_tokens"]
+            if turn["ttft_ms"] is not None:
+                self._ttft.observe(labels, turn["ttft_ms"] / 1000)
+            if turn["stream_ms"] is not None and not turn["error"]:
+                self._stream.observe(labels, turn["stream_ms"] / 1000)
+            for gap in metrics.gaps:
+                self._gaps.observe(labels, gap)
+            if turn["flush_ms"] is not None:
+                self._flush.observe(labels, turn["flush_ms"] / 1000)
+        if self._log is not None:
+            self._log.handle(logging.makeLogRecord({"msg": json.dumps(turn, ensure_ascii=False)}))
+
+    def medium_summary(self):
+        """{medium: {source: turns, tokens and latency}} over the recent turns (see `answer_source`)"""
+        with self._lock:
+            turns = list(self.recent)
+        groups = {}
+        for turn in turns:
+            if not turn["error"]:
+                groups.setdefault(turn["medium"], {}).setdefault(answer_source(turn), []).append(turn)
+        summary = {}
+        for medium, sources in groups.items():
+            for source, group in sources.items():
+                ttft = [t["ttft_ms"] for t in group if t["ttft_ms"] is not None]
+                stream = [t["stream_ms"] for t in group if t["stream_ms"] is not None]
+                completion = sum(t["completion_tokens"] for t in group)
+                summary.setdefault(medium, {})[source] = {
+                    "turns": len(group),
+                    "prompt_tokens": sum(t["prompt_tokens"] for t in group),
+                    "completion_tokens": completion,
+                    "avg_completion_tokens": round(completion / len(group), 1),
+                    "ttft_p50_ms": round(statistics.median(ttft), 1) if ttft else None,
+                    "stream_p50_ms": round(statistics.median(stream), 1) if stream else None,
+                }
+        return summary
+
+    def prometheus(self):
+        """All aggregates in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            lines += ["# HELP ai9campus_turns_total Answered (or failed) questions.",
+                      "# TYPE ai9campus_turns_total counter"]
+            lines += [f"ai9campus_turns_total{{{_labels(LABELS + ('error',), key)}}} {count}"
+                      for key, count in self._turns.items()]
+            lines += ["# HELP ai9campus_tokens_total Tokens reported by the API (kind: prompt, completion, cached).",
+                      "# TYPE ai9campus_tokens_total counter"]
+            lines += [f"ai9campus_tokens_total{{{_labels(LABELS + ('kind',), key)}}} {count}"
+                      for key, count in self._tokens.items()]
+            for name, histogram, help_text in (
+                ("ai9campus_ttft_seconds", self._ttft, "Time to first token."),
+                ("ai9campus_stream_seconds", self._stream, "Time from first request to last token."),
+                ("ai9campus_inter_token_seconds", self._gaps, "Gaps between streamed tokens."),
+                ("ai9campus_render_flush_seconds", self._flush, "Time spent pushing the answer to the browser."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                lines += histogram.lines(name, LABELS)
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=None, host=None):
+        """Expose `prometheus()` on http://host:port/metrics (once per recorder)"""
+        port = port if port is not None else int(os.getenv("METRICS_PORT", "9108"))
+        host = host or os.getenv("METRICS_HOST", "127.0.0.1")
+        if self._server is not None or not port:
+            return
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = recorder.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as exc:  # e.g. another app process already serves this port
+            logger.warning("metrics endpoint not started on %s:%s: %s", host, port, exc)
+            return
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-endpoint", daemon=True).start()
+        logger.info("metrics endpoint on http://%s:%s/metrics", host, port)
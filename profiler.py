@@ -0,0 +1,71 @@
+"""Per-section timing of kimiapp.py script runs.
+
+Each run creates a `RunProfile` and calls `section(name)` at the top of
+every numbered section; the time until the next call is charged to that
+section. `finish()` hands the run to the process-wide `ProfileStats`,
+which keeps the first (cold) run apart from ordinary reruns so the
+startup cost and the steady-state rerun cost can be compared.
+"""
+import statistics
+import threading
+import time
+from collections import deque
+
+PROCESS_STARTED = time.perf_counter()
+
+
+class RunProfile:
+    """Timings for one execution of the script"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._current = None
+        self._section_started = self.started
+        self.sections = []  # [(name, ms)]
+
+    def section(self, name):
+        now = time.perf_counter()
+        if self._current is not None:
+            self.sections.append((self._current, (now - self._section_started) * 1000))
+        self._current, self._section_started = name, now
+
+    def finish(self, stats):
+        self.section(None)
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        stats.record(self)
+        return self
+
+
+class ProfileStats:
+    """Process-wide aggregates over recent runs"""
+
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self.startup_ms = None  # process start -> end of the first run
+        self.first_run = None
+        self.runs = deque(maxlen=window)
+
+    def record(self, run):
+        with self._lock:
+            if self.first_run is None:
+                self.first_run = run
+                self.startup_ms = (time.perf_counter() - PROCESS_STARTED) * 1000
+            else:
+                self.runs.append(run)
+
+    def report(self):
+        """Median and p95 per section over recent reruns"""
+        with self._lock:
+            runs = list(self.runs)
+        by_section = {}
+        for run in runs:
+            for name, ms in run.sections:
+                by_section.setdefault(name, []).append(ms)
+        totals = sorted(run.total_ms for run in runs)
+        return {
+            "startup_ms": self.startup_ms,
+            "reruns": len(runs),
+            "rerun_p50_ms": statistics.median(totals) if totals else None,
+            "rerun_p95_ms": totals[int(len(totals) * 0.95) - 1] if len(totals) >= 20 else None,
+            "sections": {name: statistics.median(values) for name, values in by_section.items()},
+        }
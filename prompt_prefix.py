@@ -0,0 +1,85 @@
+"""Prompt assembly around a byte-stable system prefix.
+
+The system prompt is always sent first and never contains anything
+student-specific, so provider-side (or proxy) prefix caching can reuse
+it across every session. Class/medium/chapter context goes into a small
+trailing message instead. `PrefixRegistry` hashes the stable prefix of
+each request and logs how many tokens were cache-eligible.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+from history import message_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def student_context_message(student_class, medium, chapter=None, style=None):
+    """Small per-student system message appended after the conversation"""
+    parts = []
+    if student_class and student_class != "Select":
+        parts.append(f"Class {student_class}")
+    if medium and medium != "Select":
+        parts.append(f"{medium} medium")
+    if chapter:
+        parts.append(chapter)
+    if not parts and not style:
+        return None
+    content = "Student context (from the app settings): " + ", ".join(parts) + "." if parts else ""
+    if style:
+        content = (content + "\n" if content else "") + "Answer style: " + style
+    return {"role": "system", "content": content}
+
+
+def assemble(window, student_class, medium, chapter=None, references=None, style=None):
+    """Stable prefix + conversation window + trailing references and student context"""
+    messages = list(window)
+    if references:
+        messages.append(references)
+    context = student_context_message(student_class, medium, chapter, style)
+    if context:
+        messages.append(context)
+    return messages
+
+
+class PrefixRegistry:
+    """Tracks which stable prefixes were already sent by this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = {}  # prefix hash -> {"tokens", "requests", "first_seen"}
+        self.requests = 0
+        self.eligible_tokens = 0
+
+    def record(self, messages, prefix_len=1):
+        """Register a request and return the number of cache-eligible prompt tokens"""
+        prefix = messages[:prefix_len]
+        digest = hashlib.sha256()
+        for msg in prefix:
+            digest.update(msg["role"].encode("utf-8") + b"\0" + msg["content"].encode("utf-8") + b"\0")
+        key = digest.hexdigest()[:16]
+        tokens = sum(message_tokens(m) for m in prefix)
+
+        with self._lock:
+            entry = self._seen.get(key)
+            warm = entry is not None
+            if not warm:
+                entry = self._seen[key] = {"tokens": tokens, "requests": 0, "first_seen": time.time()}
+            entry["requests"] += 1
+            eligible = tokens if warm else 0
+            self.requests += 1
+            self.eligible_tokens += eligible
+
+        logger.info("prompt prefix %s: %s, %d cache-eligible tokens",
+                    key, "warm" if warm else "cold", eligible)
+        return eligible
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "prefixes": len(self._seen),
+                "requests": self.requests,
+                "eligible_tokens": self.eligible_tokens,
+            }
@@ -0,0 +1,206 @@
+"""Per-student and per-school token quotas.
+
+One student, or one computer lab, sending hundreds of long requests
+could starve everyone else and burn through the API budget. Every model
+request is therefore checked against two token buckets, one for the
+student's session and one for the school (tenant), and is charged with
+the prompt and completion tokens the API actually reported once its
+stream has ended. A bucket holds a day's budget (QUOTA_STUDENT_TOKENS,
+QUOTA_SCHOOL_TOKENS) and refills continuously at budget/24h, so "left
+today" is simply its level. A bucket may go below zero on the request
+that empties it; the next request waits for the refill. Answers that
+cost no API tokens (fast path, packs, cache, templates, the local
+model) are never blocked or charged.
+
+Buckets live in memory as two floats per key, so checking and charging
+are O(1) dict operations. A daemon thread saves them to SQLite every
+QUOTA_SAVE_INTERVAL seconds: each save adds this process's pending
+charges to the stored level, so several app workers share one budget
+per school, and picks up what the others charged. Buckets that have
+refilled to full are dropped from memory and from the file.
+
+The student bucket is keyed on the app's session ID, which kimiapp.py
+keeps in the URL (?s=) so it survives a page reload and Reset Chat.
+There are no student accounts, so a student who opens the app from a
+fresh link still starts a new bucket; the school bucket is the limit
+that cannot be sidestepped.
+
+QUOTA_SCHOOL_STREAMS caps how many answers one school can have streaming
+from the model at once. Schools are the IDs listed in SCHOOL_IDS
+(comma-separated) plus SCHOOL_ID; any other `?school=` value is charged
+to SCHOOL_ID, so a made-up ID cannot open a fresh budget.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 24 * 3600
+
+
+class QuotaExceeded(Exception):
+    """Raised when a student's or school's tokens for today are used up"""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"{scope} token quota used up; try again in {max(retry_after / 60, 1):.0f} minutes")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TooManyStreams(Exception):
+    """Raised when a school already has its maximum number of answers streaming"""
+
+
+class _Bucket:
+    __slots__ = ("level", "updated", "pending")
+
+    def __init__(self, level, updated):
+        self.level = level
+        self.updated = updated
+        self.pending = 0  # tokens charged here since the last save
+
+
+class Quotas:
+    """In-memory token buckets per session and school, saved to SQLite periodically"""
+
+    def __init__(self, path=None, student_tokens=None, school_tokens=None, school_streams=None,
+                 default_school=None, schools=None):
+        self.path = path or os.getenv("QUOTA_DB_PATH", ".cache/quotas.sqlite3")
+        self.capacity = {
+            "student": student_tokens or int(os.getenv("QUOTA_STUDENT_TOKENS", "100000")),
+            "school": school_tokens or int(os.getenv("QUOTA_SCHOOL_TOKENS", "5000000")),
+        }
+        self.school_streams = school_streams or int(os.getenv("QUOTA_SCHOOL_STREAMS", "16"))
+        self.default_school = default_school or os.getenv("SCHOOL_ID", "default")
+        self.schools = set(schools or [
+            s.strip() for s in os.getenv("SCHOOL_IDS", "").split(",") if s.strip()
+        ]) | {self.default_school}
+        self.stats = {"rejected": 0, "stream_limited": 0, "charged_tokens": 0}
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, level REAL, updated REAL)")
+        self._db.commit()
+        self._buckets = {}  # (scope, id) -> _Bucket
+        self._streams = {}  # school -> answers streaming now
+        self._saver = None
+
+    def _refill(self, scope, level, updated, now):
+        capacity = self.capacity[scope]
+        return min(capacity, level + (now - updated) * capacity / DAY_SECONDS)
+
+    def _bucket(self, scope, key, now):
+        """The bucket for (scope, key), refilled up to `now`; loaded from disk on first use"""
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            row = self._db.execute("SELECT level, updated FROM buckets WHERE key = ?", (f"{scope}:{key}",)).fetchone()
+            bucket = self._buckets[(scope, key)] = _Bucket(*(row or (self.capacity[scope], now)))
+        bucket.level = self._refill(scope, bucket.level, bucket.updated, now)
+        bucket.updated = now
+        return bucket
+
+    def school(self, school):
+        """The configured school to charge; unknown IDs fall back to the default"""
+        return school if school in self.schools else self.default_school
+
+    def check(self, session_id, school):
+        """Raise QuotaExceeded if the student or the school has no tokens left today"""
+        now = time.time()
+        with self._lock:
+            for scope, key in (("student", session_id), ("school", self.school(school))):
+                bucket = self._bucket(scope, key, now)
+                if bucket.level <= 0:
+                    self.stats["rejected"] += 1
+                    rate = self.capacity[scope] / DAY_SECONDS
+                    raise QuotaExceeded(scope, (1 - bucket.level) / rate)
+
+    def charge(self, session_id, school, tokens):
+        """Take the tokens a finished request used from both buckets"""
+        if tokens <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            for scope, key in (("student", session_id), ("school", self.school(school))):
+                bucket = self._bucket(scope, key, now)
+                bucket.level -= tokens
+                bucket.pending += tokens
+            self.stats["charged_tokens"] += tokens
+
+    @contextmanager
+    def stream(self, school):
+        """Hold one of the school's concurrent answer streams"""
+        school = self.school(school)
+        with self._lock:
+            if self._streams.get(school, 0) >= self.school_streams:
+                self.stats["stream_limited"] += 1
+                raise TooManyStreams(f"school {school} already has {self.school_streams} answers streaming")
+            self._streams[school] = self._streams.get(school, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._streams[school] -= 1
+
+    def remaining(self, session_id, school):
+        """Tokens left today for the student and the school, with the daily budgets"""
+        now = time.time()
+        with self._lock:
+            student = self._bucket("student", session_id, now).level
+            school_level = self._bucket("school", self.school(school), now).level
+        return {
+            "student": max(int(student), 0), "student_limit": self.capacity["student"],
+            "school": max(int(school_level), 0), "school_limit": self.capacity["school"],
+        }
+
+    def save(self):
+        """Merge this process's charges into the file and refresh every bucket from it"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for (scope, key), bucket in list(self._buckets.items()):
+                    db_key = f"{scope}:{key}"
+                    row = self._db.execute("SELECT level, updated FROM buckets WHERE key = ?", (db_key,)).fetchone()
+                    stored = self._refill(scope, *row, now) if row else self.capacity[scope]
+                    bucket.level, bucket.updated = stored - bucket.pending, now
+                    if bucket.pending:
+                        self._db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                                         (db_key, bucket.level, now))
+                        bucket.pending = 0
+                    if bucket.level >= self.capacity[scope]:
+                        del self._buckets[(scope, key)]
+                # Every bucket is full again after a day without charges
+                self._db.execute("DELETE FROM buckets WHERE updated < ?", (now - DAY_SECONDS,))
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                raise
+
+    def start_saving(self, interval_seconds=None):
+        """Run `save` periodically on a daemon thread (once per instance)"""
+        if self._saver is not None:
+            return
+        interval = interval_seconds or float(os.getenv("QUOTA_SAVE_INTERVAL", "30"))
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.save()
+                except sqlite3.Error:
+                    logger.exception("saving quotas failed")
+
+        self._saver = threading.Thread(target=loop, name="quota-saver", daemon=True)
+        self._saver.start()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, buckets=len(self._buckets),
+                        streaming={school: n for school, n in self._streams.items() if n})
@@ -0,0 +1,152 @@
+"""Process-wide resources for kimiapp.py, created once via st.cache_resource.
+
+Importing this module loads `.env` once per server process. Every
+factory below runs on first use and is then shared by all sessions and
+reruns. With TUTOR_SERVICE_URL set, `get_tutor` returns a client of
+tutor_service.py and the model path runs there instead of in this process.
+"""
+import os
+
+import streamlit as st
+from dotenv import load_dotenv
+
+from answer_cache import AnswerCache
+from answer_packs import AnswerPacks
+from completion import ResilientCompleter
+from completion_policy import CompletionPolicy
+from conversation_store import ConversationStore
+from curriculum_store import CurriculumStore
+from groq_client import create_client
+from intent import FastPath
+from local_model import LocalBackend
+from metrics import MetricsRecorder
+from profiler import ProfileStats
+from prompt_prefix import PrefixRegistry
+from scheduler import RequestScheduler
+from textbook_index import TextbookIndex
+from topic_classifier import TopicClassifier
+from tutor import Tutor, TutorClient
+
+load_dotenv()
+
+TUTOR_SERVICE_URL = os.getenv("TUTOR_SERVICE_URL")
+
+
+def get_api_key():
+    return os.getenv("GROK-API-KEY")
+
+
+@st.cache_resource
+def get_groq_client(api_key):
+    """One pooled keep-alive client per server process, reused across reruns"""
+    return create_client(api_key)
+
+
+@st.cache_resource
+def get_scheduler():
+    """Global admission gate shared by every session's model requests"""
+    return RequestScheduler()
+
+
+@st.cache_resource
+def get_local_backend():
+    """Offline fallback model (LOCAL_MODEL_PATH), loaded on first use; None if not configured"""
+    return LocalBackend.from_env()
+
+
+@st.cache_resource
+def get_completer(api_key):
+    """Retry/hedge/fallback layer over the shared client (COMPLETION_MODELS sets the chain)"""
+    client, _ = get_groq_client(api_key)
+    return ResilientCompleter(client, fallback=get_local_backend())
+
+
+@st.cache_resource
+def get_completion_policy(api_key):
+    """Per-question completion parameters, with stats shared across sessions"""
+    return CompletionPolicy(get_completer(api_key).models)
+
+
+@st.cache_resource
+def get_conversation_store():
+    """Chat history lives on disk; sessions only hold message IDs"""
+    store = ConversationStore()
+    store.start_compaction()
+    return store
+
+
+@st.cache_resource
+def get_answer_cache():
+    """One answer cache per server process, shared by all sessions"""
+    return AnswerCache()
+
+
+@st.cache_resource
+def get_prefix_registry():
+    return PrefixRegistry()
+
+
+@st.cache_resource
+def get_textbook_index():
+    """Open the textbook index and pick up any added/changed textbooks"""
+    index = TextbookIndex()
+    index.build()
+    return index
+
+
+@st.cache_resource
+def get_curriculum_store():
+    """Compile curriculum.json (if changed) and open it once per process"""
+    return CurriculumStore()
+
+
+@st.cache_resource
+def get_fast_path():
+    """Local answers for chapter lookups, shared so the hit rate is process-wide"""
+    return FastPath(get_curriculum_store())
+
+
+@st.cache_resource
+def get_answer_packs():
+    """Precomputed chapter answers (built offline with `python answer_packs.py build`)"""
+    return AnswerPacks()
+
+
+@st.cache_resource
+def get_metrics():
+    """Per-turn metrics: ring buffer, JSONL log and the local /metrics endpoint"""
+    recorder = MetricsRecorder()
+    recorder.serve()
+    return recorder
+
+
+@st.cache_resource
+def get_topic_classifier():
+    """Off-syllabus / small-talk classifier (topic_model.json, trained offline)"""
+    return TopicClassifier()
+
+
+@st.cache_resource
+def get_tutor(api_key):
+    """The answer path: the remote tutor service if configured, else these shared objects"""
+    if TUTOR_SERVICE_URL:
+        return TutorClient(TUTOR_SERVICE_URL, get_metrics())
+    client, pool_stats = get_groq_client(api_key)
+    return Tutor(
+        completer=get_completer(api_key),
+        completion_policy=get_completion_policy(api_key),
+        scheduler=get_scheduler(),
+        answer_cache=get_answer_cache(),
+        answer_packs=get_answer_packs(),
+        fast_path=get_fast_path(),
+        textbook_index=get_textbook_index(),
+        prefix_registry=get_prefix_registry(),
+        metrics=get_metrics(),
+        pool_stats=pool_stats,
+        topic_classifier=get_topic_classifier(),
+    )
+
+
+@st.cache_resource
+def get_profile_stats():
+    return ProfileStats()
@@ -0,0 +1,126 @@
+"""Global request scheduler between the chat handler and the Groq client.
+
+Every Streamlit session runs in its own script thread, so the scheduler
+is an admission gate those threads wait on: a global cap on concurrent
+model streams, at most `per_session` streams per session, short
+follow-ups served before long questions, and sessions that have had
+fewer turns served before busy ones. Prefetches are left out of the
+per-session count, so a speculative answer never holds up the
+session's real question. Waiting callers get their queue
+position through `on_wait`, and the queue refuses new work past
+`max_queue` instead of letting a burst turn into 429s.
+"""
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PRIORITY_FOLLOW_UP = 0
+PRIORITY_NORMAL = 1
+PRIORITY_PREFETCH = 2  # speculative work, only after every student request
+
+
+class QueueFull(Exception):
+    """Raised when too many requests are already waiting"""
+
+
+class QueueTimeout(Exception):
+    """Raised when a request waited longer than `max_wait` seconds"""
+
+
+class RequestScheduler:
+    """Fair, priority-aware concurrency limiter for model requests"""
+
+    def __init__(self, max_concurrent=None, per_session=None, max_queue=None, max_wait=None):
+        self.max_concurrent = max_concurrent or int(os.getenv("SCHEDULER_MAX_CONCURRENT", "8"))
+        self.per_session = per_session or int(os.getenv("SCHEDULER_PER_SESSION", "1"))
+        self.max_queue = max_queue or int(os.getenv("SCHEDULER_MAX_QUEUE", "200"))
+        self.max_wait = max_wait or float(os.getenv("SCHEDULER_MAX_WAIT", "120"))
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting = {}   # ticket -> (priority, session_id)
+        self._active = {}    # session_id -> in-flight streams
+        self._served = {}    # session_id -> turns served (fairness between sessions)
+        self.running = 0
+        self.stats = {"admitted": 0, "rejected": 0, "timed_out": 0, "wait_seconds": 0.0}
+
+    def _order(self, ticket):
+        priority, session_id = self._waiting[ticket]
+        return (priority, self._served.get(session_id, 0), ticket)
+
+    def _eligible(self):
+        return sorted(
+            (t for t, (priority, session_id) in self._waiting.items()
+             if priority == PRIORITY_PREFETCH or self._active.get(session_id, 0) < self.per_session),
+            key=self._order,
+        )
+
+    def position(self, ticket):
+        """1-based place in line among requests that could run next"""
+        order = self._order(ticket)
+        return 1 + sum(1 for t in self._waiting if t != ticket and self._order(t) < order)
+
+    @contextmanager
+    def slot(self, session_id, priority=PRIORITY_NORMAL, on_wait=None):
+        """Block until this session may start a model stream; release on exit"""
+        started = time.monotonic()
+        counted = priority != PRIORITY_PREFETCH  # per-session limit and fairness
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise QueueFull(f"{len(self._waiting)} requests already waiting")
+            ticket = next(self._seq)
+            self._waiting[ticket] = (priority, session_id)
+            last_position = None
+            try:
+                while True:
+                    eligible = self._eligible()
+                    if self.running < self.max_concurrent and eligible and eligible[0] == ticket:
+                        break
+                    position = self.position(ticket)
+                    if on_wait and position != last_position:
+                        last_position = position
+                        # The callback renders UI; don't hold up every other session meanwhile
+                        self._cond.release()
+                        try:
+                            on_wait(position)
+                        finally:
+                            self._cond.acquire()
+                        continue  # the queue may have moved while unlocked
+                    remaining = self.max_wait - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self.stats["timed_out"] += 1
+                        raise QueueTimeout(f"waited {self.max_wait:.0f}s for a slot")
+                    self._cond.wait(timeout=min(remaining, 1.0))
+            finally:
+                del self._waiting[ticket]
+                self._cond.notify_all()
+            self.running += 1
+            if counted:
+                self._active[session_id] = self._active.get(session_id, 0) + 1
+                self._served[session_id] = self._served.get(session_id, 0) + 1
+            self.stats["admitted"] += 1
+            self.stats["wait_seconds"] += time.monotonic() - started
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.running -= 1
+                if counted:
+                    self._active[session_id] -= 1
+                    if not self._active[session_id]:
+                        del self._active[session_id]
+                self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            admitted = self.stats["admitted"]
+            return {
+                "running": self.running,
+                "waiting": len(self._waiting),
+                "admitted": admitted,
+                "rejected": self.stats["rejected"],
+                "timed_out": self.stats["timed_out"],
+                "avg_wait_ms": round(self.stats["wait_seconds"] / admitted * 1000, 1) if admitted else 0.0,
+            }
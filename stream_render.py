@@ -0,0 +1,59 @@
+"""Throttled rendering of streamed tokens into a Streamlit placeholder.
+
+Tokens are buffered in a list and flushed to the browser on a time or
+size cadence instead of re-rendering the whole answer for every delta.
+"""
+import os
+import time
+
+CURSOR = "▌"
+
+
+class StreamRenderer:
+    """Batches streamed tokens and flushes them to `placeholder.markdown`"""
+
+    def __init__(self, placeholder, interval=None, max_tokens=None):
+        self.placeholder = placeholder
+        self.interval = interval or float(os.getenv("STREAM_FLUSH_INTERVAL", "0.05"))
+        self.max_tokens = max_tokens or int(os.getenv("STREAM_FLUSH_TOKENS", "40"))
+        self._pending = []  # tokens received since the last flush
+        self._text = ""
+        self._last_flush = time.perf_counter()
+        self.tokens = 0
+        self.flushes = 0
+        self.bytes_pushed = 0
+        self.flush_seconds = 0.0
+
+    def push(self, token):
+        self._pending.append(token)
+        self.tokens += 1
+        if (len(self._pending) >= self.max_tokens
+                or time.perf_counter() - self._last_flush >= self.interval):
+            self.flush()
+
+    def flush(self, final=False):
+        if self._pending:
+            self._text += "".join(self._pending)
+            self._pending.clear()
+        elif not final:
+            return
+        body = self._text if final else self._text + CURSOR
+        started = time.perf_counter()
+        self.placeholder.markdown(body)
+        self._last_flush = time.perf_counter()
+        self.flush_seconds += self._last_flush - started
+        self.flushes += 1
+        self.bytes_pushed += len(body.encode("utf-8"))
+
+    def finish(self):
+        """Final flush without the cursor; returns the full response text"""
+        self.flush(final=True)
+        return self._text
+
+    def stats(self):
+        return {
+            "tokens": self.tokens,
+            "flushes": self.flushes,
+            "bytes_pushed": self.bytes_pushed,
+            "flush_ms": round(self.flush_seconds * 1000, 1),
+        }
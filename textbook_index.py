@@ -0,0 +1,246 @@
+"""Retrieval over locally stored SCERT textbook text.
+
+Textbooks live under TEXTBOOK_DIR laid out like the curriculum:
+
+    textbooks/<class>/<subject>/<medium>/<NN>-<chapter>.txt   (or .pdf)
+
+`build` chunks every file into passages and stores them in SQLite with an
+FTS5 table (BM25 ranking) and a hashed n-gram vector per passage. A
+manifest of file sizes/mtimes makes the build incremental: only added,
+changed or deleted textbooks are touched. `TextbookIndex.search` ranks
+passages with BM25 and the vectors, filtered by class and medium.
+
+Build from the command line with:
+
+    python textbook_index.py build [textbook_dir]
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+from answer_cache import cosine, embed, normalize_prompt
+from file_lock import exclusive
+
+logger = logging.getLogger(__name__)
+
+CHUNK_CHARS = 900  # also bounds the size of each passage sent to the model
+SUPPORTED_SUFFIXES = (".txt", ".md", ".pdf")
+
+
+# ═══════════════════════════════════════════════════════════════
+# READING & CHUNKING
+# ═══════════════════════════════════════════════════════════════
+def _read_text(path):
+    if path.endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            logger.warning("Skipping %s: install pypdf to index PDF textbooks", path)
+            return ""
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def chunk_text(text, size=CHUNK_CHARS):
+    """Pack paragraphs into passages of at most `size` characters"""
+    chunks, current = [], ""
+    for para in re.split(r"\n\s*\n", text):
+        para = "\n".join(" ".join(line.split()) for line in para.splitlines() if line.strip())
+        if not para:
+            continue
+        # Paragraphs longer than a chunk are split on sentence boundaries
+        pieces = [para] if len(para) <= size else re.split(r"(?<=[.!?।۔])\s+", para)
+        for piece in pieces:
+            while len(piece) > size:
+                chunks.append(piece[:size])
+                piece = piece[size:]
+            if current and len(current) + len(piece) + 1 > size:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _location(root, path):
+    """(class, subject, medium, chapter) from textbooks/<class>/<subject>/<medium>/<NN>-*.txt"""
+    parts = os.path.relpath(path, root).split(os.sep)
+    if len(parts) != 4:
+        return None
+    class_dir, subject, medium, filename = parts
+    if not class_dir.isdigit():
+        return None
+    match = re.match(r"(\d+)", filename)
+    chapter = int(match.group(1)) if match else 0  # 0 = contents / whole book
+    return int(class_dir), subject, medium, chapter
+
+
+# ═══════════════════════════════════════════════════════════════
+# INDEX
+# ═══════════════════════════════════════════════════════════════
+class TextbookIndex:
+    """SQLite-backed BM25 + vector index over textbook passages"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("TEXTBOOK_INDEX_PATH", ".cache/textbook_index.sqlite3")
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA mmap_size={256 * 1024 * 1024}")  # read passages via mmap
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS passages (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL,
+                class INTEGER NOT NULL,
+                subject TEXT NOT NULL,
+                medium TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                vector TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS passages_scope ON passages(class, medium);
+            CREATE INDEX IF NOT EXISTS passages_path ON passages(path);
+            CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+                text, content='passages', content_rowid='id'
+            );
+        """)
+        self._db.commit()
+
+    def _remove_file(self, path):
+        rows = self._db.execute("SELECT id, text FROM passages WHERE path = ?", (path,)).fetchall()
+        self._db.executemany(
+            "INSERT INTO passages_fts(passages_fts, rowid, text) VALUES ('delete', ?, ?)", rows
+        )
+        self._db.execute("DELETE FROM passages WHERE path = ?", (path,))
+        self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _add_file(self, root, path, stat):
+        location = _location(root, path)
+        if location is None:
+            logger.warning("Skipping %s: expected <class>/<subject>/<medium>/<file>", path)
+            return 0
+        class_num, subject, medium, chapter = location
+        chunks = chunk_text(_read_text(path))
+        for text in chunks:
+            vector = json.dumps(embed(normalize_prompt(text)), separators=(",", ":"))
+            cur = self._db.execute(
+                "INSERT INTO passages (path, class, subject, medium, chapter, text, vector) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, class_num, subject, medium, chapter, text, vector),
+            )
+            self._db.execute(
+                "INSERT INTO passages_fts(rowid, text) VALUES (?, ?)", (cur.lastrowid, text)
+            )
+        self._db.execute(
+            "INSERT INTO files (path, size, mtime) VALUES (?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime),
+        )
+        return len(chunks)
+
+    def build(self, root=None):
+        """Incrementally sync the index with the textbook directory"""
+        root = root or os.getenv("TEXTBOOK_DIR", "textbooks")
+        on_disk = {}
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.lower().endswith(SUPPORTED_SUFFIXES):
+                    path = os.path.join(dirpath, name)
+                    on_disk[path] = os.stat(path)
+
+        summary = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "passages": 0}
+        with exclusive(self.path), self._lock:
+            indexed = {p: (size, mtime) for p, size, mtime in self._db.execute("SELECT * FROM files")}
+            for path in indexed.keys() - on_disk.keys():
+                self._remove_file(path)
+                summary["removed"] += 1
+            for path, stat in sorted(on_disk.items()):
+                if indexed.get(path) == (stat.st_size, stat.st_mtime):
+                    summary["unchanged"] += 1
+                    continue
+                if path in indexed:
+                    self._remove_file(path)
+                    summary["updated"] += 1
+                else:
+                    summary["added"] += 1
+                summary["passages"] += self._add_file(root, path, stat)
+            self._db.commit()
+        return summary
+
+    def search(self, query, student_class=None, medium=None, k=3):
+        """Top-k passages for a question, as dicts with their curriculum location"""
+        normalized = normalize_prompt(query)
+        terms = [t for t in normalized.split() if len(t) > 1]
+        if not terms:
+            return []
+
+        filters, params = [], []
+        if student_class and str(student_class).isdigit():
+            filters.append("p.class = ?")
+            params.append(int(student_class))
+        if medium and medium != "Select":
+            filters.append("p.medium = ?")
+            params.append(medium)
+        where = "".join(f" AND {f}" for f in filters)
+        match = " OR ".join('"' + t.replace('"', "") + '"' for t in terms)
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT p.id, p.class, p.subject, p.medium, p.chapter, p.text, p.vector, "
+                "bm25(passages_fts) FROM passages_fts JOIN passages p ON p.id = passages_fts.rowid "
+                f"WHERE passages_fts MATCH ?{where} ORDER BY bm25(passages_fts) LIMIT ?",
+                [match, *params, k * 8],
+            ).fetchall()
+
+        if not rows:
+            return []
+        # Hybrid score: BM25 (lower is better in SQLite) rescaled, plus vector cosine
+        query_vec = embed(normalized)
+        best_bm25 = min(r[7] for r in rows) or -1.0
+        scored = []
+        for row_id, class_num, subject, medium_, chapter, text, vector, bm25 in rows:
+            vector = {int(i): v for i, v in json.loads(vector).items()}
+            score = 0.6 * (bm25 / best_bm25) + 0.4 * cosine(query_vec, vector)
+            scored.append((score, {
+                "class": class_num, "subject": subject, "medium": medium_,
+                "chapter": chapter, "text": text,
+            }))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [passage for _, passage in scored[:k]]
+
+
+def reference_message(passages):
+    """System message carrying retrieved passages for one request"""
+    if not passages:
+        return None
+    blocks = []
+    for p in passages:
+        where = f"Class {p['class']} {p['subject']} ({p['medium']} medium)"
+        if p["chapter"]:
+            where += f", Chapter {p['chapter']}"
+        blocks.append(f"[{where}]\n{p['text']}")
+    return {
+        "role": "system",
+        "content": "Curriculum reference (SCERT textbook excerpts; use these to verify "
+                   "chapter titles, page numbers and content):\n\n" + "\n\n".join(blocks),
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        print(TextbookIndex().build(sys.argv[2] if len(sys.argv) > 2 else None))
+    else:
+        print("usage: python textbook_index.py build [textbook_dir]")
@@ -0,0 +1,132 @@
+"""Local token estimates for English, Telugu, Urdu and code-mixed text.
+
+A text is reduced to a few script features (Latin words and letters,
+digits, Telugu and Arabic-script characters, other symbols) and the
+token count is a weighted sum of them. The weights are fitted offline
+against the model's own tokenizer by `benchmarks/calibrate_tokens.py`,
+which writes token_rates.json; without that file the built-in rates
+below are used. The same rates give each medium's answer-length factor
+(Telugu needs far more tokens than English for the same explanation),
+which `completion_budget` uses to pick `max_completion_tokens` per
+question type and class level.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+
+FEATURES = ("latin_words", "latin_chars", "digits", "telugu_chars", "arabic_chars", "other_chars")
+
+# Approximate rates for Llama-3/Kimi-style BPE vocabularies (tokens per feature unit)
+DEFAULT_RATES = {
+    "intercept": 1.0,
+    "latin_words": 1.0,
+    "latin_chars": 0.05,
+    "digits": 0.4,
+    "telugu_chars": 0.6,
+    "arabic_chars": 0.45,
+    "other_chars": 0.9,
+}
+# Tokens for the same answer relative to English
+DEFAULT_MEDIUM_FACTORS = {"English": 1.0, "Telugu": 2.0, "Urdu": 1.3}
+
+LATIN_WORD_RE = re.compile(r"[A-Za-z]+")
+DIGIT_RE = re.compile(r"[0-9౦-౯٠-٩۰-۹]")
+TELUGU_RE = re.compile(r"[ఀ-౿]")
+ARABIC_RE = re.compile(r"[؀-ۿݐ-ݿﭐ-﷿ﹰ-﻿]")
+SPACE_RE = re.compile(r"\s")
+
+
+@lru_cache(maxsize=None)
+def load_rates(model=None):
+    """(rates, medium factors) for `model` from token_rates.json, else the defaults"""
+    path = os.getenv("TOKEN_RATES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "token_rates.json"))
+    try:
+        with open(path, encoding="utf-8") as f:
+            calibrated = json.load(f)
+    except (OSError, ValueError):
+        return DEFAULT_RATES, DEFAULT_MEDIUM_FACTORS
+    entry = calibrated.get(model) or calibrated.get("default") or {}
+    return (dict(DEFAULT_RATES, **entry.get("rates", {})),
+            dict(DEFAULT_MEDIUM_FACTORS, **entry.get("medium_factors", {})))
+
+
+def features(text):
+    """Script feature counts used by the estimator (and by the calibration fit)"""
+    latin_words = LATIN_WORD_RE.findall(text)
+    latin_chars = sum(len(w) for w in latin_words)
+    digits = len(DIGIT_RE.findall(text))
+    telugu = len(TELUGU_RE.findall(text))
+    arabic = len(ARABIC_RE.findall(text))
+    spaces = len(SPACE_RE.findall(text))
+    other = len(text) - latin_chars - digits - telugu - arabic - spaces
+    return {
+        "latin_words": len(latin_words), "latin_chars": latin_chars, "digits": digits,
+        "telugu_chars": telugu, "arabic_chars": arabic, "other_chars": max(other, 0),
+    }
+
+
+def estimate_tokens(text, model=None):
+    """Estimated token count of `text` for `model`'s tokenizer"""
+    rates, _ = load_rates(model)
+    counts = features(text)
+    return int(round(rates["intercept"] + sum(rates[name] * counts[name] for name in FEATURES)))
+
+
+# ═══════════════════════════════════════════════════════════════
+# ANSWER LENGTH
+# ═══════════════════════════════════════════════════════════════
+# English-equivalent answer budgets by exam mark value
+MARKS_BUDGET = {1: 250, 2: 450, 4: 900, 8: 1800}
+MARKS_RE = re.compile(r"(?<!\w)([1248]) ?marks?(?!\w)")
+SHORT_CUES = re.compile(r"(?<!\w)(define|definition|meaning|full form|one word|one line|what is the name)(?!\w)")
+LONG_CUES = re.compile(r"(?<!\w)(explain|describe|summary|summarise|summarize|notes|essay|in detail|"
+                       r"వివరించు|వివరించండి|సారాంశం|سمجھائیں|وضاحت|خلاصہ)(?!\w)")
+
+
+def _class_budget(student_class):
+    """Default English-equivalent budget by class level"""
+    if not str(student_class).isdigit():
+        return 1500
+    class_num = int(student_class)
+    if class_num <= 5:
+        return 800
+    if class_num <= 7:
+        return 1200
+    return 1500
+
+
+def question_type(prompt):
+    """Question type: 1-mark, 2-mark, 4-mark, 8-mark, short, long or general"""
+    text = prompt.casefold()
+    marks = MARKS_RE.search(text)
+    if marks:
+        return f"{marks.group(1)}-mark"
+    if SHORT_CUES.search(text) and not LONG_CUES.search(text):
+        return "short"
+    if LONG_CUES.search(text):
+        return "long"
+    return "general"
+
+
+def completion_budget(prompt, student_class, medium, model=None, cap=None):
+    """`max_completion_tokens` for this question: by mark value / question type and class, scaled by medium"""
+    cap = cap or int(os.getenv("MAX_COMPLETION_TOKENS", "4096"))
+    kind = question_type(prompt)
+    if kind.endswith("-mark"):
+        budget = MARKS_BUDGET[int(kind[0])]
+    elif kind == "short":
+        budget = 400
+    elif kind == "long":
+        budget = _class_budget(student_class) * 1.5
+    else:
+        budget = _class_budget(student_class)
+    _, factors = load_rates(model)
+    return int(min(budget * factors.get(medium, 1.0), cap))
+
+
+def prompt_too_long(prompt, model=None, limit=None):
+    """(estimated tokens, limit) if the prompt is over the paste limit, else None"""
+    limit = limit or int(os.getenv("MAX_PROMPT_TOKENS", "3000"))
+    tokens = estimate_tokens(prompt, model)
+    return (tokens, limit) if tokens > limit else None
@@ -0,0 +1,253 @@
+"""Local topic classifier: in-syllabus, off-syllabus or small talk.
+
+The refusal policy in SYSTEM_PROMPT used to be enforced only by the
+model, so "which is the best mobile game?" cost a full completion to get
+a polite refusal back. This classifier runs on every prompt before the
+model path and answers the two cheap classes from templates in the
+student's medium:
+
+- off_syllabus: games, movies, politics, other boards (CBSE/ICSE/AP),
+  entrance exams and college topics, money, hacking, ...
+- small_talk: greetings, thanks, goodbyes, "who are you?"
+
+Prompts are reduced to the answer cache's hashed word + char-trigram
+vector (`answer_cache.embed`), which handles English, Telugu, Urdu and
+code-mixed text alike, and scored by a softmax-regression model stored
+in topic_model.json. Scoring is a sparse dot product in plain Python,
+well under a millisecond per prompt. Only confident predictions are
+answered locally (TOPIC_THRESHOLD); anything else goes to the model as
+before, so a wrong guess costs a model call, not a wrong refusal.
+
+The model is trained offline from the labelled examples in
+topic_examples.json, whose "eval" split is held out:
+
+    python topic_classifier.py train
+    python topic_classifier.py evaluate
+"""
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+from answer_cache import CONTEXT_WORDS, VECTOR_DIM, embed, normalize_prompt
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LABELS = ("in_syllabus", "off_syllabus", "small_talk")
+MAX_CHARS = 400  # the topic is clear from the start of a message; long pastes are study material
+SMALL_TALK_MAX_WORDS = 8
+THANKS_WORDS = {"thanks", "thank", "thx", "bye", "tata", "ధన్యవాదాలు", "థాంక్స్", "شکریہ", "حافظ"}
+
+TEMPLATES = {
+    "off_syllabus": {
+        "English": (
+            "I'm specialized in the Telangana State Board curriculum (Classes 1-10), so I can't help "
+            "with that topic. 😊 Ask me anything from your textbooks - Maths, Science, Social Studies, "
+            "English, Telugu, Hindi or Urdu - and I'll explain it step by step!"
+        ),
+        "Telugu": (
+            "నేను తెలంగాణ స్టేట్ బోర్డ్ పాఠ్యాంశాలకు (1-10 తరగతులు) మాత్రమే సహాయం చేస్తాను, కాబట్టి ఆ విషయంలో "
+            "సహాయం చేయలేను. 😊 మీ పాఠ్యపుస్తకాల నుండి - గణితం, సైన్స్, సాంఘిక శాస్త్రం, ఇంగ్లీష్, తెలుగు, హిందీ లేదా "
+            "ఉర్దూ - ఏదైనా అడగండి, దశలవారీగా వివరిస్తాను!"
+        ),
+        "Urdu": (
+            "میں صرف تلنگانہ اسٹیٹ بورڈ کے نصاب (جماعت 1 تا 10) میں مدد کرتا ہوں، اس لیے اس موضوع پر مدد نہیں "
+            "کر سکتا۔ 😊 اپنی درسی کتابوں سے - ریاضی، سائنس، سماجی علوم، انگریزی، تلگو، ہندی یا اردو - کچھ بھی پوچھیں، "
+            "میں قدم بہ قدم سمجھاؤں گا!"
+        ),
+    },
+    "small_talk": {
+        "English": (
+            "Hello! 👋 I'm your AI9Campus Smart Tutor for Telangana State Board. I'm here to help you "
+            "learn! Which class are you in, and which subject do you need help with?"
+        ),
+        "Telugu": (
+            "నమస్తే! 👋 నేను తెలంగాణ స్టేట్ బోర్డ్ కోసం మీ AI9Campus స్మార్ట్ ట్యూటర్‌ని. మీరు ఏ తరగతి చదువుతున్నారు, "
+            "ఏ సబ్జెక్టులో సహాయం కావాలి?"
+        ),
+        "Urdu": (
+            "السلام علیکم! 👋 میں تلنگانہ اسٹیٹ بورڈ کے لیے آپ کا AI9Campus اسمارٹ ٹیوٹر ہوں۔ آپ کس جماعت میں ہیں "
+            "اور کس مضمون میں مدد چاہیے؟"
+        ),
+    },
+    "thanks": {
+        "English": "You're welcome! 😊 Keep learning - ask me whenever you have another question.",
+        "Telugu": "సంతోషం! 😊 చదువుతూ ఉండండి - మరో సందేహం ఉంటే ఎప్పుడైనా అడగండి.",
+        "Urdu": "خوشی ہوئی! 😊 پڑھتے رہیں - کوئی اور سوال ہو تو کبھی بھی پوچھیں۔",
+    },
+}
+
+
+def _vector(prompt):
+    return embed(normalize_prompt(prompt[:MAX_CHARS]))
+
+
+def _softmax(scores):
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class TopicClassifier:
+    """Scores prompts with the trained model and answers the off-topic ones locally"""
+
+    def __init__(self, path=None, threshold=None):
+        self.path = path or os.getenv("TOPIC_MODEL_PATH", os.path.join(ROOT, "topic_model.json"))
+        self.threshold = threshold or float(os.getenv("TOPIC_THRESHOLD", "0.85"))
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                model = json.load(f)
+        except (OSError, ValueError):
+            model = None  # untrained: every prompt goes to the model
+        self.bias = model["bias"] if model else None
+        # feature index -> per-label weights, so each feature costs one dict lookup
+        self.weights = {int(k): v for k, v in model["weights"].items()} if model else {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "off_syllabus": 0, "small_talk": 0}
+
+    def probabilities(self, prompt):
+        """{label: probability}"""
+        scores = list(self.bias)
+        for idx, value in _vector(prompt).items():
+            row = self.weights.get(idx)
+            if row:
+                for i, w in enumerate(row):
+                    scores[i] += w * value
+        return dict(zip(LABELS, _softmax(scores)))
+
+    def classify(self, prompt):
+        """(label, confidence); in_syllabus without a trained model"""
+        if self.bias is None:
+            return "in_syllabus", 1.0
+        probabilities = self.probabilities(prompt)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def answer(self, prompt, medium, history=()):
+        """Template answer for a confident off-syllabus / small-talk prompt, else None"""
+        label, confidence = self.classify(prompt)
+        words = normalize_prompt(prompt).split()
+        local = label != "in_syllabus" and confidence >= self.threshold
+        if label == "small_talk":
+            # Mid-conversation, short replies ("ok", "yes") usually answer the tutor's question
+            thanks = bool(THANKS_WORDS.intersection(words))
+            local = local and len(words) <= SMALL_TALK_MAX_WORDS and (thanks or not history)
+            label = "thanks" if thanks else label
+        if CONTEXT_WORDS.intersection(words):
+            local = False  # "explain that again" refers to the previous answer
+        with self._lock:
+            self.stats["requests"] += 1
+            if local:
+                self.stats["small_talk" if label == "thanks" else label] += 1
+        if not local:
+            return None
+        templates = TEMPLATES[label]
+        return templates.get(medium, templates["English"])
+
+    def hit_rate(self):
+        answered = self.stats["off_syllabus"] + self.stats["small_talk"]
+        return answered / self.stats["requests"] if self.stats["requests"] else 0.0
+
+
+# ═══════════════════════════════════════════════════════════════
+# OFFLINE TRAINING & EVALUATION
+# ═══════════════════════════════════════════════════════════════
+def load_examples(path=None):
+    with open(path or os.path.join(ROOT, "topic_examples.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def train(examples, epochs=60, learning_rate=0.5, l2=1e-4, seed=0):
+    """Softmax regression by SGD over the hashed vectors; returns the model dict"""
+    data = [(_vector(text), LABELS.index(label)) for text, label in examples]
+    bias = [0.0] * len(LABELS)
+    weights = {}
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(data)
+        rate = learning_rate / (1 + epoch * 0.1)
+        for vector, target in data:
+            scores = list(bias)
+            for idx, value in vector.items():
+                row = weights.get(idx)
+                if row:
+                    for i, w in enumerate(row):
+                        scores[i] += w * value
+            probabilities = _softmax(scores)
+            for i, p in enumerate(probabilities):
+                gradient = p - (i == target)
+                bias[i] -= rate * gradient
+                for idx, value in vector.items():
+                    row = weights.setdefault(idx, [0.0] * len(LABELS))
+                    row[i] -= rate * (gradient * value + l2 * row[i])
+    return {
+        "labels": list(LABELS),
+        "dim": VECTOR_DIM,
+        "trained": time.strftime("%Y-%m-%d"),
+        "examples": len(examples),
+        "bias": [round(b, 5) for b in bias],
+        "weights": {str(idx): [round(w, 5) for w in row] for idx, row in sorted(weights.items())},
+    }
+
+
+def evaluate(classifier, examples):
+    """Accuracy, per-label precision/recall, local answers, false refusals and latency on `examples`"""
+    confusion = {gold: dict.fromkeys(LABELS, 0) for gold in LABELS}
+    timings, wrong = [], []
+    answered = {"in_syllabus": 0, "other": 0}
+    for text, gold in examples:
+        started = time.perf_counter()
+        predicted, confidence = classifier.classify(text)
+        timings.append(time.perf_counter() - started)
+        confusion[gold][predicted] += 1
+        if predicted != gold:
+            wrong.append((text, gold, predicted, round(confidence, 2)))
+        # A syllabus question answered with a template is the costly mistake
+        if classifier.answer(text, "English") is not None:
+            answered["in_syllabus" if gold == "in_syllabus" else "other"] += 1
+    others = sum(1 for _, gold in examples if gold != "in_syllabus")
+    report = {"examples": len(examples),
+              "accuracy": round(sum(confusion[l][l] for l in LABELS) / len(examples), 3),
+              "false_refusals": answered["in_syllabus"],
+              "off_topic_answered_locally": round(answered["other"] / others, 3) if others else None}
+    for label in LABELS:
+        predicted = sum(confusion[gold][label] for gold in LABELS)
+        actual = sum(confusion[label].values())
+        report[label] = {
+            "precision": round(confusion[label][label] / predicted, 3) if predicted else None,
+            "recall": round(confusion[label][label] / actual, 3) if actual else None,
+        }
+    timings.sort()
+    report["latency_p50_ms"] = round(timings[len(timings) // 2] * 1000, 3)
+    report["latency_max_ms"] = round(timings[-1] * 1000, 3)
+    report["confusion"] = confusion
+    report["errors"] = wrong
+    return report
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train or evaluate the local topic classifier")
+    parser.add_argument("command", choices=("train", "evaluate"))
+    parser.add_argument("--examples", default=os.path.join(ROOT, "topic_examples.json"))
+    parser.add_argument("--model", default=os.path.join(ROOT, "topic_model.json"))
+    parser.add_argument("--epochs", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    examples = load_examples(args.examples)
+    if args.command == "train":
+        model = train(examples["train"], epochs=args.epochs)
+        with open(args.model, "w", encoding="utf-8") as f:
+            json.dump(model, f, separators=(",", ":"))
+        print(f"trained on {len(examples['train'])} examples, {len(model['weights'])} features -> {args.model}")
+    report = evaluate(TopicClassifier(args.model), examples["eval"])
+    json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
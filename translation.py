@@ -0,0 +1,91 @@
+"""Cross-medium answer reuse: translate the English answer, don't regenerate.
+
+The same syllabus is taught in English, Telugu and Urdu medium, and most
+concept questions ("what is photosynthesis?") come from all three. The
+English answer in the answer cache is the canonical one: when a Telugu-
+or Urdu-medium question misses its own cache scope but the same question
+already has an English answer, `Translator` turns that answer into the
+student's medium with one short translation request instead of a full
+tutoring generation. The request carries no system prompt, history or
+textbook references, runs at a low temperature, and can use a smaller
+model (TRANSLATION_MODELS). It keeps the SYSTEM_PROMPT convention of
+English terms in parentheses ("కిరణజన్య సంయోగక్రియ (Photosynthesis)
+అనేది..."), the Markdown layout, formulas and emojis.
+
+"The same question" means the same normalized words, so a question
+typed in Telugu or Urdu script only finds an English answer when it
+asks for a whole chapter (its summary, important questions or
+definitions): those are also cached under a script-independent key
+built from the parsed class, subject and chapter
+(answer_packs.canonical_prompt).
+
+The translation is stored in the medium's own cache scope, which is
+evicted against its own byte budget (see AnswerCache), so the next
+student of that medium gets it without any model call. Turns answered
+this way carry policy "translation" in their metrics record;
+`MetricsRecorder.medium_summary` reports cost and latency per medium for
+generated, translated and reused answers.
+"""
+import os
+import threading
+
+from token_estimator import estimate_tokens, load_rates
+
+LANGUAGES = {"Telugu": "Telugu (తెలుగు)", "Urdu": "Urdu (اردو)"}
+EXAMPLES = {
+    "Telugu": "కిరణజన్య సంయోగక్రియ (Photosynthesis) అనేది...",
+    "Urdu": "فوٹو سنتھیسس (Photosynthesis) وہ عمل ہے...",
+}
+
+TRANSLATION_PROMPT = """You translate answers of a Telangana State Board (SCERT) tutor for Class {student_class} students into {language}.
+
+Rules:
+- Translate the whole answer faithfully; do not add, drop or summarize anything.
+- Write for a {medium}-medium student in simple, textbook-style {medium}.
+- Keep each subject term in English in parentheses after its {medium} term, e.g. "{example}"
+- Keep the Markdown (headings, bold, lists, tables), emojis, numbers, formulas, units and chemical equations exactly as they are.
+- Keep names of textbooks, chapters and people recognisable; add the English name in parentheses.
+- Reply with the translated answer only."""
+
+
+class Translator:
+    """Translates cached English answers into the other mediums"""
+
+    def __init__(self, completer, models=None, enabled=None, temperature=None):
+        self.completer = completer
+        self.models = models or [
+            m.strip() for m in os.getenv("TRANSLATION_MODELS", "").split(",") if m.strip()
+        ] or None  # None: the completer's own chain
+        self.enabled = enabled if enabled is not None else os.getenv("TRANSLATION_ENABLED", "1") == "1"
+        self.temperature = temperature if temperature is not None else float(os.getenv("TRANSLATION_TEMPERATURE", "0.2"))
+        self._lock = threading.Lock()
+        self.stats = {medium: {"translated": 0, "failed": 0} for medium in LANGUAGES}
+
+    def wanted(self, medium):
+        """True if answers for `medium` can be translated from English"""
+        return self.enabled and medium in LANGUAGES
+
+    def request(self, answer, medium, student_class):
+        """(messages, params) of the translation request"""
+        class_label = student_class if str(student_class).isdigit() else "1-10"
+        system = TRANSLATION_PROMPT.format(
+            student_class=class_label, language=LANGUAGES[medium], medium=medium, example=EXAMPLES[medium],
+        )
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": answer}]
+        # The same text, re-tokenized in the target script, plus room for the English terms
+        _, factors = load_rates()
+        budget = int(estimate_tokens(answer) * factors.get(medium, 1.0) * 1.3) + 64
+        params = {
+            "max_completion_tokens": min(budget, int(os.getenv("MAX_COMPLETION_TOKENS", "4096"))),
+            "temperature": self.temperature,
+            "top_p": 0.9,
+        }
+        return messages, params
+
+    def record(self, medium, ok):
+        with self._lock:
+            self.stats[medium]["translated" if ok else "failed"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {medium: dict(counts) for medium, counts in self.stats.items()}
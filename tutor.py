@@ -0,0 +1,757 @@
+"""The tutor's answer path, independent of the UI.
+
+`Tutor` holds everything between a student's question and the answer
+tokens: template answers for off-syllabus questions and small talk
+(topic_classifier.py), local fast-path answers and mismatch warnings,
+precomputed answer packs, the shared answer cache, prompt assembly, the
+completion policy, the scheduler and the resilient completer. kimiapp.py drives it
+in-process; tutor_service.py serves the same path as a streaming
+HTTP/SSE service, so other front-ends (the SMS and WhatsApp bots, or
+Streamlit itself through `TutorClient` when TUTOR_SERVICE_URL is set)
+share one backend pool that can be scaled apart from the UI.
+
+A turn is used the same way whichever side of the wire it runs on:
+
+    turn = tutor.start(prompt, history, student_class, medium, session_id)
+    turn.warnings                   # shown before the answer
+    for token in turn.stream(on_wait=show_queue_position):
+        ...
+    record = turn.finish(render_stats)   # metrics record of the turn
+
+Identical model requests in flight at the same time are coalesced: the
+first one takes a scheduler slot and streams from the model, the others
+replay its tokens as they arrive without a slot or API call of their own
+(their turns are labelled with model "coalesced"). If the first student
+leaves mid-answer, the others finish it with one request of their own
+that continues from the tokens already shown.
+
+When an answer ends with an offer ("Would you like practice questions?"),
+`Prefetcher` generates the answer to "yes" in the background at the
+lowest scheduler priority, within an hourly token budget. A "yes" then
+streams back at once (model "prefetch"); anything else cancels it. Hit
+rate and wasted tokens are tracked; PREFETCH_ENABLED=0 turns it off.
+
+Model requests are checked against the student's and the school's
+daily token buckets and charged with the tokens they used (quotas.py).
+
+A Telugu- or Urdu-medium question that misses its own cache scope but
+has a cached English answer gets that answer translated (translation.py,
+policy "translation") instead of a fresh generation; the translation is
+then cached for the medium. Chapter questions (summary, exam questions,
+definitions of chapter N) are matched across scripts by their parsed
+intent; other questions only when asked in the same words.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+import httpx
+
+from answer_cache import is_cacheable, normalize_prompt, replay_answer
+from answer_packs import canonical_prompt
+from completion import RESUME_INSTRUCTION
+from history import ConversationWindow
+from intent import parse_intent
+from metrics import TurnMetrics
+from prompt_prefix import assemble
+from prompts import SYSTEM_MESSAGE
+from quotas import Quotas, QuotaExceeded, TooManyStreams
+from scheduler import PRIORITY_FOLLOW_UP, PRIORITY_NORMAL, PRIORITY_PREFETCH, QueueFull, QueueTimeout
+from textbook_index import reference_message
+from token_estimator import estimate_tokens
+from topic_classifier import TopicClassifier
+from translation import Translator
+
+logger = logging.getLogger(__name__)
+
+
+class TutorServiceError(Exception):
+    """An error reported by the tutor service"""
+
+
+class _Abandoned(TutorServiceError):
+    """The request a coalesced turn was replaying was cancelled before it finished"""
+
+
+# ═══════════════════════════════════════════════════════════════
+# REQUEST COALESCING
+# ═══════════════════════════════════════════════════════════════
+class _Flight:
+    """One in-flight model stream and the tokens it has produced so far"""
+
+    def __init__(self):
+        self.tokens = []
+        self.done = False
+        self.error = None
+        self.abandoned = False  # the leader went away, not the model
+        self.cond = threading.Condition()
+
+
+class Coalescer:
+    """Shares one model stream between identical requests in flight"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # request key -> _Flight
+        self.stats = {"leaders": 0, "followers": 0}
+
+    @staticmethod
+    def key(messages, models, params):
+        payload = json.dumps([messages, models, params], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def join(self, key):
+        """(flight, True) for the first request with this key, (flight, False) for the rest"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats["followers"] += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.stats["leaders"] += 1
+            return flight, True
+
+    def close(self, key, flight, error=None, abandoned=False):
+        """End a flight; later requests with the same key start a new one"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        with flight.cond:
+            if not flight.done:
+                flight.done = True
+                flight.error = error
+                flight.abandoned = abandoned
+                flight.cond.notify_all()
+
+    def lead(self, key, flight, tokens):
+        """Pass the leader's tokens through, publishing each one to the followers"""
+        error, abandoned = None, False
+        try:
+            for token in tokens:
+                with flight.cond:
+                    flight.tokens.append(token)
+                    flight.cond.notify_all()
+                yield token
+        except GeneratorExit:
+            error, abandoned = "the original request was cancelled", True
+            raise
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            self.close(key, flight, error, abandoned)
+
+    @staticmethod
+    def follow(flight):
+        """Replay a flight's tokens so far, then the rest as they arrive"""
+        sent = 0
+        while True:
+            with flight.cond:
+                while sent >= len(flight.tokens) and not flight.done:
+                    flight.cond.wait()
+                pending = flight.tokens[sent:]
+                done = flight.done
+            yield from pending
+            sent += len(pending)
+            if done and sent >= len(flight.tokens):
+                if flight.abandoned:
+                    raise _Abandoned(flight.error)
+                if flight.error:
+                    raise TutorServiceError(f"shared answer stream failed ({flight.error})")
+                return
+
+
+# ═══════════════════════════════════════════════════════════════
+# SPECULATIVE PREFETCH
+# ═══════════════════════════════════════════════════════════════
+# The response templates in prompts.SYSTEM_PROMPT end with offers
+# ("Would you like practice questions?"), which students mostly accept
+OFFER_RE = re.compile(r"(?<!\w)(would you like|do you want|shall i|should i|want me to|"
+                      r"కావాలా|చేయమంటారా|ఇవ్వమంటారా|చెప్పమంటారా|چاہیں گے|چاہتے ہیں|کیا میں)(?!\w)")
+AFFIRMATIVE_WORDS = {"yes", "yeah", "yep", "ya", "yup", "sure", "ok", "okay", "haan", "ha", "ji", "avunu",
+                     "sare", "అవును", "సరే", "కావాలి", "ہاں", "جی", "ضرور", "ٹھیک"}
+POLITE_WORDS = {"please", "pls", "plz", "sir", "madam", "bhaiya", "anna", "akka", "ji", "ండి", "ప్లీజ్", "براہ", "کرم"}
+FOLLOW_UP_PROMPT = "Yes"
+
+
+def offers_follow_up(answer):
+    """True if the answer ends by offering more (practice questions, a similar problem, ...)"""
+    tail = answer[-400:].casefold()
+    return ("?" in tail or "؟" in tail) and OFFER_RE.search(tail) is not None
+
+
+def is_affirmative(prompt):
+    """"yes", "yes please", "avunu sir", "جی ہاں" ..."""
+    words = normalize_prompt(prompt).split()
+    return (0 < len(words) <= 4 and words[0] in AFFIRMATIVE_WORDS
+            and all(w in AFFIRMATIVE_WORDS or w in POLITE_WORDS for w in words))
+
+
+class _Prefetch:
+    """A follow-up answer generated ahead of time for one session"""
+
+    def __init__(self, session_id, after):
+        self.session_id = session_id
+        self.after = after  # the answer whose offer this accepts
+        self.flight = _Flight()
+        self.report = {}
+        self.cancelled = threading.Event()
+        self.created = time.monotonic()
+        self.admitted = False  # holds a scheduler slot (or has finished)
+        self.taken = False
+        self.tokens_used = None  # completion tokens, once the stream has ended
+
+
+class Prefetcher:
+    """Generates the answer to "yes" in the background after answers that end with an offer"""
+
+    def __init__(self, completer, scheduler, enabled=None, token_budget=None, ttl=None):
+        self.completer = completer
+        self.scheduler = scheduler
+        self.enabled = enabled if enabled is not None else os.getenv("PREFETCH_ENABLED", "1") == "1"
+        # Completion tokens the prefetches may use per hour, served or not
+        self.token_budget = token_budget or int(os.getenv("PREFETCH_TOKEN_BUDGET", "200000"))
+        self.ttl = ttl or float(os.getenv("PREFETCH_TTL", "900"))
+        self._lock = threading.Lock()
+        self._pending = {}  # session_id -> _Prefetch
+        self._spent = deque()  # (monotonic time, completion tokens)
+        self.stats = {"started": 0, "hits": 0, "cancelled": 0, "expired": 0, "failed": 0, "skipped": 0,
+                      "served_tokens": 0, "wasted_tokens": 0}
+
+    def wanted(self, answer):
+        return self.enabled and offers_follow_up(answer)
+
+    def _spent_last_hour(self, now):
+        while self._spent and now - self._spent[0][0] > 3600:
+            self._spent.popleft()
+        return sum(tokens for _, tokens in self._spent)
+
+    def _discard(self, entry, reason):
+        entry.cancelled.set()
+        self.stats[reason] += 1
+        if entry.tokens_used is not None:
+            self.stats["wasted_tokens"] += entry.tokens_used
+
+    def start(self, session_id, after, messages, models, params):
+        """Generate the follow-up to `after` at low priority; skipped while others wait or over budget"""
+        queue = self.scheduler.snapshot()
+        now = time.monotonic()
+        with self._lock:
+            for stale_id, stale in list(self._pending.items()):
+                if now - stale.created > self.ttl:
+                    self._discard(self._pending.pop(stale_id), "expired")
+            previous = self._pending.pop(session_id, None)
+            if previous:
+                self._discard(previous, "cancelled")
+            # Offline, the one local model is needed for the questions actually asked
+            if (queue["waiting"] or queue["running"] >= self.scheduler.max_concurrent
+                    or self._spent_last_hour(now) >= self.token_budget or self.completer.remote_down()):
+                self.stats["skipped"] += 1
+                return None
+            entry = self._pending[session_id] = _Prefetch(session_id, after)
+            self.stats["started"] += 1
+        threading.Thread(target=self._run, args=(entry, messages, models, params),
+                         name="prefetch", daemon=True).start()
+        return entry
+
+    def _run(self, entry, messages, models, params):
+        flight, error = entry.flight, None
+        try:
+            with self.scheduler.slot(entry.session_id, PRIORITY_PREFETCH):
+                entry.admitted = True
+                if entry.cancelled.is_set():
+                    return
+                tokens = self.completer.stream(messages, report=entry.report, models=models, **params)
+                try:
+                    for token in tokens:
+                        if entry.cancelled.is_set():
+                            break
+                        with flight.cond:
+                            flight.tokens.append(token)
+                            flight.cond.notify_all()
+                finally:
+                    tokens.close()
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            logger.info("prefetch for session %s failed: %s", entry.session_id, error)
+        finally:
+            with flight.cond:
+                flight.done = True
+                flight.error = error or ("cancelled" if entry.cancelled.is_set() else None)
+                flight.cond.notify_all()
+            text = "".join(flight.tokens)
+            used = entry.report.get("completion_tokens") or (estimate_tokens(text) if text else 0)
+            with self._lock:
+                entry.tokens_used = used
+                self._spent.append((time.monotonic(), used))
+                if entry.taken:
+                    self.stats["served_tokens"] += used
+                elif entry.cancelled.is_set():
+                    self.stats["wasted_tokens"] += used
+
+    def take(self, session_id, prompt, history):
+        """The session's prefetch if `prompt` accepts the offer it was made for; anything else cancels it"""
+        with self._lock:
+            entry = self._pending.pop(session_id, None)
+            if entry is None:
+                return None
+            last = history[-1] if history else {}
+            accepted = (is_affirmative(prompt) and last.get("role") == "assistant"
+                        and last.get("content") == entry.after)
+            if not accepted or not entry.admitted:
+                # Still queued behind other students: the turn is better off asking itself
+                self._discard(entry, "cancelled")
+                return None
+            if entry.flight.done and entry.flight.error:
+                self._discard(entry, "failed")
+                return None
+            entry.taken = True
+            self.stats["hits"] += 1
+            if entry.tokens_used is not None:
+                self.stats["served_tokens"] += entry.tokens_used
+            return entry
+
+    def snapshot(self):
+        with self._lock:
+            settled = self.stats["hits"] + self.stats["cancelled"] + self.stats["expired"] + self.stats["failed"]
+            return dict(self.stats, pending=len(self._pending),
+                        hit_rate=self.stats["hits"] / settled if settled else 0.0)
+
+
+# ═══════════════════════════════════════════════════════════════
+# IN-PROCESS TUTOR
+# ═══════════════════════════════════════════════════════════════
+class TutorTurn:
+    """One question/answer turn: warnings up front, then `stream()`, then `finish()`"""
+
+    def __init__(self, tutor, prompt, history, student_class, medium, session_id, window=None, school=None):
+        self.tutor = tutor
+        self.prompt = prompt
+        self.history = list(history)
+        self.student_class = student_class
+        self.medium = medium
+        self.session_id = session_id
+        self.window = window or ConversationWindow()
+        self.school = tutor.quotas.school(school)
+
+        self.intent = parse_intent(prompt, student_class, medium)
+
+        # A "yes" to the previous answer's offer may already be generated
+        self.prefetched = tutor.prefetcher.take(session_id, prompt, self.history)
+
+        # Off-syllabus questions and small talk get a template reply, not a model refusal
+        self.topic_answer = None if self.prefetched else tutor.topic_classifier.answer(
+            prompt, self.intent["medium"], self.history
+        )
+        answered = self.prefetched or self.topic_answer
+
+        # Chapter lookups are answered locally; mismatch warnings cost no model tokens
+        self.warnings = [] if answered else list(tutor.fast_path.warnings(prompt, self.intent, student_class))
+        self.fast_answer = None if answered else tutor.fast_path.answer(prompt, self.intent)
+
+        # Chapter summaries / exam questions / definitions may be precomputed
+        self.chapter = tutor.fast_path.chapter_for(self.intent)
+        self.pack_answer = (
+            None if answered or self.fast_answer else tutor.answer_packs.answer(prompt, self.chapter)
+        )
+
+        # Standalone questions can be answered from the shared answer cache
+        self.cacheable = (is_cacheable(prompt) and not answered
+                          and not self.fast_answer and not self.pack_answer)
+        self.cached_answer = (
+            tutor.answer_cache.lookup(prompt, student_class, medium) if self.cacheable else None
+        )
+        # A Telugu/Urdu miss can translate the English answer to the same question: asked
+        # in the same words, or (for chapter questions) with the same intent in any script
+        self.canonical_prompt = canonical_prompt(prompt, self.intent) if self.cacheable else None
+        self.source_answer = None
+        if self.cacheable and self.cached_answer is None and tutor.translator.wanted(medium):
+            self.source_answer = tutor.answer_cache.lookup(prompt, student_class, "English", count=False)
+            if self.source_answer is None and self.canonical_prompt:
+                self.source_answer = tutor.answer_cache.lookup(
+                    self.canonical_prompt, student_class, "English", count=False
+                )
+
+        # Latency/token record for this turn (see metrics.py)
+        self.metrics = TurnMetrics(session_id, self.intent["class"] or student_class, medium)
+        self.report = {}
+        self.choice = None
+        self.history_stats = None
+        self.coalesced = False
+        self.answer = None
+        self._context_cache = None
+        self._flight = None
+        self._scope = ExitStack()
+
+    def stream(self, on_wait=None):
+        """Answer tokens; blocks for a scheduler slot first (reporting the queue position) if the model is needed"""
+        if self.prefetched:
+            self.report["model"] = "prefetch"
+            tokens = Coalescer.follow(self.prefetched.flight)
+        elif self.topic_answer:
+            self.report["model"] = "topic_classifier"
+            tokens = replay_answer(self.topic_answer)
+        elif self.fast_answer:
+            self.report["model"] = "fast_path"
+            tokens = replay_answer(self.fast_answer)
+        elif self.pack_answer:
+            self.report["model"] = "answer_pack"
+            tokens = replay_answer(self.pack_answer)
+        elif self.cached_answer:
+            self.report["model"] = "answer_cache"
+            tokens = replay_answer(self.cached_answer)
+        elif self.source_answer:
+            tokens = self._translate(on_wait)
+        else:
+            tokens = self._request(on_wait)
+        return self._observe(tokens)
+
+    def _context(self):
+        """(textbook references, chapter line) for this question, looked up once"""
+        if self._context_cache is None:
+            references = reference_message(
+                self.tutor.textbook_index.search(self.prompt, self.student_class, self.medium)
+            )
+            chapter = self.chapter
+            chapter_context = (
+                f"{chapter['subject']} Chapter {chapter['chapter']}: {chapter['title']}" if chapter else None
+            )
+            self._context_cache = (references, chapter_context)
+        return self._context_cache
+
+    def _request(self, on_wait):
+        tutor = self.tutor
+        student_class = self.intent["class"] or self.student_class
+
+        # Trim the history to the token budget before sending
+        window, history_stats = self.window.build(
+            [SYSTEM_MESSAGE] + self.history + [{"role": "user", "content": self.prompt}]
+        )
+        references, chapter_context = self._context()
+
+        # Output cap, model, sampling and stop sequences for this kind of question
+        choice = tutor.completion_policy.choose(self.prompt, student_class, self.intent["medium"])
+        self.report["policy"] = choice["name"]
+        request_messages = assemble(window, student_class, self.medium, chapter_context, references, choice["style"])
+        history_stats["cache_eligible_tokens"] = tutor.prefix_registry.record(request_messages)
+        self.history_stats = history_stats
+
+        follow_up = bool(self.history) and len(self.prompt) <= 80
+        tokens = self._complete(request_messages, choice["models"], choice["params"],
+                                PRIORITY_FOLLOW_UP if follow_up else PRIORITY_NORMAL, on_wait)
+        if not self.coalesced:
+            self.choice = choice
+        return tokens
+
+    def _translate(self, on_wait):
+        """The cached English answer, translated into the student's medium"""
+        translator = self.tutor.translator
+        messages, params = translator.request(self.source_answer, self.medium,
+                                              self.intent["class"] or self.student_class)
+        self.report["policy"] = "translation"
+        return self._complete(messages, translator.models, params, PRIORITY_NORMAL, on_wait)
+
+    def _complete(self, messages, models, params, priority, on_wait):
+        tutor = self.tutor
+        tutor.quotas.check(self.session_id, self.school)
+
+        # An identical request already streaming: replay it instead of asking the model again
+        key = Coalescer.key(messages, models, params)
+        flight, leader = tutor.coalescer.join(key)
+        if not leader:
+            self.coalesced = True
+            self.report["model"] = "coalesced"
+            return self._follow(flight, messages, models, params, priority, on_wait)
+        self._flight = (key, flight)
+
+        # Wait for a slot in the global scheduler, showing the queue position
+        try:
+            self._scope.enter_context(tutor.quotas.stream(self.school))
+            self._scope.enter_context(tutor.scheduler.slot(self.session_id, priority, on_wait=on_wait))
+        except Exception as exc:
+            tutor.coalescer.close(key, flight, type(exc).__name__)
+            raise
+        self.metrics.admitted()
+
+        # Retries and fallback models are handled by the completer
+        return tutor.coalescer.lead(key, flight, tutor.completer.stream(
+            messages, report=self.report, models=models, **params,
+        ))
+
+    def _follow(self, flight, messages, models, params, priority, on_wait):
+        """Replay the leader's tokens; if its student leaves, continue the answer with our own request"""
+        received = []
+        try:
+            for token in Coalescer.follow(flight):
+                received.append(token)
+                yield token
+            return
+        except _Abandoned:
+            pass
+        # Resumed like a broken stream in the completer; the other followers coalesce onto it
+        self.coalesced = False
+        if received:
+            messages = list(messages) + [
+                {"role": "assistant", "content": "".join(received)},
+                {"role": "user", "content": RESUME_INSTRUCTION},
+            ]
+        yield from self._complete(messages, models, params, priority, on_wait)
+
+    def _observe(self, tokens):
+        received = []
+        for token in self.metrics.observe(tokens):
+            received.append(token)
+            yield token
+        answer = "".join(received)
+        if not answer:
+            self.metrics.fail("EmptyResponse")
+        elif self.cacheable and not self.cached_answer and not self.coalesced:
+            self.tutor.answer_cache.store(self.prompt, self.student_class, self.medium, answer)
+            if self.medium == "English" and self.canonical_prompt:
+                self.tutor.answer_cache.store(self.canonical_prompt, self.student_class, "English", answer)
+        self.answer = answer or None
+
+    def fail(self, exc):
+        self.metrics.fail(exc)
+
+    def finish(self, render_stats=None):
+        """Release the scheduler slot, record the metrics and return the turn's record"""
+        self._scope.close()
+        if self._flight:
+            self.tutor.coalescer.close(*self._flight, error="the original request ended early", abandoned=True)
+        record = self.metrics.finish(self.report, render_stats).record
+        self.tutor.metrics.record(self.metrics)
+        if self.choice:
+            self.tutor.completion_policy.record(self.choice, record)
+        if self.source_answer and not self.coalesced:
+            self.tutor.translator.record(self.medium, not record["error"])
+        # API tokens this answer used (a taken prefetch is charged to the turn that uses it)
+        usage = self.prefetched.report if self.prefetched else record
+        if not str(usage.get("model") or "").startswith("local/"):
+            self.tutor.quotas.charge(self.session_id, self.school,
+                                     (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0))
+        if self.answer and not record["error"] and self.tutor.prefetcher.wanted(self.answer):
+            self._prefetch()
+        return record
+
+    def _prefetch(self):
+        """Start generating the reply to "yes", as the next turn would request it"""
+        tutor = self.tutor
+        try:
+            tutor.quotas.check(self.session_id, self.school)
+        except QuotaExceeded:
+            return
+        student_class = self.intent["class"] or self.student_class
+        window, _ = self.window.build([SYSTEM_MESSAGE] + self.history + [
+            {"role": "user", "content": self.prompt},
+            {"role": "assistant", "content": self.answer},
+            {"role": "user", "content": FOLLOW_UP_PROMPT},
+        ])
+        references, chapter_context = self._context()
+        choice = tutor.completion_policy.choose(FOLLOW_UP_PROMPT, student_class, self.intent["medium"])
+        messages = assemble(window, student_class, self.medium, chapter_context, references, choice["style"])
+        tutor.prefetcher.start(self.session_id, self.answer, messages, choice["models"], choice["params"])
+
+
+class Tutor:
+    """The shared backend objects, bundled for one process"""
+
+    def __init__(self, completer, completion_policy, scheduler, answer_cache, answer_packs, fast_path,
+                 textbook_index, prefix_registry, metrics, pool_stats=None, coalescer=None,
+                 topic_classifier=None, prefetcher=None, translator=None, quotas=None):
+        self.completer = completer
+        self.completion_policy = completion_policy
+        self.scheduler = scheduler
+        self.answer_cache = answer_cache
+        self.answer_packs = answer_packs
+        self.fast_path = fast_path
+        self.textbook_index = textbook_index
+        self.prefix_registry = prefix_registry
+        self.metrics = metrics
+        self.pool_stats = pool_stats
+        self.coalescer = coalescer or Coalescer()
+        self.topic_classifier = topic_classifier or TopicClassifier()
+        self.prefetcher = prefetcher or Prefetcher(completer, scheduler)
+        self.translator = translator or Translator(completer)
+        if quotas is None:
+            quotas = Quotas()
+            quotas.start_saving()
+        self.quotas = quotas
+
+    def start(self, prompt, history, student_class, medium, session_id, window=None, school=None):
+        """A new turn; `history` is the conversation before `prompt`, `school` the tenant for quotas"""
+        return TutorTurn(self, prompt, history, student_class, medium, session_id, window, school)
+
+    def remaining(self, session_id, school=None):
+        """Tokens left today for the student and the school (see quotas.py)"""
+        return self.quotas.remaining(session_id, school)
+
+    def snapshot(self):
+        """Backend statistics for the Performance panel and the service's /stats"""
+        cache_stats = dict(self.answer_cache.stats, hit_rate=self.answer_cache.hit_rate())
+        return {
+            "models": self.completer.stats.snapshot(),
+            "policies": self.completion_policy.snapshot(),
+            "scheduler": self.scheduler.snapshot(),
+            "connections": self.pool_stats.snapshot() if self.pool_stats else None,
+            "fast_path_hit_rate": self.fast_path.hit_rate(),
+            "answer_packs": {"hits": self.answer_packs.hits, "requests": self.answer_packs.requests},
+            "answer_cache": cache_stats,
+            "coalesced": dict(self.coalescer.stats),
+            "topic_classifier": dict(self.topic_classifier.stats),
+            "prefetch": self.prefetcher.snapshot(),
+            "translation": self.translator.snapshot(),
+            "mediums": self.metrics.medium_summary(),
+            "local_model": self.completer.fallback.snapshot() if self.completer.fallback else None,
+            "offline": self.completer.remote_down(),
+            "quotas": self.quotas.snapshot(),
+        }
+
+
+# ═══════════════════════════════════════════════════════════════
+# THIN CLIENT OF tutor_service.py
+# ═══════════════════════════════════════════════════════════════
+def _events(lines):
+    """(event, data) pairs from Server-Sent Event lines"""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+
+def _raise(error):
+    if error.get("type") == "QuotaExceeded":
+        raise QuotaExceeded(error.get("scope", "student"), error.get("retry_after", 0))
+    exc_type = {"QueueFull": QueueFull, "QueueTimeout": QueueTimeout,
+                "TooManyStreams": TooManyStreams}.get(error.get("type"), TutorServiceError)
+    raise exc_type(error.get("message", "tutor service error"))
+
+
+class RemoteTurn:
+    """A turn answered by the tutor service; same interface as `TutorTurn`"""
+
+    def __init__(self, client, prompt, history, student_class, medium, session_id, school=None):
+        self.client = client
+        self.metrics = TurnMetrics(session_id, student_class, medium)
+        self.report = {}
+        self.history_stats = None
+        self._scope = ExitStack()
+        response = self._scope.enter_context(client.http.stream("POST", "/chat", json={
+            "prompt": prompt,
+            "history": list(history),
+            "class": student_class,
+            "medium": medium,
+            "session_id": session_id,
+            "school": school,
+        }))
+        if response.status_code != 200:
+            response.read()
+            self._scope.close()
+            raise TutorServiceError(f"tutor service returned HTTP {response.status_code}: {response.text[:200]}")
+        self._events = _events(response.iter_lines())
+        self.warnings = []
+        try:
+            for event, data in self._events:
+                if event == "error":
+                    _raise(data)
+                if event == "start":
+                    self.warnings = data["warnings"]
+                    break
+        except BaseException:
+            # No turn for the caller to finish(): release the response here
+            self._scope.close()
+            raise
+
+    def stream(self, on_wait=None):
+        """Answer tokens; queue positions are passed to `on_wait` while the service waits for a slot"""
+        for event, data in self._events:
+            if event == "queue":
+                if on_wait:
+                    on_wait(data["position"])
+            elif event == "meta":
+                self.history_stats = data["history_stats"]
+                self.report.update(data["report"])
+                if data["admitted"]:
+                    self.metrics.admitted()
+                return self.metrics.observe(self._tokens())
+            elif event == "error":
+                _raise(data)
+        raise TutorServiceError("tutor service closed the stream early")
+
+    def _tokens(self):
+        for event, data in self._events:
+            if event == "token":
+                yield data["text"]
+            elif event == "done":
+                # Usage and model as the service saw them; latency as the student saw it
+                for key in ("model", "policy", "prompt_tokens", "completion_tokens", "cached_tokens", "requests"):
+                    self.report[key] = data["record"][key]
+                if data["record"]["error"]:
+                    self.metrics.fail(data["record"]["error"])
+                return
+            elif event == "error":
+                _raise(data)
+        raise TutorServiceError("tutor service closed the stream early")
+
+    def fail(self, exc):
+        self.metrics.fail(exc)
+
+    def finish(self, render_stats=None):
+        self._scope.close()
+        record = self.metrics.finish(self.report, render_stats).record
+        self.client.metrics.record(self.metrics)
+        return record
+
+
+class TutorClient:
+    """Streams turns from a tutor service (TUTOR_SERVICE_URL) instead of calling the model here"""
+
+    def __init__(self, base_url, metrics, timeout=None, stats_ttl=5.0):
+        self.base_url = base_url.rstrip("/")
+        self.metrics = metrics
+        self.http = httpx.Client(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout or 300.0, connect=5.0),
+        )
+        self.stats_ttl = stats_ttl
+        self._stats = (0.0, None)
+
+    def start(self, prompt, history, student_class, medium, session_id, window=None, school=None):
+        """A new turn (`window` is unused: the service trims the history itself)"""
+        return RemoteTurn(self, prompt, history, student_class, medium, session_id, school)
+
+    def remaining(self, session_id, school=None):
+        """The service's quota figures for this student and school; None if unreachable"""
+        try:
+            response = self.http.get("/quota", params={"session_id": session_id, "school": school or ""},
+                                     timeout=2.0)
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as exc:
+            logger.warning("tutor service quota unavailable: %s", exc)
+            return None
+
+    def snapshot(self):
+        """The service's /stats, refreshed at most every `stats_ttl` seconds; None if unreachable"""
+        fetched, stats = self._stats
+        if time.monotonic() - fetched < self.stats_ttl:
+            return stats
+        try:
+            stats = self.http.get("/stats", timeout=2.0).json()
+        except (httpx.HTTPError, ValueError) as exc:
+            logger.warning("tutor service stats unavailable: %s", exc)
+            stats = None
+        self._stats = (time.monotonic(), stats)
+        return stats
@@ -0,0 +1,305 @@
+"""The tutor backend as a standalone streaming HTTP service (ASGI + SSE).
+
+Runs the same answer path as kimiapp.py (see tutor.py) behind a small
+ASGI app, so any front-end can use it and the model path can be scaled
+apart from the UI:
+
+    uvicorn tutor_service:app --host 0.0.0.0 --port 8600 --workers 1
+    TUTOR_SERVICE_URL=http://127.0.0.1:8600 streamlit run kimiapp.py
+
+POST /chat takes a JSON body
+
+    {"prompt": "...", "class": "10", "medium": "English",
+     "session_id": "...",                # scheduler fairness and quotas, optional
+     "school": "...",                    # tenant for quotas (default SCHOOL_ID), optional
+     "history": [{"role", "content"}],   # the conversation so far, or
+     "conversation_id": "..." | "new"}   # keep it in the service's store (bots)
+
+and answers with Server-Sent Events, in this order:
+
+    start   {"warnings": [...], "conversation_id": ...}
+    queue   {"position": n}              # while waiting for a model slot
+    meta    {"report": {...}, "history_stats": {...}, "admitted": bool}
+    token   {"text": "..."}              # many
+    done    {"record": {...}}            # the turn's metrics record
+    error   {"type": "...", "message": "..."}   # instead of the rest
+
+GET /stats returns the backend statistics, GET /quota?session_id=&school=
+the tokens left today (quotas.py), GET /metrics the Prometheus text and
+GET /health a liveness check. Identical prompts in flight are
+coalesced into one model stream (tutor.Coalescer). A client that
+disconnects cancels its turn.
+
+Every turn runs in a worker thread (the Groq client and the scheduler
+are synchronous); TUTOR_SERVICE_THREADS bounds how many turns can be
+open at once, including those waiting in the scheduler's queue.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from dotenv import load_dotenv
+
+from answer_cache import AnswerCache
+from answer_packs import AnswerPacks
+from completion import ResilientCompleter
+from completion_policy import CompletionPolicy
+from conversation_store import ConversationStore
+from curriculum_store import CurriculumStore
+from groq_client import create_client
+from intent import FastPath
+from local_model import LocalBackend
+from metrics import MetricsRecorder
+from prompt_prefix import PrefixRegistry
+from quotas import QuotaExceeded
+from scheduler import RequestScheduler
+from textbook_index import TextbookIndex
+from token_estimator import prompt_too_long
+from topic_classifier import TopicClassifier
+from tutor import Tutor
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 256 * 1024
+
+
+def create_tutor(api_key=None):
+    """The service's own backend objects (kimiapp builds the same set in resources.py)"""
+    load_dotenv()
+    api_key = api_key or os.getenv("GROK-API-KEY")
+    if not api_key:
+        raise RuntimeError("GROK-API-KEY is not set")
+    client, pool_stats = create_client(api_key)
+    completer = ResilientCompleter(client, fallback=LocalBackend.from_env())
+    curriculum_store = CurriculumStore()
+    textbook_index = TextbookIndex()
+    textbook_index.build()
+    metrics = MetricsRecorder()
+    return Tutor(
+        completer=completer,
+        completion_policy=CompletionPolicy(completer.models),
+        scheduler=RequestScheduler(),
+        answer_cache=AnswerCache(),
+        answer_packs=AnswerPacks(),
+        fast_path=FastPath(curriculum_store),
+        textbook_index=textbook_index,
+        prefix_registry=PrefixRegistry(),
+        metrics=metrics,
+        pool_stats=pool_stats,
+        topic_classifier=TopicClassifier(),
+    )
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def _error(exc):
+    error = {"type": type(exc).__name__, "message": str(exc)}
+    if isinstance(exc, QuotaExceeded):
+        error.update(scope=exc.scope, retry_after=exc.retry_after)
+    return error
+
+
+class TutorService:
+    """ASGI application around a `Tutor`"""
+
+    def __init__(self, tutor=None, conversation_store=None, threads=None):
+        self._tutor = tutor
+        self._conversation_store = conversation_store
+        self._init_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or int(os.getenv("TUTOR_SERVICE_THREADS", "64")),
+            thread_name_prefix="tutor",
+        )
+
+    @property
+    def tutor(self):
+        with self._init_lock:
+            if self._tutor is None:
+                self._tutor = create_tutor()
+            return self._tutor
+
+    @property
+    def conversation_store(self):
+        with self._init_lock:
+            if self._conversation_store is None:
+                self._conversation_store = ConversationStore()
+                self._conversation_store.start_compaction()
+            return self._conversation_store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        route = (scope["method"], scope["path"].rstrip("/") or "/")
+        if route == ("POST", "/chat"):
+            await self._chat(receive, send)
+        elif route == ("GET", "/stats"):
+            stats = await asyncio.get_running_loop().run_in_executor(self.executor, self.tutor.snapshot)
+            await self._respond(send, 200, json.dumps(stats).encode("utf-8"), b"application/json")
+        elif route == ("GET", "/quota"):
+            query = parse_qs(scope.get("query_string", b"").decode("utf-8"))
+            remaining = self.tutor.remaining(query.get("session_id", [""])[0], query.get("school", [None])[0])
+            await self._respond(send, 200, json.dumps(remaining).encode("utf-8"), b"application/json")
+        elif route == ("GET", "/metrics"):
+            await self._respond(send, 200, self.tutor.metrics.prometheus().encode("utf-8"),
+                                b"text/plain; version=0.0.4; charset=utf-8")
+        elif route == ("GET", "/health"):
+            await self._respond(send, 200, b'{"status": "ok"}', b"application/json")
+        else:
+            await self._respond(send, 404, b'{"error": "not found"}', b"application/json")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Build the backend (textbook index, curriculum) before taking traffic
+                await asyncio.get_running_loop().run_in_executor(self.executor, lambda: self.tutor)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _respond(send, status, body, content_type):
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _read_body(receive):
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            body += message.get("body", b"")
+            if len(body) > MAX_BODY_BYTES:
+                raise ValueError("request body too large")
+            if not message.get("more_body"):
+                return body
+
+    async def _chat(self, receive, send):
+        try:
+            body = await self._read_body(receive)
+            if body is None:
+                return
+            request = json.loads(body)
+            if not isinstance(request, dict) or not isinstance(request.get("prompt"), str) or not request["prompt"].strip():
+                raise ValueError("'prompt' is required")
+            oversized = prompt_too_long(request["prompt"])
+            if oversized:
+                raise ValueError(f"prompt is about {oversized[0]} tokens, the limit is {oversized[1]}")
+        except ValueError as exc:
+            await self._respond(send, 400, json.dumps({"error": str(exc)}).encode("utf-8"), b"application/json")
+            return
+
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ]})
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def emit(event, data):
+            loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            cancelled.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        worker = loop.run_in_executor(self.executor, self._run_turn, request, emit, cancelled)
+        try:
+            while True:
+                event, data = await events.get()
+                if event is None:
+                    break
+                await send({"type": "http.response.body", "body": _sse(event, data), "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            cancelled.set()
+        finally:
+            watcher.cancel()
+            await worker
+
+    def _run_turn(self, request, emit, cancelled):
+        """One /chat turn, in a worker thread; events go back through `emit`"""
+        turn, failed = None, False
+        try:
+            history, conversation = self._history(request)
+            turn = self.tutor.start(
+                request["prompt"], history, request.get("class", "Select"), request.get("medium", "Select"),
+                request.get("session_id") or uuid.uuid4().hex, school=request.get("school"),
+            )
+            emit("start", {"warnings": turn.warnings, "conversation_id": conversation.id if conversation else None})
+            tokens = turn.stream(on_wait=lambda position: emit("queue", {"position": position}))
+            emit("meta", {
+                "report": dict(turn.report),
+                "history_stats": turn.history_stats,
+                "admitted": turn.metrics.record["queue_ms"] is not None,
+            })
+            received = []
+            for token in tokens:
+                if cancelled.is_set():
+                    turn.fail("ClientDisconnected")
+                    tokens.close()
+                    break
+                received.append(token)
+                emit("token", {"text": token})
+            if conversation and received and not cancelled.is_set():
+                conversation.append(self.conversation_store, "user", request["prompt"])
+                conversation.append(self.conversation_store, "assistant", "".join(received))
+        except Exception as exc:
+            failed = True
+            if turn:
+                turn.fail(exc)
+            logger.warning("tutor turn failed: %s: %s", type(exc).__name__, exc)
+            emit("error", _error(exc))
+        finally:
+            record = turn.finish() if turn else None
+            if not failed:
+                emit("done", {"record": record})
+            emit(None, None)
+
+    def _history(self, request):
+        """(history, conversation): from the request, or from the service's conversation store"""
+        conversation_id = request.get("conversation_id")
+        if not conversation_id:
+            return [m for m in request.get("history", []) if m.get("role") in ("user", "assistant")], None
+        store = self.conversation_store
+        conversation = None if conversation_id == "new" else store.open_conversation(conversation_id)
+        conversation = conversation or store.new_conversation()
+        return conversation.messages(store), conversation
+
+
+app = TutorService()
+
+
+def main():
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the tutor backend as an HTTP/SSE service")
+    parser.add_argument("--host", default=os.getenv("TUTOR_SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("TUTOR_SERVICE_PORT", "8600")))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Static UI content for kimiapp.py.
+
+Everything here is built once when the module is first imported, not on
+every Streamlit rerun: the CSS and header are one precomputed HTML block,
+and the markdown panels are dedented up front.
+"""
+import textwrap
+
+# ═══════════════════════════════════════════════════════════════
+# PAGE CONFIGURATION
+# ═══════════════════════════════════════════════════════════════
+PAGE_CONFIG = {
+    "page_title": "AI9Campus Smart Tutor - Telangana State Board",
+    "page_icon": "🎓",
+    "layout": "centered",
+    "initial_sidebar_state": "expanded",
+}
+
+# ═══════════════════════════════════════════════════════════════
+# CUSTOM CSS & HEADER (one markdown element)
+# ═══════════════════════════════════════════════════════════════
+_CSS = """
+    <style>
+    .main-header {
+        text-align: center;
+        color: #1E88E5;
+        font-size: 2.5rem;
+        font-weight: bold;
+        margin-bottom: 0.5rem;
+    }
+    .sub-header {
+        text-align: center;
+        color: #43A047;
+        font-size: 1.2rem;
+        margin-bottom: 2rem;
+    }
+    .info-box {
+        background-color: #E3F2FD;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #1E88E5;
+        margin-bottom: 1rem;
+    }
+    .warning-box {
+        background-color: #FFF3E0;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #FF9800;
+        margin-bottom: 1rem;
+    }
+    </style>
+"""
+
+HEADER_HTML = (
+    " ".join(_CSS.split())
+    + '<div class="main-header">🎓 School-Name Smart Tutor</div>'
+    + '<div class="sub-header">Telangana State Board (SCERT) - Classes 1 to 10</div>'
+)
+
+# ═══════════════════════════════════════════════════════════════
+# SIDEBAR
+# ═══════════════════════════════════════════════════════════════
+CLASS_OPTIONS = ["Select", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10"]
+MEDIUM_OPTIONS = ["Select", "English", "Telugu", "Urdu"]
+
+CURRICULUM_INFO_MD = textwrap.dedent("""
+    **Official Source:**  
+    SCERT Telangana e-Textbooks  
+    [https://scert.telangana.gov.in/](https://scert.telangana.gov.in/)
+    
+    **Academic Year:** 2024-25
+    
+    **Coverage:**
+    - 📖 **Classes:** 1 to 10
+    - 🗣️ **Mediums:** English, Telugu, Urdu
+    - 📝 **Subjects:** All SCERT subjects
+    
+    **Support:**
+    - Primary (1-5)
+    - Upper Primary (6-7)
+    - High School (8-10)
+    - SSC Exam Preparation
+    """)
+
+NOTES_MD = textwrap.dedent("""
+    **⚠️ Important Notes:**
+    - Always verify chapter numbers with your textbook
+    - Report any curriculum mismatches
+    - This bot covers only TS Board syllabus
+    
+    **Need Help?**
+    Press 👎 below any response to provide feedback.
+    """)
+
+# ═══════════════════════════════════════════════════════════════
+# WELCOME MESSAGE & FOOTER PANELS
+# ═══════════════════════════════════════════════════════════════
+WELCOME_MD = textwrap.dedent("""
+        ### Welcome to AI9Campus Smart Tutor! 👋
+        
+        I'm your personal learning assistant for **Telangana State Board (SCERT)** curriculum.
+        
+        📚 **I can help you with:**
+        - Explaining concepts from your textbooks (Classes 1-10)
+        - Solving numerical problems step-by-step
+        - Exam preparation and answer writing techniques
+        - Clarifying doubts in English, Telugu, or Urdu medium
+        
+        **Let's get started!** Ask me anything from your syllabus, or try:
+        - "Explain 10th class Social Studies Chapter 1"
+        - "How do I solve quadratic equations?"
+        - "What is photosynthesis in simple terms?"
+        - "తెలుగు మాధ్యమంలో వివరించు" (Ask in Telugu!)
+        """)
+
+SAMPLE_QUESTIONS_MD = textwrap.dedent("""
+        **Try asking:**
+        - Explain the water cycle (Class 6 Science)
+        - What is democracy? (Class 9 Social)
+        - Solve: x² + 5x + 6 = 0 (Class 10 Maths)
+        - రుతువులు ఎలా వస్తాయి? (Telugu)
+        """)
+
+EXAM_TIPS_MD = textwrap.dedent("""
+        **SSC Exam Strategies:**
+        - Read questions carefully (2 min)
+        - Attempt easy questions first
+        - Show all steps in numericals
+        - Use diagrams where required
+        - Review answers (last 15 min)
+        """)
+
+HELP_MD = textwrap.dedent("""
+        **Support:**
+        - Report errors using 👎 button
+        - Check textbook for chapter numbers
+        - Verify content with your teacher
+        - Visit: scert.telangana.gov.in
+        """)